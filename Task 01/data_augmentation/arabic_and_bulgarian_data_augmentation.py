@@ -3,22 +3,39 @@ import uuid
 import time
 import random
 import pandas as pd
-from google import genai
 from dotenv import load_dotenv
 import json
+from collections import deque
+from response_cache import open_cache_from_env
+from dataset_writer import DatasetWriter
+from dedup_index import NearDuplicateIndex, weighted_sample
+from gemini_engine import GenerationEngine, create_client
 
 # Load API Key
 load_dotenv()
 
 
 api_key = os.getenv("api_key_gemini")
-model = genai.Client(api_key=api_key)
+model = create_client(api_key)
 
 # Constants
 MIN_DATASET_SIZE = 250  # Minimum dataset size per language
 SENTENCES_PER_REQUEST = 50  # Number of sentences to generate in each API call
 MAX_RETRIES = 5         # Maximum number of retry attempts
 RETRY_DELAY = 4         # Base delay in seconds between retries
+CHUNK_SIZE = 50000      # Rows read at a time when scanning a saved dataset
+DATASET_COLUMNS = ["sentence_id", "sentence", "label"]
+
+# Original CheckThat training data; generated sentences too close to it are rejected
+ORIGINAL_TRAIN_FILES = {
+    "ar": "train_ar.tsv",
+    "bg": "train_bg.tsv"
+}
+
+# Shared rate-limited engine used by every generation call in this script;
+# responses are cached on disk so a resumed run skips batches it already generated
+engine = GenerationEngine(model, max_retries=MAX_RETRIES, retry_delay=RETRY_DELAY,
+                          cache=open_cache_from_env())
 
 # Topics to diversify the dataset
 TOPICS = [
@@ -33,21 +50,9 @@ def log(msg, level="INFO"):
     timestamp = time.strftime("%H:%M:%S")
     print(f"[{timestamp}] [{level}] {msg}")
 
-# Retry-safe generation function with exponential backoff
+# Retry-safe generation function with jittered exponential backoff and quota limiting
 def generate_content(prompt, retries=MAX_RETRIES, delay=RETRY_DELAY):
-    for attempt in range(retries):
-        try:
-            response = model.models.generate_content(
-                            model = "gemini-2.5-flash-preview-04-17",
-                            contents=[prompt]
-                            )
-            return response.text.strip()
-        except Exception as e:
-            backoff = delay * (2 ** attempt) + random.uniform(0, 1)
-            log(f"API Error: {str(e)[:100]}... retrying in {backoff:.1f}s (attempt {attempt+1}/{retries})", "ERROR")
-            time.sleep(backoff)
-    log(f"Failed after {retries} attempts", "ERROR")
-    return ""
+    return engine.generate(prompt, max_retries=retries, retry_delay=delay).strip()
 
 # Carefully parse generated content to handle potential formatting issues
 def parse_generated_lines(content, expected_label):
@@ -82,7 +87,7 @@ def parse_generated_lines(content, expected_label):
     return lines
 
 # Dynamic prompt templates with topic focus and larger batch size
-def get_prompt(language, label_type, topics=None):
+def get_prompt(language, label_type, topics=None, count=SENTENCES_PER_REQUEST):
     topic_context = ""
     if topics:
         topic_list = ", ".join(topics)
@@ -91,7 +96,7 @@ def get_prompt(language, label_type, topics=None):
     base_prompts = {
         "ar": {
             "OBJ": f"""
-اكتب {SENTENCES_PER_REQUEST} جملة موضوعية باللغة العربية{topic_context}. يجب أن تكون مبنية على حقائق قابلة للتحقق وتشبه أسلوب الأخبار أو المقالات الرسمية.
+اكتب {count} جملة موضوعية باللغة العربية{topic_context}. يجب أن تكون مبنية على حقائق قابلة للتحقق وتشبه أسلوب الأخبار أو المقالات الرسمية.
 
 تعليمات مهمة:
 1. كل جملة يجب أن تكون مستقلة بذاتها
@@ -106,10 +111,10 @@ def get_prompt(language, label_type, topics=None):
 - "تحتل الصين المرتبة الأولى عالمياً في إنتاج الطاقة الشمسية. | OBJ"
 - "أعلنت منظمة الصحة العالمية عن برنامج جديد لمكافحة الأمراض المعدية في أفريقيا. | OBJ"
 
-قم بإنشاء {SENTENCES_PER_REQUEST} جملة موضوعية مختلفة الآن. تذكر أن تنوع في المواضيع والمحتوى لكل جملة:
+قم بإنشاء {count} جملة موضوعية مختلفة الآن. تذكر أن تنوع في المواضيع والمحتوى لكل جملة:
 """,
             "SUBJ": f"""
-اكتب {SENTENCES_PER_REQUEST} جملة ذات طابع شخصي أو تعبيري باللغة العربية{topic_context}. يجب أن تعكس آراء أو مواقف شخصية، وتشبه الأسلوب الصحفي التحليلي أو المدونات.
+اكتب {count} جملة ذات طابع شخصي أو تعبيري باللغة العربية{topic_context}. يجب أن تعكس آراء أو مواقف شخصية، وتشبه الأسلوب الصحفي التحليلي أو المدونات.
 
 تعليمات مهمة:
 1. كل جملة يجب أن تكون مستقلة بذاتها
@@ -124,12 +129,12 @@ def get_prompt(language, label_type, topics=None):
 - "يبدو لي أن السياسات الاقتصادية الحالية لن تحقق النتائج المرجوة. | SUBJ"
 - "من المؤسف حقاً رؤية هذا التدهور المستمر في مستوى الخدمات الصحية. | SUBJ"
 
-قم بإنشاء {SENTENCES_PER_REQUEST} جملة شخصية مختلفة الآن. تذكر أن تنوع في المواضيع والمحتوى لكل جملة:
+قم بإنشاء {count} جملة شخصية مختلفة الآن. تذكر أن تنوع في المواضيع والمحتوى لكل جملة:
 """
         },
         "bg": {
             "OBJ": f"""
-Генерирай {SENTENCES_PER_REQUEST} обективни изречения на български език{' за следните теми: ' + topic_list if topics else ''}. Изреченията трябва да представят факти и да наподобяват новинарски стил или енциклопедичен тон.
+Генерирай {count} обективни изречения на български език{' за следните теми: ' + topic_list if topics else ''}. Изреченията трябва да представят факти и да наподобяват новинарски стил или енциклопедичен тон.
 
 Важни инструкции:
 1. Всяко изречение трябва да бъде независимо
@@ -144,10 +149,10 @@ def get_prompt(language, label_type, topics=None):
 - "Европейският съюз въведе нови регулации за дигиталните услуги през 2024 година. | OBJ"
 - "Стара планина разделя България на северна и южна част. | OBJ"
 
-Моля, създай {SENTENCES_PER_REQUEST} различни обективни изречения сега, като се стараеш да покриеш разнообразни теми:
+Моля, създай {count} различни обективни изречения сега, като се стараеш да покриеш разнообразни теми:
 """,
             "SUBJ": f"""
-Генерирай {SENTENCES_PER_REQUEST} субективни изречения на български език{' за следните теми: ' + topic_list if topics else ''}. Изреченията трябва да отразяват лични мнения, чувства или оценки. Стилът трябва да напомня на публицистика или блог.
+Генерирай {count} субективни изречения на български език{' за следните теми: ' + topic_list if topics else ''}. Изреченията трябва да отразяват лични мнения, чувства или оценки. Стилът трябва да напомня на публицистика или блог.
 
 Важни инструкции:
 1. Всяко изречение трябва да бъде независимо
@@ -162,7 +167,7 @@ def get_prompt(language, label_type, topics=None):
 - "Чувствам се разочарован от липсата на амбиция в културната политика на държавата. | SUBJ"
 - "Смятам, че туристическият потенциал на България остава недостатъчно развит. | SUBJ"
 
-Моля, създай {SENTENCES_PER_REQUEST} различни субективни изречения сега, като се стараеш да покриеш разнообразни теми:
+Моля, създай {count} различни субективни изречения сега, като се стараеш да покриеш разнообразни теми:
 """
         }
     }
@@ -170,9 +175,15 @@ def get_prompt(language, label_type, topics=None):
     return base_prompts[language][label_type]
 
 # Generate a batch of sentences with multi-topic approach
-def generate_batch(language, label_type, num_topics=3):
-    # Select random topics to focus on
-    selected_topics = random.sample(TOPICS, min(num_topics, len(TOPICS)))
+def generate_batch(language, label_type, num_topics=3, batch_index=None, dedup=None):
+    # Select random topics to focus on; seeding by batch index keeps the prompt for
+    # each batch stable across reruns so cached batches are replayed, not regenerated
+    rng = random.Random(f"{language}-{label_type}-{batch_index}") if batch_index is not None else random
+    if dedup is not None:
+        # Steer away from topics that mostly produce near-duplicates
+        selected_topics = weighted_sample(TOPICS, dedup.topic_weights(TOPICS, label_type), num_topics, rng)
+    else:
+        selected_topics = rng.sample(TOPICS, min(num_topics, len(TOPICS)))
     
     # Generate with topic guidance
     prompt = get_prompt(language, label_type, selected_topics)
@@ -180,65 +191,118 @@ def generate_batch(language, label_type, num_topics=3):
     
     if not content:
         log(f"Failed to generate content for {language}/{label_type}", "WARNING")
-        return []
+        return None
         
     lines = parse_generated_lines(content, label_type)
+    if dedup is not None:
+        lines = dedup.filter_batch(lines, selected_topics)
     log(f"Generated {len(lines)} {label_type} sentences for {language} with topics: {', '.join(selected_topics)}")
     return lines
 
+# Log summary statistics for a saved dataset, reading it in chunks
+def log_dataset_statistics(language_code, output_path):
+    total, objective, subjective, total_length = 0, 0, 0, 0
+    for chunk in pd.read_csv(output_path, sep="\t", chunksize=CHUNK_SIZE):
+        total += len(chunk)
+        objective += int((chunk["label"] == "OBJ").sum())
+        subjective += int((chunk["label"] == "SUBJ").sum())
+        total_length += int(chunk["sentence"].astype(str).str.len().sum())
+    
+    stats = {
+        "language": language_code,
+        "total_samples": total,
+        "objective_samples": objective,
+        "subjective_samples": subjective,
+        "avg_sentence_length": total_length / total if total else 0.0
+    }
+    
+    log(f"Dataset statistics: {json.dumps(stats, indent=2)}")
+    log(f"Successfully saved {total} rows to {output_path}")
+    return stats
+
+# Near-duplicate index seeded with the original training data and any resumed batches
+def build_dedup_index(language_code, writer):
+    dedup = NearDuplicateIndex()
+    original_path = ORIGINAL_TRAIN_FILES.get(language_code)
+    if original_path and os.path.exists(original_path):
+        log(f"Indexed {dedup.add_tsv(original_path)} original sentences from {original_path}")
+    if writer.rows:
+        dedup.add_corpus(row[1] for row in writer.iter_rows())
+    return dedup
+
+def log_dedup_report(dedup):
+    log(f"Overall dedup ratio: {dedup.dedup_ratio():.2%}")
+    log(f"Dedup ratio per topic/label: {json.dumps(dedup.report(), indent=2)}")
+
+# Attach ids to parsed (sentence, label) pairs
+def to_rows(lines):
+    return [(str(uuid.uuid4()), sentence, label) for sentence, label in lines]
+
 # Main function to create and save dataset
 def create_dataset(language_code, min_samples=MIN_DATASET_SIZE, output_path=None):
     if not output_path:
         output_path = f"{language_code}_train_expanded.tsv"
     
     log(f"Starting dataset generation for {language_code.upper()}")
-    all_data = []
+    
+    # Every batch is flushed to disk as it arrives; a rerun resumes from the manifest
+    writer = DatasetWriter(output_path, DATASET_COLUMNS)
+    if writer.rows:
+        log(f"Resuming with {writer.rows} sentences from {len(writer.completed)} saved batches")
+    batch_index = len(writer.completed)
+    dedup = build_dedup_index(language_code, writer)
     
     # Generate data until we reach the minimum dataset size
-    while len(all_data) < min_samples:
+    while writer.rows < min_samples:
         # Alternate between objective and subjective sentences
-        label_type = "OBJ" if len(all_data) % 2 == 0 else "SUBJ"
+        label_type = "OBJ" if writer.rows % 2 == 0 else "SUBJ"
         
         # Generate a batch with varying topic focus each time
-        new_data = generate_batch(language_code, label_type, num_topics=3)
-        all_data.extend(new_data)
+        new_data = generate_batch(language_code, label_type, num_topics=3, batch_index=batch_index, dedup=dedup)
+        if new_data is None:
+            # The engine gave up; nothing is committed and the same batch is requested
+            # again, so batch keys stay contiguous for resuming
+            continue
+        writer.write_batch(to_rows(new_data), key=f"batch-{batch_index}", shuffle=True)
+        batch_index += 1
         
-        log(f"Progress: {len(all_data)}/{min_samples} sentences collected")
+        log(f"Progress: {writer.rows}/{min_samples} sentences collected")
     
-    # Process and save final dataset
-    rows = []
-    for sentence, label in all_data:
-        sentence_id = str(uuid.uuid4())
-        rows.append((sentence_id, sentence, label))
+    # Stream the shuffled dataset to its final TSV
+    writer.finalize(shuffle=True)
+    log_dataset_statistics(language_code, output_path)
+    log_dedup_report(dedup)
     
-    # Shuffle the dataset
-    random.shuffle(rows)
-    
-    # Save as TSV
-    df = pd.DataFrame(rows, columns=["sentence_id", "sentence", "label"])
-    df.to_csv(output_path, sep="\t", index=False)
-    
-    # Generate statistics
-    stats = {
-        "language": language_code,
-        "total_samples": len(df),
-        "objective_samples": len(df[df["label"] == "OBJ"]),
-        "subjective_samples": len(df[df["label"] == "SUBJ"]),
-        "avg_sentence_length": df["sentence"].str.len().mean()
-    }
+    return output_path
+
+# Function to validate dataset quality (exact duplicates only; near-duplicates
+# are already rejected during generation by the dedup index)
+def validate_dataset(dataset, language):
+    """Basic validation of dataset quality (accepts a DataFrame or a TSV path)"""
+    chunks = pd.read_csv(dataset, sep="\t", chunksize=CHUNK_SIZE) if isinstance(dataset, str) else [dataset]
     
-    log(f"Dataset statistics: {json.dumps(stats, indent=2)}")
-    log(f"Successfully saved {len(df)} rows to {output_path}")
+    # Accumulate counts chunk by chunk so large datasets never load at once
+    total = 0
+    label_counts = {}
+    seen = set()
+    duplicate_count = 0
+    short_count = 0
+    for chunk in chunks:
+        total += len(chunk)
+        for label, count in chunk["label"].value_counts().items():
+            label_counts[label] = label_counts.get(label, 0) + int(count)
+        sentences = chunk["sentence"].astype(str)
+        for sentence in sentences:
+            key = hash(sentence)
+            if key in seen:
+                duplicate_count += 1
+            else:
+                seen.add(key)
+        short_count += int((sentences.str.len() < 20).sum())
     
-    return df
-
-# Function to validate dataset quality
-def validate_dataset(df, language):
-    """Basic validation of dataset quality"""
-    log(f"Validating {language} dataset with {len(df)} samples")
+    log(f"Validating {language} dataset with {total} samples")
     
     # Check label distribution
-    label_counts = df["label"].value_counts().to_dict()
     log(f"Label distribution: {label_counts}")
     
     # Check for balanced dataset
@@ -247,14 +311,12 @@ def validate_dataset(df, language):
         log(f"Warning: Dataset is imbalanced (ratio: {label_ratio:.2f})", "WARNING")
     
     # Check for duplicates
-    duplicate_count = len(df) - len(df["sentence"].unique())
     if duplicate_count > 0:
         log(f"Warning: Found {duplicate_count} duplicate sentences", "WARNING")
     
     # Check sentence length
-    short_sentences = df[df["sentence"].str.len() < 20]
-    if len(short_sentences) > 0:
-        log(f"Warning: Found {len(short_sentences)} very short sentences", "WARNING")
+    if short_count > 0:
+        log(f"Warning: Found {short_count} very short sentences", "WARNING")
     
     return True
 
@@ -265,69 +327,75 @@ def create_enhanced_dataset(language_code, min_samples=MIN_DATASET_SIZE, output_
         output_path = f"{language_code}_train_expanded.tsv"
     
     log(f"Starting enhanced dataset generation for {language_code.upper()}")
-    all_data = []
     
-    # First generate general content
-    for label_type in ["OBJ", "SUBJ"]:
-        prompt = get_prompt(language_code, label_type)
-        content = generate_content(prompt)
-        lines = parse_generated_lines(content, label_type)
-        all_data.extend(lines)
-        log(f"Generated {len(lines)} general {label_type} sentences")
+    # Every batch is flushed to disk as it arrives; a rerun resumes from the manifest
+    writer = DatasetWriter(output_path, DATASET_COLUMNS)
+    if writer.rows:
+        log(f"Resuming with {writer.rows} sentences from {len(writer.completed)} saved batches")
+    dedup = build_dedup_index(language_code, writer)
     
-    # Then generate topic-specific content
+    # General content first, then topic-specific content, in the original order
+    jobs = [(label_type, None) for label_type in ["OBJ", "SUBJ"]]
     topic_groups = [TOPICS[i:i+4] for i in range(0, len(TOPICS), 4)]
     for topic_group in topic_groups:
-        if len(all_data) >= min_samples:
-            break
-            
         for label_type in ["OBJ", "SUBJ"]:
-            prompt = get_prompt(language_code, label_type, topic_group)
-            content = generate_content(prompt)
-            lines = parse_generated_lines(content, label_type)
-            all_data.extend(lines)
-            log(f"Generated {len(lines)} {label_type} sentences for topics: {', '.join(topic_group)}")
-            
-            if len(all_data) >= min_samples:
-                break
-    
-    # Process and save final dataset
-    rows = []
-    for sentence, label in all_data:
-        sentence_id = str(uuid.uuid4())
-        rows.append((sentence_id, sentence, label))
+            jobs.append((label_type, topic_group))
     
-    # Shuffle the dataset
-    random.shuffle(rows)
+    # Skip batches a previous run already saved
+    jobs = [(label_type, topic_group, f"{label_type}-{'+'.join(topic_group) if topic_group else 'general'}")
+            for label_type, topic_group in jobs]
+    jobs = [job for job in jobs if job[2] not in writer.completed]
     
-    # Save as TSV
-    df = pd.DataFrame(rows, columns=["sentence_id", "sentence", "label"])
-    df.to_csv(output_path, sep="\t", index=False)
-    
-    # Generate statistics
-    stats = {
-        "language": language_code,
-        "total_samples": len(df),
-        "objective_samples": len(df[df["label"] == "OBJ"]),
-        "subjective_samples": len(df[df["label"] == "SUBJ"]),
-        "avg_sentence_length": df["sentence"].str.len().mean()
-    }
+    # Jobs are submitted lazily: general batches always, topic batches only while the
+    # requests in flight (SENTENCES_PER_REQUEST each) don't already cover what is
+    # missing to reach min_samples, so no paid request is started once it is reached
+    pending = deque()
+    remaining = iter(jobs)
+    next_job = next(remaining, None)
+    while True:
+        while next_job is not None and len(pending) < engine.max_concurrency:
+            label_type, topic_group, key = next_job
+            if topic_group is not None:
+                needed = -(-max(min_samples - writer.rows, 0) // SENTENCES_PER_REQUEST)
+                if len(pending) >= needed:
+                    break
+            pending.append((next_job, engine.submit(get_prompt(language_code, label_type, topic_group))))
+            next_job = next(remaining, None)
+        if not pending:
+            break
+        
+        # Requests already in flight have been paid for, so their sentences are kept
+        (label_type, topic_group, key), future = pending.popleft()
+        content = future.result().strip()
+        if not content:
+            # The engine gave up on this request; leave the key out of the batch log so a rerun retries it
+            log(f"No response for {key}, it will be retried on the next run", "WARNING")
+            continue
+        lines = parse_generated_lines(content, label_type)
+        lines = dedup.filter_batch(lines, topic_group)
+        writer.write_batch(to_rows(lines), key=key, shuffle=True)
+        if topic_group is None:
+            log(f"Generated {len(lines)} general {label_type} sentences")
+        else:
+            log(f"Generated {len(lines)} {label_type} sentences for topics: {', '.join(topic_group)}")
     
-    log(f"Dataset statistics: {json.dumps(stats, indent=2)}")
-    log(f"Successfully saved {len(df)} rows to {output_path}")
+    # Stream the shuffled dataset to its final TSV
+    writer.finalize(shuffle=True)
+    log_dataset_statistics(language_code, output_path)
+    log_dedup_report(dedup)
     
-    return df
+    return output_path
 
 # Main execution
 if __name__ == "__main__":
     log(f"Starting data generation process")
     
     # Generate Arabic dataset using enhanced method
-    arabic_df = create_enhanced_dataset("ar", MIN_DATASET_SIZE, "arabic_train_expanded1.tsv")
-    validate_dataset(arabic_df, "Arabic")
+    arabic_path = create_enhanced_dataset("ar", MIN_DATASET_SIZE, "arabic_train_expanded1.tsv")
+    validate_dataset(arabic_path, "Arabic")
     
     # Generate Bulgarian dataset using enhanced method
-    bulgarian_df = create_enhanced_dataset("bg", MIN_DATASET_SIZE, "bulgarian_train_expanded1.tsv")
-    validate_dataset(bulgarian_df, "Bulgarian")
+    bulgarian_path = create_enhanced_dataset("bg", MIN_DATASET_SIZE, "bulgarian_train_expanded1.tsv")
+    validate_dataset(bulgarian_path, "Bulgarian")
     
     log("All datasets have been generated successfully")
\ No newline at end of file
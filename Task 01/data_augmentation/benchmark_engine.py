@@ -0,0 +1,72 @@
+import time
+import argparse
+from gemini_engine import GenerationEngine, FakeGeminiClient, log
+
+# Offline throughput benchmark: the old one-call-at-a-time loop with fixed sleeps
+# versus the concurrent, rate-limited GenerationEngine, both against FakeGeminiClient.
+
+
+def make_prompts(count):
+    labels = ["OBJ", "SUBJ"]
+    return [f"Generate 50 statements. Format: Statement | {labels[i % 2]}" for i in range(count)]
+
+
+def run_sequential(client, prompts, sleep_between=2.0):
+    """Replicates the original generate_with_gemini loop with time.sleep gaps"""
+    start = time.perf_counter()
+    lines = 0
+    for i, prompt in enumerate(prompts):
+        response = client.models.generate_content(model="fake", contents=[prompt])
+        lines += len(response.text.splitlines())
+        if i < len(prompts) - 1:
+            time.sleep(sleep_between)
+    return time.perf_counter() - start, lines
+
+
+def run_engine(client, prompts, concurrency, requests_per_minute, tokens_per_minute):
+    start = time.perf_counter()
+    with GenerationEngine(client, model="fake",
+                          requests_per_minute=requests_per_minute,
+                          tokens_per_minute=tokens_per_minute,
+                          max_concurrency=concurrency,
+                          retry_delay=0.5) as engine:
+        texts = engine.generate_many(prompts)
+        stats = dict(engine.stats)
+    lines = sum(len(text.splitlines()) for text in texts)
+    return time.perf_counter() - start, lines, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Gemini generation throughput offline")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=1.5, help="Simulated seconds per call")
+    parser.add_argument("--sleep", type=float, default=2.0, help="Fixed gap used by the sequential loop")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rpm", type=int, default=600, help="Requests/min quota given to the engine")
+    parser.add_argument("--tpm", type=int, default=4000000, help="Tokens/min quota given to the engine")
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--skip-sequential", action="store_true")
+    args = parser.parse_args()
+
+    prompts = make_prompts(args.requests)
+    results = []
+
+    if not args.skip_sequential:
+        client = FakeGeminiClient(latency=args.latency, seed=0)
+        elapsed, lines = run_sequential(client, prompts, args.sleep)
+        results.append(("sequential", elapsed, lines))
+        log(f"Sequential loop: {elapsed:.1f}s for {len(prompts)} requests")
+
+    client = FakeGeminiClient(latency=args.latency, failure_rate=args.failure_rate,
+                              requests_per_minute=args.rpm, seed=0)
+    elapsed, lines, stats = run_engine(client, prompts, args.concurrency, args.rpm, args.tpm)
+    results.append((f"engine x{args.concurrency}", elapsed, lines))
+    log(f"Engine stats: {stats}")
+
+    print(f"\n{'mode':<16}{'seconds':>10}{'req/s':>10}{'lines/s':>10}")
+    for mode, elapsed, lines in results:
+        print(f"{mode:<16}{elapsed:>10.2f}{len(prompts) / elapsed:>10.2f}{lines / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
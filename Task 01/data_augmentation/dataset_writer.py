@@ -0,0 +1,227 @@
+import io
+import os
+import csv
+import json
+import time
+import random
+import shutil
+import tempfile
+from collections import Counter
+
+# Append-only, checkpointed writer for augmentation output.
+# Each parsed batch is appended to a `.partial` data file and fsynced, then
+# committed by appending one line to a `.batches.jsonl` log. On restart, the data
+# file is truncated back to the last committed batch, so a crash never loses
+# finished batches and never leaves half a batch behind. The final TSV is built
+# by streaming, so memory use stays flat however large the dataset grows.
+
+ROWS_PER_SHUFFLE_BUCKET = 50000  # Rows shuffled in memory at once during finalize
+MAX_SHUFFLE_BUCKETS = 256
+
+
+def atomic_write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def open_tsv_writer(f, delimiter="\t"):
+    # Matches the quoting pandas.to_csv uses so outputs stay interchangeable
+    return csv.writer(f, delimiter=delimiter, lineterminator="\n", quoting=csv.QUOTE_MINIMAL)
+
+
+def encode_rows(rows):
+    buffer = io.StringIO()
+    open_tsv_writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+class DatasetWriter:
+    """Streams batches of rows to disk and tracks committed batches in a manifest"""
+
+    def __init__(self, output_path, columns, label_column="label"):
+        self.output_path = output_path
+        self.columns = list(columns)
+        self.label_index = self.columns.index(label_column) if label_column in self.columns else None
+        self.data_path = f"{output_path}.partial"
+        self.manifest_path = f"{output_path}.manifest.json"
+        self.log_path = f"{output_path}.batches.jsonl"
+
+        self.rows = 0
+        self.label_counts = Counter()
+        self.completed = set()   # Keys of committed batches, used to skip work on resume
+        self.offset = 0
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            # Resume only an unfinished run with the same schema; otherwise start over
+            if manifest.get("status") == "in_progress" and manifest.get("columns") == self.columns:
+                self._replay_log()
+                return manifest
+
+        for path in (self.data_path, self.log_path):
+            if os.path.exists(path):
+                os.remove(path)
+        manifest = {
+            "output_path": self.output_path,
+            "columns": self.columns,
+            "status": "in_progress",
+            "started": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        atomic_write_json(self.manifest_path, manifest)
+        return manifest
+
+    def _replay_log(self):
+        """Rebuild progress from the batch log and drop any uncommitted tail"""
+        if os.path.exists(self.log_path):
+            with open(self.log_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        batch = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # Torn final line from a crash mid-commit
+                    self.rows += batch["rows"]
+                    self.label_counts.update(batch["label_counts"])
+                    self.completed.add(batch["key"])
+                    self.offset = batch["offset"]
+            # Rewrite the log without a torn tail so later appends stay parseable
+            with open(self.log_path, "rb+") as f:
+                valid = 0
+                for line in f:
+                    try:
+                        json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    valid += len(line)
+                f.truncate(valid)
+        if os.path.exists(self.data_path):
+            with open(self.data_path, "rb+") as f:
+                f.truncate(self.offset)
+
+    def write_batch(self, rows, key=None, shuffle=False, metadata=None):
+        """Durably append one batch of rows and commit it to the batch log"""
+        rows = list(rows)
+        if shuffle:
+            random.shuffle(rows)
+        key = key if key is not None else f"batch-{len(self.completed)}"
+
+        with open(self.data_path, "ab") as f:
+            f.write(encode_rows(rows))
+            f.flush()
+            os.fsync(f.fileno())
+            self.offset = f.tell()
+
+        labels = Counter(row[self.label_index] for row in rows) if self.label_index is not None else Counter()
+        batch = {"key": key, "rows": len(rows), "offset": self.offset, "label_counts": dict(labels)}
+        if metadata:
+            batch.update(metadata)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(batch, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.rows += len(rows)
+        self.label_counts.update(labels)
+        self.completed.add(key)
+        return len(rows)
+
+    def iter_rows(self):
+        """Yield the rows committed so far (used to rebuild in-memory state on resume)"""
+        if os.path.exists(self.data_path):
+            with open(self.data_path, encoding="utf-8", newline="") as f:
+                yield from csv.reader(f, delimiter="\t")
+
+    def _write_shuffled(self, out, rng):
+        # External shuffle: scatter rows into random buckets on disk, then shuffle
+        # each bucket in memory; peak memory is one bucket, not the whole dataset
+        bucket_count = min(MAX_SHUFFLE_BUCKETS, max(1, -(-self.rows // ROWS_PER_SHUFFLE_BUCKET)))
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(self.output_path))) as tmp_dir:
+            buckets = [open(os.path.join(tmp_dir, f"bucket-{i}.tsv"), "w+", encoding="utf-8", newline="")
+                       for i in range(bucket_count)]
+            try:
+                writers = [open_tsv_writer(bucket) for bucket in buckets]
+                with open(self.data_path, encoding="utf-8", newline="") as f:
+                    for row in csv.reader(f, delimiter="\t"):
+                        writers[rng.randrange(bucket_count)].writerow(row)
+                for bucket in buckets:
+                    bucket.seek(0)
+                    rows = list(csv.reader(bucket, delimiter="\t"))
+                    rng.shuffle(rows)
+                    out.writerows(rows)
+            finally:
+                for bucket in buckets:
+                    bucket.close()
+
+    def finalize(self, shuffle=False, seed=None):
+        """Stream the committed rows into the output TSV and mark the run finished"""
+        if not os.path.exists(self.data_path):
+            open(self.data_path, "wb").close()
+        tmp_path = f"{self.output_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as out:
+            writer = open_tsv_writer(out)
+            writer.writerow(self.columns)
+            if shuffle:
+                self._write_shuffled(writer, random.Random(seed))
+            else:
+                with open(self.data_path, encoding="utf-8", newline="") as f:
+                    shutil.copyfileobj(f, out)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, self.output_path)
+
+        self.manifest.update({
+            "status": "finalized",
+            "finished": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "rows": self.rows,
+            "label_counts": dict(self.label_counts),
+            "batches": len(self.completed),
+        })
+        atomic_write_json(self.manifest_path, self.manifest)
+        for path in (self.data_path, self.log_path):
+            if os.path.exists(path):
+                os.remove(path)
+        return self.output_path
+
+    def summary(self):
+        return {"path": self.output_path, "rows": self.rows, "label_counts": dict(self.label_counts)}
+
+
+def read_header(path, delimiter="\t"):
+    with open(path, encoding="utf-8", newline="") as f:
+        return next(csv.reader(f, delimiter=delimiter), [])
+
+
+def merge_tsv_files(input_paths, output_path, delimiter="\t", output_delimiter=None):
+    """Stream-concatenate delimited files into one, like pd.concat(ignore_index=True).
+
+    Columns are the union of all headers in order of first appearance; values
+    missing from a file are left empty. Returns the row count of each input.
+    """
+    output_delimiter = output_delimiter or delimiter
+    columns = []
+    for path in input_paths:
+        for column in read_header(path, delimiter):
+            if column not in columns:
+                columns.append(column)
+
+    counts = []
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=columns, delimiter=output_delimiter,
+                                lineterminator="\n", restval="", extrasaction="ignore")
+        writer.writeheader()
+        for path in input_paths:
+            count = 0
+            with open(path, encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(f, delimiter=delimiter):
+                    writer.writerow(row)
+                    count += 1
+            counts.append(count)
+    os.replace(tmp_path, output_path)
+    return counts
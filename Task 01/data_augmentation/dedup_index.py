@@ -0,0 +1,169 @@
+import re
+import zlib
+import random
+import unicodedata
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+
+# Incremental near-duplicate index for generated sentences.
+# Each sentence is reduced to a MinHash signature over character shingles and
+# bucketed with LSH banding, so a lookup only compares against the handful of
+# sentences sharing a band instead of the whole corpus. Character shingles keep
+# it language-agnostic (Arabic, Bulgarian and English all work the same way).
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+NUM_PERM = 64          # MinHash signature length
+BANDS = 16             # LSH bands (NUM_PERM / BANDS rows per band)
+SHINGLE_SIZE = 5       # Character n-gram size
+THRESHOLD = 0.7        # Estimated Jaccard similarity above which a sentence is a near-duplicate
+
+PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKC", str(text)).lower()
+    text = PUNCTUATION.sub(" ", text)
+    return WHITESPACE.sub(" ", text).strip()
+
+
+class MinHasher:
+    """Vectorised MinHash over character shingles"""
+
+    def __init__(self, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, np.iinfo(np.int64).max, num_perm, dtype=np.int64).astype(np.uint64)
+        self.b = rng.randint(0, np.iinfo(np.int64).max, num_perm, dtype=np.int64).astype(np.uint64)
+
+    def shingles(self, text):
+        k = self.shingle_size
+        if len(text) <= k:
+            return {text}
+        return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+    def signature(self, normalized_text):
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in self.shingles(normalized_text)),
+                             dtype=np.uint64)
+        # Universal hashing (a*x + b mod p) of every shingle under every permutation
+        with np.errstate(over="ignore"):
+            permuted = (hashes[:, None] * self.a + self.b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index that rejects near-duplicates as batches arrive"""
+
+    def __init__(self, threshold=THRESHOLD, num_perm=NUM_PERM, bands=BANDS, shingle_size=SHINGLE_SIZE):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.rows_per_band = num_perm // bands
+        self.buckets = [defaultdict(list) for _ in range(bands)]
+        self.signatures = []
+        self.exact = set()
+        self.stats = defaultdict(lambda: {"seen": 0, "rejected": 0})
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def _band_keys(self, signature):
+        r = self.rows_per_band
+        return [signature[i * r:(i + 1) * r].tobytes() for i in range(len(self.buckets))]
+
+    def _find_match(self, signature, band_keys):
+        checked = set()
+        for bucket, key in zip(self.buckets, band_keys):
+            for candidate in bucket.get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if np.mean(self.signatures[candidate] == signature) >= self.threshold:
+                    return candidate
+        return None
+
+    def check_and_add(self, text):
+        """Return True if `text` is a near-duplicate, otherwise index it and return False"""
+        normalized = normalize(text)
+        exact_key = zlib.crc32(normalized.encode("utf-8")) ^ (len(normalized) << 32)
+        if exact_key in self.exact:
+            return True
+
+        signature = self.hasher.signature(normalized)
+        band_keys = self._band_keys(signature)
+        if self._find_match(signature, band_keys) is not None:
+            return True
+
+        doc_id = len(self.signatures)
+        self.signatures.append(signature)
+        self.exact.add(exact_key)
+        for bucket, key in zip(self.buckets, band_keys):
+            bucket[key].append(doc_id)
+        return False
+
+    def add_corpus(self, sentences):
+        """Index existing sentences (e.g. the original train_*.tsv) without tracking stats"""
+        added = 0
+        for sentence in sentences:
+            if not self.check_and_add(sentence):
+                added += 1
+        return added
+
+    def add_tsv(self, path, column="sentence", chunksize=50000):
+        added = 0
+        for chunk in pd.read_csv(path, sep="\t", usecols=[column], chunksize=chunksize):
+            added += self.add_corpus(chunk[column].dropna().astype(str))
+        return added
+
+    def filter_batch(self, lines, topics=None):
+        """Drop near-duplicates from parsed (sentence, label) pairs, recording per topic/label stats"""
+        topics = topics or ["general"]
+        accepted = []
+        for sentence, label in lines:
+            duplicate = self.check_and_add(sentence)
+            for topic in topics:
+                stats = self.stats[(topic, label)]
+                stats["seen"] += 1
+                stats["rejected"] += int(duplicate)
+            if not duplicate:
+                accepted.append((sentence, label))
+        return accepted
+
+    def dedup_ratio(self, topic=None, label=None):
+        seen = rejected = 0
+        for (t, l), stats in self.stats.items():
+            if (topic is None or t == topic) and (label is None or l == label):
+                seen += stats["seen"]
+                rejected += stats["rejected"]
+        return rejected / seen if seen else 0.0
+
+    def report(self):
+        """Dedup ratio for every (topic, label) pair seen so far"""
+        return {
+            f"{topic}/{label}": {**stats, "dedup_ratio": round(stats["rejected"] / stats["seen"], 3)}
+            for (topic, label), stats in sorted(self.stats.items()) if stats["seen"]
+        }
+
+    def topic_weights(self, topics, label=None, floor=0.05):
+        """Sampling weight per topic: saturated topics (high dedup ratio) get picked less"""
+        return [max(floor, 1.0 - self.dedup_ratio(topic, label)) for topic in topics]
+
+
+def weighted_sample(items, weights, k, rng=random):
+    """Sample k distinct items with probability proportional to their weights"""
+    items, weights = list(items), list(weights)
+    chosen = []
+    for _ in range(min(k, len(items))):
+        pick = rng.uniform(0, sum(weights))
+        for i, weight in enumerate(weights):
+            pick -= weight
+            if pick <= 0:
+                break
+        chosen.append(items.pop(i))
+        weights.pop(i)
+    return chosen
@@ -1,19 +1,27 @@
 import os
-import time
 import random
-import pandas as pd
-from google import genai  # Gemini package
 from openpyxl import Workbook
 from openpyxl.styles import Alignment
 import shutil
 from dotenv import load_dotenv, dotenv_values 
+from response_cache import open_cache_from_env
+from dataset_writer import DatasetWriter, merge_tsv_files
+from dedup_index import NearDuplicateIndex
+from gemini_engine import GenerationEngine, create_client, DEFAULT_MODEL
 
 # Loading variables from .env file
 load_dotenv() 
 
 # Configure Gemini API
 api_key = os.getenv("api_key_gemini")
-client = genai.Client(api_key=api_key)
+client = create_client(api_key)
+
+# Shared rate-limited engine; prompts are generated concurrently within the quota
+# and responses are cached on disk so reruns replay earlier generations
+engine = GenerationEngine(client, max_retries=3, retry_delay=2, cache=open_cache_from_env())
+
+# Original data the generated examples are combined with (and deduplicated against)
+ORIGINAL_DATA_PATH = "./data/english/data.tsv"  # Adjust path as needed
 
 # Prompt templates for generating data
 prompts = [
@@ -143,37 +151,36 @@ Subjective statements should express clear opinions or judgments.
 Format each line as: Statement | LABEL (where LABEL is either OBJ or SUBJ)
 """
 
-def generate_with_gemini(prompt, model="gemini-2.5-flash-preview-04-17"):
-    """Generate text using Gemini API with error handling and rate limiting"""
-    max_retries = 3
-    retry_delay = 2  # seconds
+# Topic-focused prompt with a variable batch size, used by the multi-language scheduler
+def get_topic_prompt(label_type, topics=None, count=50):
+    topic_context = f" about {', '.join(topics)}" if topics else ""
+    if label_type == "OBJ":
+        return f"""
+    Generate {count} objective statements{topic_context} that present verifiable facts, statistics, or direct quotations. Follow these examples:
     
-    for attempt in range(max_retries):
-        try:
-            
-            response = client.models.generate_content(
-                model = "gemini-2.5-flash-preview-04-17",
-                contents=[prompt]
-                )
+    - "The average distance from the Earth to the Moon is about 384,400 kilometers."
+    - "China's gdp in 2023 could be more than $2trn below the level forecast in January, reckons Goldman Sachs, another bank."
+    - "Marko Mihailović, the 29-year-old figurehead of Belgrade Pride, led the city's winning bid."
+    
+    Make sure each statement could be independently verified and avoids expressing opinions or judgments.
+    Label each statement as 'OBJ' at the end.
+    Format: Statement | OBJ
+    """
+    return f"""
+    Generate {count} subjective statements{topic_context} that express opinions, judgments, or evaluations. Follow these examples:
+    
+    - "Small businesses are the true engine of the economy and are criminally undervalued."
+    - "This is the strongest case for stakeholder capitalism."
+    - "Many journalists are trying to cling to the remnants of their professional standards."
+    
+    Ensure each statement conveys a personal viewpoint, evaluation, or judgment rather than a verifiable fact.
+    Label each statement as 'SUBJ' at the end.
+    Format: Statement | SUBJ
+    """
 
-            
-            if hasattr(response, 'text'):
-                return response.text
-            else:
-                print(f"No text attribute in response: {response}")
-                return ""
-                
-        except Exception as e:
-            print(f"Attempt {attempt+1}/{max_retries} failed with error: {e}")
-            if attempt < max_retries - 1:
-                print(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                print("All retry attempts failed.")
-                return ""
-    
-    return ""
+def generate_with_gemini(prompt, model=DEFAULT_MODEL):
+    """Generate text using Gemini API with error handling and rate limiting"""
+    return engine.generate(prompt, model=model)
 
 def parse_generated_text(text):
     """Parse the generated text into a list of (statement, label) tuples"""
@@ -210,48 +217,56 @@ def parse_generated_text(text):
 
 def generate_and_save_data(output_directory):
     """Generate data using all prompts and save to CSV and TSV"""
-    all_data = []
-    
-    # Process each prompt
-    for i, prompt in enumerate(prompts):
-        print(f"Processing prompt {i+1}/{len(prompts)}...")
-        generated_text = generate_with_gemini(prompt)
-        parsed_data = parse_generated_text(generated_text)
-        all_data.extend(parsed_data)
-        
-        # Prevent rate limiting
-        if i < len(prompts) - 1:
-            time.sleep(2)
-    
-    # Process domain-specific prompt
-    print("Processing domain-specific prompt...")
-    domain_text = generate_with_gemini(domain_prompt)
-    domain_data = parse_generated_text(domain_text)
-    all_data.extend(domain_data)
-    
-    # Create a DataFrame
-    df = pd.DataFrame(all_data, columns=['sentence', 'label'])
+    tsv_output_file = os.path.join(output_directory, "gemini_generated_data4.tsv")
+    csv_output_file = os.path.join(output_directory, "gemini_generated_data4.csv")
     
-    # Add sentence_id column (UUID-like)
-    df['sentence_id'] = [f"gen-{random.randint(100000, 999999)}-{i}" for i in range(len(df))]
+    # Columns match the original data; each prompt's output is flushed to disk as
+    # soon as it is parsed, and a rerun skips prompts a previous run already saved
+    writer = DatasetWriter(tsv_output_file, ['sentence_id', 'sentence', 'label', 'solved_conflict'])
+    
+    # Reject generated statements that nearly duplicate the original data or each other
+    dedup = NearDuplicateIndex()
+    if os.path.exists(ORIGINAL_DATA_PATH):
+        print(f"Indexed {dedup.add_tsv(ORIGINAL_DATA_PATH)} original sentences for deduplication")
+    dedup.add_corpus(row[1] for row in writer.iter_rows())
+    
+    # Submit every prompt (including the domain-specific one) to the engine at once;
+    # the engine's limiter replaces the fixed sleeps between requests
+    all_prompts = prompts + [domain_prompt]
+    pending = [(i, engine.submit(prompt)) for i, prompt in enumerate(all_prompts)
+               if f"prompt-{i}" not in writer.completed]
+    print(f"Processing {len(pending)} of {len(all_prompts)} prompts concurrently...")
+    
+    for i, future in pending:
+        response = future.result()
+        if not response.strip():
+            # The engine gave up on this prompt; leave it out of the batch log so a rerun retries it
+            print(f"Prompt {i+1}/{len(all_prompts)} failed, it will be retried on the next run")
+            continue
+        # The same key tags the dedup report and the batch log
+        key = f"prompt-{i}"
+        parsed_data = parse_generated_text(response)
+        parsed_data = dedup.filter_batch(parsed_data, [key])
+        print(f"Prompt {i+1}/{len(all_prompts)} produced {len(parsed_data)} new examples")
+        
+        # sentence_id is UUID-like; solved_conflict is False since these are generated
+        rows = [(f"gen-{random.randint(100000, 999999)}-{writer.rows + j}", sentence, label, False)
+                for j, (sentence, label) in enumerate(parsed_data)]
+        writer.write_batch(rows, key=key)
     
-    # Add solved_conflict column (all False since these are generated)
-    df['solved_conflict'] = False
+    print(f"Near-duplicates rejected: {dedup.dedup_ratio():.1%}")
+    for key, stats in dedup.report().items():
+        print(f"- {key}: {stats['rejected']}/{stats['seen']} rejected ({stats['dedup_ratio']:.1%})")
     
-    # Reorder columns to match original data
-    df = df[['sentence_id', 'sentence', 'label', 'solved_conflict']]
+    # Save to TSV
+    writer.finalize()
+    print(f"Generated {writer.rows} examples and saved to {tsv_output_file}")
     
     # Save to CSV
-    csv_output_file = os.path.join(output_directory, "gemini_generated_data4.csv")
-    df.to_csv(csv_output_file, index=False)
-    print(f"Generated {len(df)} examples and saved to {csv_output_file}")
+    merge_tsv_files([tsv_output_file], csv_output_file, output_delimiter=',')
+    print(f"Also saved the data to {csv_output_file}")
     
-    # Save to TSV
-    tsv_output_file = os.path.join(output_directory, "gemini_generated_data4.tsv")
-    df.to_csv(tsv_output_file, sep='\t', index=False)
-    print(f"Also saved the data to {tsv_output_file}")
-    
-    return df
+    return writer.summary()
 
 def main():
     # Set directories
@@ -262,34 +277,33 @@ def main():
     generated_data = generate_and_save_data(output_directory)
     
     # Print statistics
-    obj_count = sum(generated_data['label'] == 'OBJ')
-    subj_count = sum(generated_data['label'] == 'SUBJ')
+    total = generated_data['rows']
+    obj_count = generated_data['label_counts'].get('OBJ', 0)
+    subj_count = generated_data['label_counts'].get('SUBJ', 0)
     print(f"Generated data statistics:")
-    print(f"Total examples: {len(generated_data)}")
-    print(f"Objective examples: {obj_count} ({obj_count/len(generated_data)*100:.1f}%)")
-    print(f"Subjective examples: {subj_count} ({subj_count/len(generated_data)*100:.1f}%)")
+    print(f"Total examples: {total}")
+    print(f"Objective examples: {obj_count} ({obj_count/total*100:.1f}%)")
+    print(f"Subjective examples: {subj_count} ({subj_count/total*100:.1f}%)")
     
     # Create combined version with original data
     try:
         # Check if there's original data to combine with
-        original_data_path = "./data/english/data.tsv"  # Adjust path as needed
+        original_data_path = ORIGINAL_DATA_PATH
         if os.path.exists(original_data_path):
             print(f"Found original data at {original_data_path}. Creating combined dataset...")
-            original_df = pd.read_csv(original_data_path, sep='\t')
-            combined_df = pd.concat([original_df, generated_data], ignore_index=True)
             
-            # Save combined dataset
+            # Save combined dataset, streamed row by row instead of pd.concat
             # combined_csv_path = os.path.join(output_directory, "combined_data.csv")
             combined_tsv_path = os.path.join(output_directory, "combined_data.tsv")
+            original_count, generated_count = merge_tsv_files(
+                [original_data_path, generated_data['path']], combined_tsv_path
+            )
             
-            # combined_df.to_csv(combined_csv_path, index=False)
-            combined_df.to_csv(combined_tsv_path, sep='\t', index=False)
-            
-            print(f"Combined dataset created with {len(combined_df)} examples")
-            print(f"- Original examples: {len(original_df)}")
-            print(f"- Generated examples: {len(generated_data)}")
+            print(f"Combined dataset created with {original_count + generated_count} examples")
+            print(f"- Original examples: {original_count}")
+            print(f"- Generated examples: {generated_count}")
     except Exception as e:
         print(f"Could not create combined dataset: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,287 @@
+import os
+import re
+import time
+import random
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from response_cache import CacheMissError, make_key
+
+# Default generation settings shared by the augmentation scripts
+DEFAULT_MODEL = "gemini-2.5-flash-preview-04-17"
+REQUESTS_PER_MINUTE = 10       # Free-tier request quota for the flash preview model
+TOKENS_PER_MINUTE = 250000     # Input + output token quota per minute
+MAX_CONCURRENCY = 4            # Number of requests allowed in flight at once
+MAX_RETRIES = 5                # Maximum number of retry attempts per prompt
+RETRY_DELAY = 4                # Base delay in seconds between retries
+EXPECTED_OUTPUT_TOKENS = 2048  # Tokens reserved for a response before we see it
+
+# Vocabulary for the fake client's synthetic sentences, varied enough to pass dedup
+FAKE_WORDS = ["council", "report", "market", "river", "school", "budget", "vaccine", "league",
+              "festival", "museum", "harvest", "satellite", "election", "network", "tariff", "novel"]
+
+
+def log(msg, level="INFO"):
+    timestamp = time.strftime("%H:%M:%S")
+    print(f"[{timestamp}] [{level}] {msg}")
+
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token) used for quota accounting"""
+    return max(1, len(text) // 4)
+
+
+def create_client(api_key):
+    """Create a Gemini client, or the offline stand-in when GEMINI_FAKE is set"""
+    if os.getenv("GEMINI_REPLAY_ONLY", "").lower() in ("1", "true", "yes"):
+        # Every response must come from the cache, so no network client is needed
+        log("GEMINI_REPLAY_ONLY is set, responses are served from the cache only", "WARNING")
+        return None
+    if os.getenv("GEMINI_FAKE"):
+        log("GEMINI_FAKE is set, using the offline fake Gemini client", "WARNING")
+        return FakeGeminiClient()
+    from google import genai
+    return genai.Client(api_key=api_key)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a fixed rate"""
+
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.available = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.updated
+        self.updated = now
+        self.available = min(self.capacity, self.available + elapsed * self.refill_per_second)
+
+    def acquire(self, amount=1):
+        """Block until `amount` tokens are available, then take them"""
+        # A single request larger than the bucket would otherwise wait forever
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self.lock:
+                self._refill()
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                wait = (amount - self.available) / self.refill_per_second
+            time.sleep(wait)
+
+    def debit(self, amount):
+        """Charge tokens after the fact; the balance may go negative (debt)"""
+        with self.lock:
+            self._refill()
+            self.available -= amount
+
+    def refund(self, amount):
+        with self.lock:
+            self._refill()
+            self.available = min(self.capacity, self.available + amount)
+
+
+class RateLimiter:
+    """Combined requests/min and tokens/min limiter"""
+
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+
+    def acquire(self, tokens):
+        self.requests.acquire(1)
+        self.tokens.acquire(tokens)
+
+    def settle(self, reserved, actual):
+        """Reconcile a token reservation with the real usage reported by the API"""
+        if actual > reserved:
+            self.tokens.debit(actual - reserved)
+        elif actual < reserved:
+            self.tokens.refund(reserved - actual)
+
+
+class GenerationEngine:
+    """Bounded-concurrency Gemini caller with quota limiting and jittered retries"""
+
+    def __init__(self, client, model=DEFAULT_MODEL,
+                 requests_per_minute=REQUESTS_PER_MINUTE,
+                 tokens_per_minute=TOKENS_PER_MINUTE,
+                 max_concurrency=MAX_CONCURRENCY,
+                 max_retries=MAX_RETRIES,
+                 retry_delay=RETRY_DELAY,
+                 expected_output_tokens=EXPECTED_OUTPUT_TOKENS,
+                 cache=None):
+        self.client = client
+        self.cache = cache
+        self.model = model
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.expected_output_tokens = expected_output_tokens
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency,
+                                           thread_name_prefix="gemini")
+        self.stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "failures": 0, "retries": 0, "tokens": 0, "cache_hits": 0}
+        self.seed_slots = Counter()
+
+    def _count(self, key, amount=1):
+        with self.stats_lock:
+            self.stats[key] += amount
+
+    def _next_seed_slot(self, model, prompt, config):
+        # The n-th request for an identical prompt in a run maps to slot n, so reruns
+        # replay the same sequence of responses while repeats still get fresh samples
+        base = make_key(model, prompt, config)
+        with self.stats_lock:
+            slot = self.seed_slots[base]
+            self.seed_slots[base] += 1
+        return slot
+
+    def _call(self, prompt, model, config):
+        reserved = estimate_tokens(prompt) + self.expected_output_tokens
+        self.limiter.acquire(reserved)
+        kwargs = {"config": config} if config else {}
+        response = self.client.models.generate_content(model=model, contents=[prompt], **kwargs)
+        text = getattr(response, "text", None) or ""
+
+        # Use the reported token usage when available, otherwise estimate it
+        usage = getattr(response, "usage_metadata", None)
+        actual = getattr(usage, "total_token_count", None) if usage is not None else None
+        if not actual:
+            actual = estimate_tokens(prompt) + estimate_tokens(text)
+        self.limiter.settle(reserved, actual)
+        self._count("tokens", actual)
+        return text
+
+    def generate(self, prompt, model=None, max_retries=None, retry_delay=None,
+                 config=None, seed_slot=None):
+        """Generate text for a single prompt, returning "" once retries are exhausted"""
+        model = model or self.model
+        retries = self.max_retries if max_retries is None else max_retries
+        delay = self.retry_delay if retry_delay is None else retry_delay
+
+        key = None
+        if self.cache is not None:
+            if seed_slot is None:
+                seed_slot = self._next_seed_slot(model, prompt, config)
+            key = make_key(model, prompt, config, seed_slot)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._count("cache_hits")
+                return cached
+            if self.cache.replay_only:
+                raise CacheMissError(f"No cached response for {model} prompt (slot {seed_slot}) in replay-only mode")
+
+        for attempt in range(retries):
+            try:
+                self._count("requests")
+                text = self._call(prompt, model, config)
+                if key is not None and text:
+                    self.cache.put(key, model, prompt, text, seed_slot)
+                return text
+            except Exception as e:
+                if attempt == retries - 1:
+                    break
+                self._count("retries")
+                # Jittered exponential backoff so parallel workers don't retry in lockstep
+                backoff = delay * (2 ** attempt) * random.uniform(0.5, 1.5)
+                log(f"API Error: {str(e)[:100]}... retrying in {backoff:.1f}s (attempt {attempt+1}/{retries})", "ERROR")
+                time.sleep(backoff)
+
+        self._count("failures")
+        log(f"Failed after {retries} attempts", "ERROR")
+        return ""
+
+    def submit(self, prompt, **kwargs):
+        """Schedule a prompt on the worker pool and return its Future"""
+        return self.executor.submit(self.generate, prompt, **kwargs)
+
+    def generate_many(self, prompts, **kwargs):
+        """Generate all prompts concurrently, returning texts in input order"""
+        futures = [self.submit(prompt, **kwargs) for prompt in prompts]
+        return [future.result() for future in futures]
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---------------------------------------------------------------------------
+# Offline stand-in for google.genai.Client, used for benchmarks and dry runs
+# ---------------------------------------------------------------------------
+
+class FakeResponse:
+    def __init__(self, text, total_token_count):
+        self.text = text
+        self.usage_metadata = type("UsageMetadata", (), {"total_token_count": total_token_count})()
+
+
+class FakeRateLimitError(Exception):
+    pass
+
+
+class FakeGeminiClient:
+    """Mimics `client.models.generate_content` with simulated latency and quota"""
+
+    def __init__(self, latency=1.5, jitter=0.5, failure_rate=0.0,
+                 lines_per_response=50, requests_per_minute=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.lines_per_response = lines_per_response
+        self.requests_per_minute = requests_per_minute
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.call_times = []
+        self.calls = 0
+        self.models = self
+
+    def _check_quota(self):
+        with self.lock:
+            self.calls += 1
+            if self.requests_per_minute is None:
+                return
+            now = time.monotonic()
+            self.call_times = [t for t in self.call_times if now - t < 60]
+            if len(self.call_times) >= self.requests_per_minute:
+                raise FakeRateLimitError("429 RESOURCE_EXHAUSTED: simulated quota exceeded")
+            self.call_times.append(now)
+
+    def _labels_for(self, prompt):
+        labels = [label for label in ("OBJ", "SUBJ") if f"| {label}" in prompt or f"'{label}'" in prompt]
+        return labels or ["OBJ"]
+
+    def generate_content(self, model, contents, config=None):
+        prompt = "\n".join(str(part) for part in contents)
+        self._check_quota()
+        with self.lock:
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            fail = self.random.random() < self.failure_rate
+            salt = self.random.randint(0, 10 ** 9)
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError("503 UNAVAILABLE: simulated transient failure")
+
+        # Honour the requested count (the first number in every prompt template) but cap
+        # the reply, like a real model truncating long outputs
+        requested = re.search(r"\d+", prompt)
+        count = min(int(requested.group(0)), self.lines_per_response) if requested else self.lines_per_response
+        labels = self._labels_for(prompt)
+        rng = random.Random(salt)
+        lines = []
+        for i in range(count):
+            label = labels[i % len(labels)]
+            words = " ".join(rng.choice(FAKE_WORDS) for _ in range(8))
+            lines.append(f"Synthetic statement {salt % 997}-{i} about {words}. | {label}")
+        text = "\n".join(lines)
+        return FakeResponse(text, estimate_tokens(prompt) + estimate_tokens(text))
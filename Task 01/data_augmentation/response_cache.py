@@ -0,0 +1,168 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Persistent, content-addressed cache for LLM responses.
+# Entries are keyed by (model, prompt hash, sampling params, seed slot) so reruns
+# replay the exact responses of earlier runs instead of paying for them again.
+
+DEFAULT_CACHE_PATH = os.path.join(".gemini_cache", "responses.sqlite")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024   # Evict least recently used entries above this size
+DEFAULT_MAX_AGE_DAYS = 90               # Evict entries older than this
+
+
+class CacheMissError(KeyError):
+    """Raised in replay-only mode when a response is not in the cache"""
+
+
+def hash_prompt(prompt):
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def make_key(model, prompt, params=None, seed_slot=0):
+    """Content address for a single generation request"""
+    payload = json.dumps({
+        "model": model,
+        "prompt": hash_prompt(prompt),
+        "params": params or {},
+        "seed_slot": seed_slot,
+    }, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response store with size- and age-based eviction"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES,
+                 max_age_days=DEFAULT_MAX_AGE_DAYS, replay_only=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 24 * 3600 if max_age_days else None
+        self.replay_only = replay_only
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                seed_slot INTEGER NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses (accessed)")
+        self.conn.commit()
+
+    def get(self, key):
+        """Return the cached response for `key`, or None on a miss"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            now = time.time()
+            if row is not None and self.max_age_seconds and not self.replay_only \
+                    and now - row[1] > self.max_age_seconds:
+                # Stale entries are dropped so the request is regenerated
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, model, prompt, response, seed_slot=0):
+        if self.replay_only:
+            return
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model, hash_prompt(prompt), seed_slot, response, size, now, now),
+            )
+            self.conn.commit()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        removed = 0
+        with self.lock:
+            if self.max_age_seconds:
+                cutoff = time.time() - self.max_age_seconds
+                removed += self.conn.execute(
+                    "DELETE FROM responses WHERE created < ?", (cutoff,)
+                ).rowcount
+
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if self.max_bytes and total > self.max_bytes:
+                excess = total - self.max_bytes
+                victims = []
+                for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+                    if excess <= 0:
+                        break
+                    victims.append((key,))
+                    excess -= size
+                self.conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+                removed += len(victims)
+            self.conn.commit()
+        return removed
+
+    def stats(self):
+        with self.lock:
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def open_cache_from_env():
+    """Build the cache from GEMINI_CACHE_* environment variables (None if disabled)"""
+    if os.getenv("GEMINI_CACHE", "on").lower() in ("0", "off", "false", "no"):
+        return None
+    cache = ResponseCache(
+        path=os.getenv("GEMINI_CACHE_PATH", DEFAULT_CACHE_PATH),
+        max_bytes=int(os.getenv("GEMINI_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+        max_age_days=float(os.getenv("GEMINI_CACHE_MAX_AGE_DAYS", DEFAULT_MAX_AGE_DAYS)),
+        replay_only=os.getenv("GEMINI_REPLAY_ONLY", "").lower() in ("1", "true", "yes"),
+    )
+    # Never evict in replay-only mode, CI relies on every stored entry
+    if not cache.replay_only:
+        cache.evict()
+    return cache
+
+
+# Small maintenance CLI: python response_cache.py [stats|evict|clear] [path]
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    path = sys.argv[2] if len(sys.argv) > 2 else os.getenv("GEMINI_CACHE_PATH", DEFAULT_CACHE_PATH)
+    cache = ResponseCache(path)
+    if command == "evict":
+        print(f"Evicted {cache.evict()} entries")
+    elif command == "clear":
+        with cache.lock:
+            cache.conn.execute("DELETE FROM responses")
+            cache.conn.commit()
+        print("Cache cleared")
+    print(json.dumps(cache.stats(), indent=2))
+    cache.close()
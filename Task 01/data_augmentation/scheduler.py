@@ -0,0 +1,257 @@
+import os
+import json
+import time
+import random
+import argparse
+from collections import Counter
+from concurrent.futures import wait, FIRST_COMPLETED
+from response_cache import open_cache_from_env
+from dataset_writer import DatasetWriter
+from dedup_index import NearDuplicateIndex, weighted_sample
+from gemini_engine import GenerationEngine, estimate_tokens, log, REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE
+import arabic_and_bulgarian_data_augmentation as multilingual
+import english_data_augmentation as english
+
+# Quota-aware scheduler that generates several languages in parallel on one engine.
+# Instead of a fixed 50 sentences per call and alternating labels, every request
+# is sized from the parse yield and latency observed so far, and aimed at the
+# label and topics that are furthest behind their share of the target.
+
+LANGUAGES = ["ar", "bg", "en"]
+MIN_BATCH_SIZE = 10            # Sentences asked for in a single request
+MAX_BATCH_SIZE = 100
+BATCH_SIZE_STEP = 10           # Additive increase when responses come back complete and fast
+BACKOFF_FACTOR = 0.5           # Multiplicative decrease when yield drops or latency climbs
+TARGET_YIELD = 0.8             # Accepted / requested sentences we consider healthy
+TARGET_LATENCY = 30.0          # Seconds per request before we start shrinking batches
+EMA_ALPHA = 0.3                # Smoothing for the yield and latency estimates
+TOPICS_PER_REQUEST = 3
+MAX_EMPTY_BATCHES = 5          # Consecutive batches with no accepted sentences before giving up
+INPUT_PRICE_PER_MILLION = 0.15   # USD per 1M input tokens (gemini-2.5-flash)
+OUTPUT_PRICE_PER_MILLION = 0.60  # USD per 1M output tokens
+LABELS = ["OBJ", "SUBJ"]
+DATASET_COLUMNS = ["sentence_id", "sentence", "label"]
+
+
+def build_prompt(language, label, topics, count):
+    if language == "en":
+        return english.get_topic_prompt(label, topics, count)
+    return multilingual.get_prompt(language, label, topics, count)
+
+
+def parse_response(language, text, label):
+    if language == "en":
+        lines = english.parse_generated_text(text)
+    else:
+        lines = multilingual.parse_generated_lines(text, label)
+    # Mislabelled lines are dropped so every request only fills the quota it was sent for
+    return [(sentence, line_label) for sentence, line_label in lines if line_label == label]
+
+
+class AdaptiveBatchSize:
+    """AIMD controller for sentences per request driven by yield and latency"""
+
+    def __init__(self, initial=multilingual.SENTENCES_PER_REQUEST, fixed=False):
+        self.size = initial
+        self.fixed = fixed
+        self.yield_ema = None
+        self.latency_ema = None
+
+    def observe(self, requested, accepted, latency):
+        ratio = min(1.0, accepted / requested) if requested else 0.0
+        self.yield_ema = ratio if self.yield_ema is None else EMA_ALPHA * ratio + (1 - EMA_ALPHA) * self.yield_ema
+        self.latency_ema = latency if self.latency_ema is None else EMA_ALPHA * latency + (1 - EMA_ALPHA) * self.latency_ema
+        if self.fixed:
+            return
+        if self.yield_ema < TARGET_YIELD or self.latency_ema > TARGET_LATENCY:
+            # Long responses get truncated or padded with repeats; ask for less
+            self.size = max(MIN_BATCH_SIZE, int(self.size * BACKOFF_FACTOR))
+        else:
+            self.size = min(MAX_BATCH_SIZE, self.size + BATCH_SIZE_STEP)
+
+    def expected_yield(self):
+        return self.yield_ema if self.yield_ema is not None else TARGET_YIELD
+
+
+class LanguageJob:
+    """Per-language writer, dedup index, quotas and throughput/cost counters"""
+
+    def __init__(self, language, target, output_dir, fixed_batch_size=None):
+        self.language = language
+        self.target = target
+        self.output_path = os.path.join(output_dir, f"{language}_train_scheduled.tsv")
+        self.writer = DatasetWriter(self.output_path, DATASET_COLUMNS)
+        if language == "en":
+            self.dedup = NearDuplicateIndex()
+            if os.path.exists(english.ORIGINAL_DATA_PATH):
+                self.dedup.add_tsv(english.ORIGINAL_DATA_PATH)
+            self.dedup.add_corpus(row[1] for row in self.writer.iter_rows())
+        else:
+            self.dedup = multilingual.build_dedup_index(language, self.writer)
+        self.batch_size = AdaptiveBatchSize(fixed_batch_size or multilingual.SENTENCES_PER_REQUEST,
+                                            fixed=fixed_batch_size is not None)
+
+        self.quota = {label: target // len(LABELS) + (i < target % len(LABELS))
+                      for i, label in enumerate(LABELS)}
+        self.topic_counts = Counter()
+        self.in_flight = Counter()      # Expected accepted sentences per label still pending
+        self.requests = 0
+        self.empty_batches = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.started = time.perf_counter()
+        self.finished = None
+        self.batch_index = len(self.writer.completed)
+        if self.writer.rows:
+            log(f"[{language}] Resuming with {self.writer.rows} sentences from {self.batch_index} saved batches")
+
+    def deficit(self, label):
+        return self.quota[label] - self.writer.label_counts.get(label, 0) - self.in_flight[label]
+
+    def done(self):
+        return all(self.writer.label_counts.get(label, 0) >= self.quota[label] for label in LABELS) \
+            or self.empty_batches >= MAX_EMPTY_BATCHES
+
+    def next_request(self):
+        """Pick the label and topics furthest behind their quota, sized by the controller"""
+        label = max(LABELS, key=self.deficit)
+        deficit = self.deficit(label)
+        if deficit <= 0:
+            return None
+
+        # Topics are weighted by how far they trail an even share and by dedup saturation
+        rng = random.Random(f"{self.language}-{label}-{self.batch_index}")
+        share = max(1.0, self.quota[label] / len(multilingual.TOPICS))
+        saturation = self.dedup.topic_weights(multilingual.TOPICS, label)
+        weights = [max(0.05, 1.0 - self.topic_counts[(topic, label)] / share) * weight
+                   for topic, weight in zip(multilingual.TOPICS, saturation)]
+        topics = weighted_sample(multilingual.TOPICS, weights, TOPICS_PER_REQUEST, rng)
+
+        # Never ask for much more than the remaining deficit needs at the current yield
+        needed = int(deficit / max(self.batch_size.expected_yield(), 0.1)) + 1
+        count = max(MIN_BATCH_SIZE, min(self.batch_size.size, needed))
+        reserved = count * self.batch_size.expected_yield()
+        self.in_flight[label] += reserved
+        self.batch_index += 1
+        return {"label": label, "topics": topics, "count": count, "reserved": reserved,
+                "key": f"sched-{self.batch_index - 1}",
+                "prompt": build_prompt(self.language, label, topics, count)}
+
+    def record(self, request, text, latency):
+        label, count = request["label"], request["count"]
+        self.in_flight[label] -= request["reserved"]
+        self.requests += 1
+        self.input_tokens += estimate_tokens(request["prompt"])
+        self.output_tokens += estimate_tokens(text) if text else 0
+
+        parsed = parse_response(self.language, text or "", label)
+        accepted = self.dedup.filter_batch(parsed, request["topics"])
+        self.batch_size.observe(count, len(accepted), latency)
+        self.writer.write_batch(multilingual.to_rows(accepted), key=request["key"], shuffle=True,
+                                metadata={"topics": request["topics"], "requested": count})
+        for topic in request["topics"]:
+            self.topic_counts[(topic, label)] += len(accepted)
+        self.empty_batches = 0 if accepted else self.empty_batches + 1
+        if self.empty_batches >= MAX_EMPTY_BATCHES:
+            log(f"[{self.language}] {MAX_EMPTY_BATCHES} empty batches in a row, stopping early", "WARNING")
+
+        log(f"[{self.language}] {label}: {len(accepted)}/{count} accepted "
+            f"({latency:.1f}s, next batch size {self.batch_size.size}) "
+            f"- progress {self.writer.rows}/{self.target}")
+
+    def cost(self):
+        return (self.input_tokens * INPUT_PRICE_PER_MILLION +
+                self.output_tokens * OUTPUT_PRICE_PER_MILLION) / 1e6
+
+    def report(self):
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        accepted = self.writer.rows
+        return {
+            "language": self.language,
+            "path": self.output_path,
+            "rows": accepted,
+            "label_counts": dict(self.writer.label_counts),
+            "requests": self.requests,
+            "final_batch_size": self.batch_size.size,
+            "yield": round(self.batch_size.expected_yield(), 3),
+            "sentences_per_sec": round(accepted / elapsed, 2) if elapsed else 0.0,
+            "estimated_cost_usd": round(self.cost(), 4),
+            "cost_per_accepted_sentence_usd": round(self.cost() / accepted, 6) if accepted else None,
+            "dedup_ratio": round(self.dedup.dedup_ratio(), 3),
+        }
+
+
+def run(languages, target, output_dir=".", concurrency=4, fixed_batch_size=None, engine=None,
+        requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE):
+    """Generate every language until its label quotas are met; returns per-language reports"""
+    os.makedirs(output_dir, exist_ok=True)
+    own_engine = engine is None
+    if own_engine:
+        engine = GenerationEngine(multilingual.model, max_concurrency=concurrency,
+                                  requests_per_minute=requests_per_minute,
+                                  tokens_per_minute=tokens_per_minute,
+                                  cache=open_cache_from_env())
+    jobs = [LanguageJob(language, target, output_dir, fixed_batch_size) for language in languages]
+    # Split the in-flight slots evenly so one slow language cannot starve the others
+    per_language = max(1, -(-concurrency // len(jobs)))
+
+    pending = {}
+    try:
+        while True:
+            for job in jobs:
+                running = sum(1 for owner, _, _ in pending.values() if owner is job)
+                while not job.done() and running < per_language:
+                    request = job.next_request()
+                    if request is None:
+                        break
+                    future = engine.submit(request["prompt"])
+                    pending[future] = (job, request, time.perf_counter())
+                    running += 1
+            if not pending:
+                break
+
+            finished, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in finished:
+                job, request, submitted = pending.pop(future)
+                job.record(request, future.result(), time.perf_counter() - submitted)
+                if job.done() and job.finished is None:
+                    job.finished = time.perf_counter()
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_engine:
+            engine.close()
+
+    reports = []
+    for job in jobs:
+        job.writer.finalize(shuffle=True)
+        reports.append(job.report())
+        log(f"[{job.language}] {json.dumps(reports[-1], ensure_ascii=False)}")
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate augmentation data for several languages in parallel")
+    parser.add_argument("--languages", nargs="+", default=LANGUAGES, choices=LANGUAGES)
+    parser.add_argument("--target", type=int, default=multilingual.MIN_DATASET_SIZE,
+                        help="Sentences to generate per language, split evenly between labels")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rpm", type=int, default=REQUESTS_PER_MINUTE, help="Requests/min quota shared by all languages")
+    parser.add_argument("--tpm", type=int, default=TOKENS_PER_MINUTE, help="Tokens/min quota shared by all languages")
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Fix the sentences per request (disables adaptation, makes cached reruns replay exactly)")
+    args = parser.parse_args()
+
+    reports = run(args.languages, args.target, args.output_dir, args.concurrency, args.batch_size,
+                  requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+    print(f"\n{'lang':<6}{'rows':>8}{'requests':>10}{'sent/s':>10}{'yield':>8}{'$/sent':>12}")
+    for report in reports:
+        per_sentence = report["cost_per_accepted_sentence_usd"]
+        print(f"{report['language']:<6}{report['rows']:>8}{report['requests']:>10}"
+              f"{report['sentences_per_sec']:>10.2f}{report['yield']:>8.2f}"
+              f"{per_sentence if per_sentence is not None else float('nan'):>12.6f}")
+
+
+if __name__ == "__main__":
+    main()
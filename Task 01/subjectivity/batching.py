@@ -0,0 +1,157 @@
+import random
+import numpy as np
+import pandas as pd
+import torch
+from torch.utils.data import DataLoader, Sampler
+from transformers import Trainer
+from token_cache import CachedSubjectivityDataset
+
+# Length-bucketed batching with dynamic padding for the subjectivity models.
+# Sentences of similar length are batched together and each batch is trimmed to
+# its longest sentence instead of MAX_LENGTH, so little compute goes into padding.
+# Batches run out of file order; predictions are scattered back by row index.
+
+BUCKET_MULTIPLIER = 50   # Training: sort within pools of batch_size * this many rows
+PAD_TO_MULTIPLE_OF = 8   # Keeps sequence lengths friendly to vectorised kernels
+ID2LABEL = {0: "OBJ", 1: "SUBJ"}
+
+
+class LengthBucketSampler(Sampler):
+    """Batch sampler that groups rows of similar token length.
+
+    Without shuffling (evaluation) rows are simply sorted by length. With
+    shuffling (training) rows are shuffled, sorted inside large pools, and the
+    resulting batches are shuffled again, so batches stay random but compact.
+    """
+
+    def __init__(self, lengths, batch_size, shuffle=False, bucket_multiplier=BUCKET_MULTIPLIER, seed=0):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.bucket_multiplier = bucket_multiplier
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def __len__(self):
+        return -(-len(self.lengths) // self.batch_size)
+
+    def __iter__(self):
+        if not self.shuffle:
+            order = np.argsort(-self.lengths, kind="stable")
+            batches = [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+        else:
+            rng = random.Random(self.seed + self.epoch)
+            self.epoch += 1
+            indices = list(range(len(self.lengths)))
+            rng.shuffle(indices)
+            pool_size = self.batch_size * self.bucket_multiplier
+            batches = []
+            for start in range(0, len(indices), pool_size):
+                pool = sorted(indices[start:start + pool_size], key=lambda i: self.lengths[i])
+                batches.extend(pool[i:i + self.batch_size] for i in range(0, len(pool), self.batch_size))
+            rng.shuffle(batches)
+        for batch in batches:
+            yield [int(i) for i in batch]
+
+
+class DynamicPaddingCollator:
+    """Stacks a batch and pads/trims every sequence field to the batch's longest row"""
+
+    def __init__(self, pad_token_id=0, pad_to_multiple_of=PAD_TO_MULTIPLE_OF):
+        self.pad_token_id = pad_token_id
+        self.pad_to_multiple_of = pad_to_multiple_of
+
+    def __call__(self, features):
+        longest = max(int(f['attention_mask'].sum()) for f in features)
+        if self.pad_to_multiple_of:
+            longest = -(-longest // self.pad_to_multiple_of) * self.pad_to_multiple_of
+        longest = min(longest, max(len(f['input_ids']) for f in features))
+
+        batch = {}
+        sequence_length = features[0]['input_ids'].shape
+        for name in features[0]:
+            values = [f[name] for f in features]
+            # Sequence fields share input_ids' length; anything else (labels, soft labels) is stacked
+            if isinstance(values[0], torch.Tensor) and values[0].dim() == 1 and values[0].shape == sequence_length:
+                pad_value = self.pad_token_id if name == 'input_ids' else 0
+                padded = torch.full((len(values), longest), pad_value, dtype=values[0].dtype)
+                for row, value in enumerate(values):
+                    value = value[:longest]
+                    padded[row, :len(value)] = value
+                batch[name] = padded
+            elif isinstance(values[0], torch.Tensor):
+                batch[name] = torch.stack(values)
+            else:
+                batch[name] = torch.as_tensor(values)
+        return batch
+
+
+def make_dataloader(dataset, batch_size=16, shuffle=False, pad_token_id=0, num_workers=0):
+    """DataLoader over a CachedSubjectivityDataset using length buckets and dynamic padding"""
+    return DataLoader(
+        dataset,
+        batch_sampler=LengthBucketSampler(dataset.lengths, batch_size, shuffle=shuffle),
+        collate_fn=DynamicPaddingCollator(pad_token_id),
+        num_workers=num_workers,
+    )
+
+
+def predict_probabilities(model, dataset, device, batch_size=16, pad_token_id=0):
+    """Class probabilities for every row of `dataset`, in the dataset's original order"""
+    model.eval()
+    probabilities = np.zeros((len(dataset), model.config.num_labels), dtype=np.float32)
+    with torch.no_grad():
+        for batch in make_dataloader(dataset, batch_size, pad_token_id=pad_token_id):
+            indices = batch.pop('sentence_idx').numpy()
+            batch.pop('labels', None)
+            batch = {k: v.to(device) for k, v in batch.items()}
+            logits = model(**batch).logits
+            probabilities[indices] = torch.nn.functional.softmax(logits, dim=-1).cpu().numpy()
+    return probabilities
+
+
+def predict_dataframe(data, model, tokenizer, device, max_length=128, batch_size=16):
+    """Bucketed equivalent of the prediction loop in evaluate_on_dev_test_set / evaluate_on_test_set.
+
+    Returns sentence_id, sentence, predicted_label, obj_score and subj_score in
+    the same row order as `data`.
+    """
+    dataset = CachedSubjectivityDataset(data, tokenizer, max_length, return_index=True)
+    probabilities = predict_probabilities(model, dataset, device, batch_size, tokenizer.pad_token_id or 0)
+    pred_classes = probabilities.argmax(axis=1)
+    return pd.DataFrame({
+        'sentence_id': data['sentence_id'].values,
+        'sentence': data['sentence'].values,
+        'predicted_label': [ID2LABEL[p] for p in pred_classes],
+        'obj_score': probabilities[:, 0].round(4),
+        'subj_score': probabilities[:, 1].round(4),
+    })
+
+
+class BucketedTrainer(Trainer):
+    """Trainer whose train/eval loaders use length buckets and dynamic padding.
+
+    Expects CachedSubjectivityDataset inputs, e.g.
+    BucketedTrainer(model=model, args=training_args, train_dataset=train_dataset, ...)
+    """
+
+    def _bucketed_loader(self, dataset, batch_size, shuffle):
+        pad_token_id = getattr(self.model.config, "pad_token_id", None) or 0
+        loader = DataLoader(
+            dataset,
+            batch_sampler=LengthBucketSampler(dataset.lengths, batch_size, shuffle=shuffle, seed=self.args.seed),
+            collate_fn=DynamicPaddingCollator(pad_token_id),
+            num_workers=self.args.dataloader_num_workers,
+            pin_memory=self.args.dataloader_pin_memory,
+        )
+        return self.accelerator.prepare(loader)
+
+    def get_train_dataloader(self):
+        return self._bucketed_loader(self.train_dataset, self._train_batch_size, shuffle=True)
+
+    def get_eval_dataloader(self, eval_dataset=None):
+        dataset = eval_dataset if eval_dataset is not None else self.eval_dataset
+        return self._bucketed_loader(dataset, self.args.eval_batch_size, shuffle=False)
@@ -0,0 +1,87 @@
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import torch
+from torch.utils.data import Dataset, DataLoader
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from token_cache import CachedSubjectivityDataset
+from batching import predict_probabilities
+
+# Sentences/sec of the notebook inference loop (pad to MAX_LENGTH, file order)
+# versus length-bucketed batches with dynamic padding, on the CheckThat dev_test files.
+
+DEV_TEST_LIST = ["dev_test_it.tsv", "dev_test_en.tsv", "dev_test_de.tsv", "dev_test_ar.tsv", "dev_test_bg.tsv"]
+
+
+# Same per-row tokenization as TestSubjectivityDataset in the notebooks
+class PaddedDataset(Dataset):
+    def __init__(self, data, tokenizer, max_length):
+        self.data = data
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, idx):
+        encoding = self.tokenizer(self.data.iloc[idx]['sentence'], max_length=self.max_length,
+                                  padding='max_length', truncation=True, return_tensors='pt')
+        return {k: v.squeeze(0) for k, v in encoding.items()}
+
+
+def run_baseline(model, tokenizer, data, device, max_length, batch_size):
+    probabilities = []
+    with torch.no_grad():
+        for batch in DataLoader(PaddedDataset(data, tokenizer, max_length), batch_size=batch_size):
+            batch = {k: v.to(device) for k, v in batch.items()}
+            probabilities.append(torch.nn.functional.softmax(model(**batch).logits, dim=-1).cpu().numpy())
+    return np.concatenate(probabilities)
+
+
+def run_bucketed(model, tokenizer, data, device, max_length, batch_size, cache_dir):
+    dataset = CachedSubjectivityDataset(data, tokenizer, max_length, cache_dir=cache_dir, return_index=True)
+    return predict_probabilities(model, dataset, device, batch_size, tokenizer.pad_token_id or 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dynamic padding for subjectivity inference")
+    parser.add_argument("--model", required=True, help="Fine-tuned model directory or hub name")
+    parser.add_argument("--files", nargs="+", default=DEV_TEST_LIST)
+    parser.add_argument("--max-length", type=int, default=128)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--cache-dir", default=".token_cache")
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForSequenceClassification.from_pretrained(args.model).to(device)
+    model.eval()
+
+    print(f"{'file':<22}{'rows':>7}{'padded s/s':>12}{'bucketed s/s':>14}{'speedup':>9}{'agree':>8}{'max |dp|':>10}")
+    for path in args.files:
+        if not os.path.exists(path):
+            print(f"{path:<22} not found, skipped")
+            continue
+        data = pd.read_csv(path, sep='\t')
+
+        start = time.perf_counter()
+        baseline = run_baseline(model, tokenizer, data, device, args.max_length, args.batch_size)
+        baseline_time = time.perf_counter() - start
+
+        # The timed run includes building the token cache, i.e. a cold start
+        start = time.perf_counter()
+        bucketed = run_bucketed(model, tokenizer, data, device, args.max_length, args.batch_size, args.cache_dir)
+        bucketed_time = time.perf_counter() - start
+
+        agree = float((baseline.argmax(1) == bucketed.argmax(1)).mean())
+        max_diff = float(np.abs(baseline - bucketed).max())
+        print(f"{os.path.basename(path):<22}{len(data):>7}{len(data) / baseline_time:>12.1f}"
+              f"{len(data) / bucketed_time:>14.1f}{baseline_time / bucketed_time:>8.2f}x"
+              f"{agree:>8.3f}{max_diff:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
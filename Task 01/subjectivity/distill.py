@@ -0,0 +1,269 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+import torch
+from sklearn.metrics import f1_score
+from transformers import AutoTokenizer, AutoModelForSequenceClassification, TrainingArguments
+from token_cache import CachedSubjectivityDataset, LABEL_MAP
+from batching import BucketedTrainer
+from predictors import load_classifier, NGRAM_MODEL_FILE
+
+# Knowledge distillation of the fine-tuned Task 1 teacher into a CPU-friendly student.
+# The teacher scores the training sentences (plus any Gemini-augmented corpora)
+# once; its temperature-softened probabilities are cached next to the token cache
+# and used as soft labels for either
+#   - a transformer student: the teacher (or --student-init) truncated to --layers
+#     encoder layers, trained on alpha * KL(teacher || student) + (1 - alpha) * CE
+#   - an n-gram student: hashed char/word n-grams + logistic regression fit on the
+#     same mix of soft and hard targets (as sample-weighted duplicated rows)
+# Afterwards teacher and student are compared on every dev_test file: macro-F1 and
+# CPU sentences/sec.
+
+DEV_TEST_LIST = ["dev_test_it.tsv", "dev_test_en.tsv", "dev_test_de.tsv", "dev_test_ar.tsv", "dev_test_bg.tsv"]
+TEACHER_CACHE_DIR = os.path.join(".token_cache", "teacher")
+MAX_LENGTH = 128
+BATCH_SIZE = 16
+EPOCHS = 5
+LEARNING_RATE = 5e-5
+STUDENT_LAYERS = 4
+TEMPERATURE = 2.0
+ALPHA = 0.7                # Weight of the soft-label term
+NGRAM_FEATURES = 2 ** 20
+NGRAM_C = 4.0
+
+
+def load_sentences(file_paths):
+    """sentence / label_id rows from train, dev and augmented TSVs; unlabeled rows are dropped"""
+    frames = []
+    for file_path in file_paths:
+        df = pd.read_csv(file_path, sep='\t', header=0)
+        df = df[['sentence', 'label']].dropna()
+        df['label_id'] = df['label'].map(LABEL_MAP)
+        frames.append(df.dropna(subset=['label_id']))
+    data = pd.concat(frames, ignore_index=True)
+    data['label_id'] = data['label_id'].astype(int)
+    return data
+
+
+def soften(probabilities, temperature):
+    """Re-temper probabilities: softmax(log p / T) equals softmax(logits / T)"""
+    logits = np.log(np.clip(probabilities, 1e-8, 1.0)) / temperature
+    logits -= logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def teacher_probabilities(teacher_dir, texts, cache_dir=TEACHER_CACHE_DIR, batch_size=64):
+    """Teacher class probabilities for texts, cached on disk by teacher path and content"""
+    digest = hashlib.sha256(os.path.abspath(teacher_dir).encode("utf-8"))
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    path = os.path.join(cache_dir, f"{digest.hexdigest()[:24]}.npy")
+    if os.path.exists(path):
+        return np.load(path)
+
+    teacher = load_classifier(teacher_dir)
+    start = time.perf_counter()
+    probabilities = teacher.predict_proba(texts, batch_size=batch_size)
+    print(f"Teacher scored {len(texts)} sentences in {time.perf_counter() - start:.1f}s")
+    os.makedirs(cache_dir, exist_ok=True)
+    np.save(path, probabilities)
+    return probabilities
+
+
+class SoftLabelDataset(torch.utils.data.Dataset):
+    """Adds the teacher's softened probabilities to each CachedSubjectivityDataset item"""
+
+    def __init__(self, dataset, soft_labels):
+        self.dataset = dataset
+        self.soft_labels = torch.tensor(soft_labels, dtype=torch.float32)
+
+    def __len__(self):
+        return len(self.dataset)
+
+    @property
+    def lengths(self):
+        return self.dataset.lengths
+
+    def __getitem__(self, idx):
+        item = self.dataset[idx]
+        item['teacher_probs'] = self.soft_labels[idx]
+        return item
+
+
+class DistillationTrainer(BucketedTrainer):
+    """BucketedTrainer with alpha * T^2 * KL(teacher || student) + (1 - alpha) * CE"""
+
+    def __init__(self, *args, temperature=TEMPERATURE, alpha=ALPHA, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.temperature = temperature
+        self.alpha = alpha
+
+    def compute_loss(self, model, inputs, return_outputs=False, **kwargs):
+        teacher_probs = inputs.pop('teacher_probs', None)
+        outputs = model(**inputs)
+        loss = outputs.loss
+        if teacher_probs is not None:
+            log_student = torch.nn.functional.log_softmax(outputs.logits / self.temperature, dim=-1)
+            kl = torch.nn.functional.kl_div(log_student, teacher_probs, reduction='batchmean')
+            loss = self.alpha * kl * self.temperature ** 2 + (1 - self.alpha) * loss
+        return (loss, outputs) if return_outputs else loss
+
+
+def compute_metrics(pred):
+    return {'f1': f1_score(pred.label_ids, pred.predictions.argmax(-1), average='macro', zero_division=0)}
+
+
+def train_transformer_student(train_data, soft_labels, val_data, student_init, output_dir, layers=STUDENT_LAYERS,
+                              epochs=EPOCHS, learning_rate=LEARNING_RATE, temperature=TEMPERATURE, alpha=ALPHA):
+    tokenizer = AutoTokenizer.from_pretrained(student_init)
+    overrides = {'num_hidden_layers': layers} if layers else {}
+    # Loading with fewer layers keeps the first `layers` encoder blocks of the checkpoint
+    model = AutoModelForSequenceClassification.from_pretrained(student_init, num_labels=2,
+                                                               ignore_mismatched_sizes=True, **overrides)
+    train_dataset = SoftLabelDataset(CachedSubjectivityDataset(train_data, tokenizer, MAX_LENGTH), soft_labels)
+    val_dataset = CachedSubjectivityDataset(val_data, tokenizer, MAX_LENGTH) if val_data is not None else None
+
+    training_args = TrainingArguments(
+        output_dir=os.path.join(output_dir, "checkpoints"),
+        eval_strategy="epoch" if val_dataset is not None else "no",
+        save_strategy="epoch" if val_dataset is not None else "no",
+        load_best_model_at_end=val_dataset is not None,
+        metric_for_best_model="f1",
+        save_total_limit=1,
+        learning_rate=learning_rate,
+        per_device_train_batch_size=BATCH_SIZE,
+        per_device_eval_batch_size=BATCH_SIZE,
+        num_train_epochs=epochs,
+        weight_decay=0.01,
+        logging_strategy="epoch",
+        report_to='none',
+    )
+    trainer = DistillationTrainer(
+        model=model,
+        args=training_args,
+        train_dataset=train_dataset,
+        eval_dataset=val_dataset,
+        compute_metrics=compute_metrics,
+        temperature=temperature,
+        alpha=alpha,
+    )
+    trainer.train()
+    shutil.rmtree(training_args.output_dir, ignore_errors=True)
+    model.save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
+    return model, tokenizer
+
+
+def make_ngram_vectorizer(n_features=NGRAM_FEATURES):
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.pipeline import FeatureUnion
+    return FeatureUnion([
+        ("char", HashingVectorizer(analyzer="char_wb", ngram_range=(2, 4), n_features=n_features,
+                                   alternate_sign=False)),
+        ("word", HashingVectorizer(analyzer="word", ngram_range=(1, 2), n_features=n_features,
+                                   alternate_sign=False)),
+    ])
+
+
+def train_ngram_student(train_data, soft_labels, output_dir, alpha=ALPHA, c=NGRAM_C):
+    """Logistic regression on soft targets: each row appears once per class, weighted by its target"""
+    import joblib
+    import scipy.sparse
+    from sklearn.linear_model import LogisticRegression
+    vectorizer = make_ngram_vectorizer()
+    features = vectorizer.transform(train_data['sentence'].astype(str).tolist())
+    hard = np.eye(2)[train_data['label_id'].to_numpy()]
+    targets = alpha * soft_labels + (1 - alpha) * hard
+    n = features.shape[0]
+    model = LogisticRegression(C=c, max_iter=1000)
+    model.fit(scipy.sparse.vstack([features, features]), np.repeat([0, 1], n),
+              sample_weight=np.concatenate([targets[:, 0], targets[:, 1]]))
+    os.makedirs(output_dir, exist_ok=True)
+    joblib.dump({"vectorizer": vectorizer, "model": model}, os.path.join(output_dir, NGRAM_MODEL_FILE))
+    return model
+
+
+def evaluate_models(model_dirs, data_dir, dev_test_list=DEV_TEST_LIST, num_threads=None):
+    """Macro-F1 and CPU sentences/sec for each model on each dev_test file that exists"""
+    rows = []
+    for name, model_dir in model_dirs.items():
+        classifier = load_classifier(model_dir, num_threads=num_threads)
+        for file_name in dev_test_list:
+            path = os.path.join(data_dir, file_name)
+            if not os.path.exists(path):
+                continue
+            data = load_sentences([path])
+            texts = data['sentence'].astype(str).tolist()
+            classifier.predict_proba(texts[:32])  # Warm-up
+            start = time.perf_counter()
+            probabilities = classifier.predict_proba(texts)
+            elapsed = time.perf_counter() - start
+            rows.append({
+                "model": name,
+                "file": file_name,
+                "macro_f1": f1_score(data['label_id'], probabilities.argmax(axis=1), average='macro'),
+                "sentences_per_sec": len(texts) / elapsed,
+            })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the Task 1 teacher into a small CPU student")
+    parser.add_argument("--teacher", required=True, help="Fine-tuned teacher (saved_model or onnx_export.py output)")
+    parser.add_argument("--train", nargs="*", default=[], help="Training TSVs (sentence, label)")
+    parser.add_argument("--augmented", nargs="*", default=[], help="Gemini-augmented TSVs to add to training")
+    parser.add_argument("--val", nargs="*", default=[], help="Validation TSVs for model selection")
+    parser.add_argument("--student", choices=["transformer", "ngram"], default="transformer")
+    parser.add_argument("--student-init", default=None, help="Student checkpoint (default: the teacher, truncated)")
+    parser.add_argument("--layers", type=int, default=STUDENT_LAYERS, help="Encoder layers kept (0 = all)")
+    parser.add_argument("--output", required=True, help="Directory for the student model")
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--learning-rate", type=float, default=LEARNING_RATE)
+    parser.add_argument("--temperature", type=float, default=TEMPERATURE)
+    parser.add_argument("--alpha", type=float, default=ALPHA)
+    parser.add_argument("--data-dir", default=".", help="Directory holding the dev_test files")
+    parser.add_argument("--dev-test", nargs="+", default=DEV_TEST_LIST)
+    parser.add_argument("--threads", type=int, default=None, help="CPU threads for the speed comparison")
+    parser.add_argument("--report-only", action="store_true", help="Skip training, compare teacher and --output")
+    args = parser.parse_args()
+
+    if not args.report_only:
+        train_data = load_sentences(args.train + args.augmented)
+        texts = train_data['sentence'].astype(str).tolist()
+        soft_labels = soften(teacher_probabilities(args.teacher, texts), args.temperature)
+        agreement = (soft_labels.argmax(axis=1) == train_data['label_id'].to_numpy()).mean()
+        print(f"{len(train_data)} training sentences, teacher agrees with gold labels on {100 * agreement:.1f}%")
+
+        if args.student == "ngram":
+            train_ngram_student(train_data, soft_labels, args.output, args.alpha)
+        else:
+            if os.path.exists(os.path.join(args.teacher, "export.json")) and not args.student_init:
+                parser.error("An ONNX teacher needs --student-init with a PyTorch checkpoint")
+            val_data = load_sentences(args.val) if args.val else None
+            train_transformer_student(train_data, soft_labels, val_data, args.student_init or args.teacher,
+                                      args.output, args.layers, args.epochs, args.learning_rate,
+                                      args.temperature, args.alpha)
+        with open(os.path.join(args.output, "distillation.json"), "w", encoding="utf-8") as f:
+            json.dump({"teacher": args.teacher, "student": args.student, "layers": args.layers,
+                       "temperature": args.temperature, "alpha": args.alpha,
+                       "train_files": args.train + args.augmented}, f, indent=2)
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    report = evaluate_models({"teacher": args.teacher, "student": args.output}, args.data_dir, args.dev_test,
+                             args.threads)
+    if report.empty:
+        print(f"No dev_test files found in {args.data_dir}")
+        return
+    print(report.pivot(index="file", columns="model", values=["macro_f1", "sentences_per_sec"]).round(3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+import torch
+from sklearn.metrics import f1_score
+from transformers import AutoTokenizer, AutoModel
+from token_cache import LABEL_MAP
+
+# Frozen-encoder fast path for hyperparameter sweeps.
+# Every sentence is encoded once with the base encoder and its pooled embedding is
+# stored in a memory-mapped store keyed by (model, pooling, max_length) and the
+# sentence's hash. New sentences are appended as a new shard, so adding a language
+# or an augmented file only encodes what is missing. Small heads (linear or one
+# hidden layer) are then swept over the cached embeddings on CPU; epochs, learning
+# rate and class weights (e.g. the notebooks' [1.5, 0.5]) take seconds per run.
+# The full fine-tune is kept for the final model only.
+
+DEFAULT_CACHE_DIR = ".embedding_cache"
+MAX_LENGTH = 128
+ENCODE_BATCH_SIZE = 64
+POOLING = "mean"            # "mean" over the attention mask, or "cls" (first token)
+HEAD_BATCH_SIZE = 64
+HEAD_WEIGHT_DECAY = 0.01
+
+
+def sentence_hash(text):
+    return hashlib.sha1(str(text).encode("utf-8")).hexdigest()
+
+
+def pool(hidden_states, attention_mask, pooling=POOLING):
+    if pooling == "cls":
+        return hidden_states[:, 0]
+    mask = attention_mask.unsqueeze(-1).to(hidden_states.dtype)
+    return (hidden_states * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+
+
+def encode_sentences(model, tokenizer, texts, device, pooling=POOLING, max_length=MAX_LENGTH,
+                     batch_size=ENCODE_BATCH_SIZE):
+    """Pooled float32 embeddings; sentences are encoded longest first to keep padding low"""
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    embeddings = np.zeros((len(texts), model.config.hidden_size), dtype=np.float32)
+    model.eval()
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            encoding = tokenizer([texts[i] for i in rows], max_length=max_length, padding=True,
+                                 truncation=True, return_tensors='pt').to(device)
+            hidden_states = model(**encoding).last_hidden_state
+            embeddings[rows] = pool(hidden_states, encoding['attention_mask'], pooling).float().cpu().numpy()
+    return embeddings
+
+
+class EmbeddingStore:
+    """Append-only, memory-mapped store of pooled sentence embeddings for one encoder setting"""
+
+    def __init__(self, model_name, pooling=POOLING, max_length=MAX_LENGTH, cache_dir=DEFAULT_CACHE_DIR):
+        self.model_name = model_name
+        self.pooling = pooling
+        self.max_length = max_length
+        self.path = os.path.join(cache_dir, f"{model_name.strip('/').replace('/', '--')}-{pooling}-{max_length}")
+        self.model = None
+        self.tokenizer = None
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self._load_index()
+
+    def _load_index(self):
+        self.shards = []
+        self.index = {}
+        if not os.path.isdir(self.path):
+            return
+        for name in sorted(os.listdir(self.path)):
+            if not (name.startswith("shard-") and os.path.exists(os.path.join(self.path, name, "meta.json"))):
+                continue
+            shard = len(self.shards)
+            self.shards.append(np.load(os.path.join(self.path, name, "embeddings.npy"), mmap_mode="r"))
+            with open(os.path.join(self.path, name, "hashes.json"), encoding="utf-8") as f:
+                for row, key in enumerate(json.load(f)):
+                    self.index[key] = (shard, row)
+
+    def _encoder(self):
+        if self.model is None:
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            self.model = AutoModel.from_pretrained(self.model_name).to(self.device)
+        return self.model, self.tokenizer
+
+    def _write_shard(self, keys, embeddings):
+        # Same temporary-directory-and-rename pattern as token_cache.build_token_cache
+        name = f"shard-{time.time_ns():020d}-{os.getpid()}"
+        tmp_path = os.path.join(self.path, f".{name}.tmp")
+        os.makedirs(tmp_path, exist_ok=True)
+        np.save(os.path.join(tmp_path, "embeddings.npy"), embeddings)
+        with open(os.path.join(tmp_path, "hashes.json"), "w", encoding="utf-8") as f:
+            json.dump(keys, f)
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"model": self.model_name, "pooling": self.pooling, "max_length": self.max_length,
+                       "rows": len(keys), "dim": int(embeddings.shape[1])}, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.path, name))
+
+    def embed(self, texts):
+        """Embeddings for texts in input order; only sentences missing from the store are encoded"""
+        texts = [str(text) for text in texts]
+        keys = [sentence_hash(text) for text in texts]
+        missing = list(dict.fromkeys(key for key in keys if key not in self.index))
+        if missing:
+            first_text = {}
+            for key, text in zip(keys, texts):
+                first_text.setdefault(key, text)
+            model, tokenizer = self._encoder()
+            start = time.perf_counter()
+            embeddings = encode_sentences(model, tokenizer, [first_text[key] for key in missing], self.device,
+                                          self.pooling, self.max_length)
+            print(f"Encoded {len(missing)} new sentences in {time.perf_counter() - start:.1f}s")
+            self._write_shard(missing, embeddings)
+            self._load_index()
+        locations = [self.index[key] for key in keys]
+        if not locations:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([self.shards[shard][row] for shard, row in locations])
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+        self._load_index()
+
+
+def load_split(file_paths):
+    """Concatenated sentence / label_id rows of one or more TSVs"""
+    frames = []
+    for file_path in file_paths:
+        df = pd.read_csv(file_path, sep='\t', header=0)[['sentence', 'label']].dropna()
+        df['label_id'] = df['label'].map(LABEL_MAP)
+        frames.append(df.dropna(subset=['label_id']))
+    data = pd.concat(frames, ignore_index=True)
+    data['label_id'] = data['label_id'].astype(int)
+    return data
+
+
+def make_head(input_dim, hidden=0, dropout=0.1):
+    if not hidden:
+        return torch.nn.Linear(input_dim, 2)
+    return torch.nn.Sequential(
+        torch.nn.Dropout(dropout),
+        torch.nn.Linear(input_dim, hidden),
+        torch.nn.GELU(),
+        torch.nn.Dropout(dropout),
+        torch.nn.Linear(hidden, 2),
+    )
+
+
+def train_head(train_x, train_y, val_x, val_y, epochs=3, learning_rate=1e-3, class_weights=None, hidden=0,
+               batch_size=HEAD_BATCH_SIZE, weight_decay=HEAD_WEIGHT_DECAY, seed=42):
+    """Train a head on cached embeddings; returns the head and metrics of its best epoch on val"""
+    torch.manual_seed(seed)
+    train_x = torch.tensor(train_x, dtype=torch.float32)
+    train_y = torch.tensor(train_y, dtype=torch.long)
+    val_x = torch.tensor(val_x, dtype=torch.float32)
+    # Standardize with training statistics; frozen-encoder features vary a lot in scale
+    mean, std = train_x.mean(dim=0), train_x.std(dim=0).clamp(min=1e-6)
+    train_x, val_x = (train_x - mean) / std, (val_x - mean) / std
+
+    head = make_head(train_x.shape[1], hidden)
+    weight = torch.tensor(class_weights, dtype=torch.float32) if class_weights else None
+    loss_fct = torch.nn.CrossEntropyLoss(weight=weight)
+    optimizer = torch.optim.AdamW(head.parameters(), lr=learning_rate, weight_decay=weight_decay)
+    generator = torch.Generator().manual_seed(seed)
+
+    best = {"epoch": 0, "f1": -1.0}
+    best_state = None
+    for epoch in range(1, epochs + 1):
+        head.train()
+        for rows in torch.randperm(len(train_x), generator=generator).split(batch_size):
+            optimizer.zero_grad()
+            loss = loss_fct(head(train_x[rows]), train_y[rows])
+            loss.backward()
+            optimizer.step()
+        head.eval()
+        with torch.no_grad():
+            preds = head(val_x).argmax(dim=-1).numpy()
+        f1 = f1_score(val_y, preds, average='weighted', zero_division=0)
+        if f1 > best["f1"]:
+            best = {"epoch": epoch, "f1": f1, "macro_f1": f1_score(val_y, preds, average='macro', zero_division=0)}
+            best_state = {name: value.clone() for name, value in head.state_dict().items()}
+    head.load_state_dict(best_state)
+    head.normalization = (mean, std)
+    return head, best
+
+
+def sweep(train_x, train_y, val_x, val_y, epochs=(3,), learning_rates=(1e-3,), class_weights=(None,),
+          hidden=(0,)):
+    """Train a head for every combination and return the results sorted by weighted F1"""
+    rows = []
+    for n_epochs, learning_rate, weights, n_hidden in itertools.product(epochs, learning_rates, class_weights,
+                                                                        hidden):
+        start = time.perf_counter()
+        _, best = train_head(train_x, train_y, val_x, val_y, n_epochs, learning_rate, weights, n_hidden)
+        rows.append({
+            "epochs": n_epochs,
+            "learning_rate": learning_rate,
+            "class_weights": "none" if weights is None else ",".join(str(w) for w in weights),
+            "hidden": n_hidden,
+            "best_epoch": best["epoch"],
+            "f1": best["f1"],
+            "macro_f1": best["macro_f1"],
+            "seconds": time.perf_counter() - start,
+        })
+    return pd.DataFrame(rows).sort_values("f1", ascending=False, ignore_index=True)
+
+
+def parse_class_weights(value):
+    return None if value.lower() == "none" else [float(w) for w in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache frozen-encoder embeddings and sweep classification heads")
+    parser.add_argument("--model", required=True, help="Base encoder, e.g. GroNLP/mdebertav3-subjectivity-multilingual")
+    parser.add_argument("--train", nargs="+", required=True, help="Training TSVs (sentence, label)")
+    parser.add_argument("--val", nargs="+", required=True, help="Validation TSVs")
+    parser.add_argument("--pooling", choices=["mean", "cls"], default=POOLING)
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--epochs", type=int, nargs="+", default=[3, 8, 20])
+    parser.add_argument("--learning-rates", type=float, nargs="+", default=[1e-4, 1e-3, 3e-3])
+    parser.add_argument("--class-weights", type=parse_class_weights, nargs="+", default=[None, [1.5, 0.5]],
+                        help="Comma-separated OBJ,SUBJ weights or 'none'")
+    parser.add_argument("--hidden", type=int, nargs="+", default=[0, 256], help="Head hidden size (0 = linear)")
+    parser.add_argument("--output", default=None, help="Write the sweep results to this CSV")
+    args = parser.parse_args()
+
+    store = EmbeddingStore(args.model, args.pooling, args.max_length, args.cache_dir)
+    train_data, val_data = load_split(args.train), load_split(args.val)
+    train_x = store.embed(train_data['sentence'].tolist())
+    val_x = store.embed(val_data['sentence'].tolist())
+    print(f"{len(train_x)} train / {len(val_x)} val embeddings of size {train_x.shape[1]} from {store.path}")
+
+    results = sweep(train_x, train_data['label_id'].to_numpy(), val_x, val_data['label_id'].to_numpy(),
+                    args.epochs, args.learning_rates, args.class_weights, args.hidden)
+    print(results.round(4).to_string(index=False))
+    print(f"{len(results)} heads trained in {results['seconds'].sum():.1f}s")
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import json
+import time
+import argparse
+import threading
+import http.client
+from urllib.parse import urlparse
+import numpy as np
+import pandas as pd
+
+# Load test for serve.py: many concurrent clients each send single-sentence
+# /predict requests over a keep-alive connection, and we report p50/p99
+# latency and overall throughput. With --model the server is started in-process.
+
+DEFAULT_SENTENCES = [
+    "The committee approved the budget on Tuesday.",
+    "This is the most shameful decision the council has ever made.",
+    "Inflation rose to 3.2 percent in March, according to the statistics office.",
+    "Frankly, nobody should trust these numbers.",
+]
+
+
+def client_worker(url, sentences, deadline, latencies, errors, lock):
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=60)
+    local = []
+    i = 0
+    while time.perf_counter() < deadline:
+        # Bytes, so http.client sends headers and body in one packet (no Nagle stall)
+        body = json.dumps({"sentence": sentences[i % len(sentences)]}).encode("utf-8")
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request("POST", "/predict", body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}")
+        except Exception:
+            with lock:
+                errors.append(1)
+            conn.close()
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=60)
+            continue
+        local.append(time.perf_counter() - start)
+    conn.close()
+    with lock:
+        latencies.extend(local)
+
+
+def run_load(url, sentences, concurrency, duration):
+    latencies, errors, lock = [], [], threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=client_worker, args=(url, sentences, deadline, latencies, errors, lock))
+               for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else float("nan"),
+        "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the subjectivity scoring service")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--model", default=None, help="Start serve.py in-process with this model instead of --url")
+    parser.add_argument("--input", default=None, help="TSV with a sentence column to sample requests from")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    sentences = DEFAULT_SENTENCES
+    if args.input:
+        sentences = pd.read_csv(args.input, sep='\t')['sentence'].astype(str).tolist()
+
+    server = None
+    url = args.url
+    if args.model:
+        from serve import create_server
+        from predictors import load_classifier
+        classifier = load_classifier(args.model, num_threads=args.threads)
+        server = create_server(classifier, port=0, max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"{'clients':>8}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    try:
+        for concurrency in args.concurrency:
+            result = run_load(url, sentences, concurrency, args.duration)
+            print(f"{result['concurrency']:>8}{result['requests']:>10}{result['errors']:>8}"
+                  f"{result['throughput']:>9.1f}{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}")
+    finally:
+        if server is not None:
+            server.shutdown()
+            print(f"Batcher stats: {server.RequestHandlerClass.batcher.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import os
+import json
+import argparse
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+# Export a fine-tuned subjectivity classifier (mDeBERTa / RoBERTa, e.g. the
+# /content/drive/MyDrive/saved_model checkpoint) to ONNX for CPU-only scoring,
+# plus a dynamically int8-quantized copy. The tokenizer and label mapping are
+# written next to the graphs so the runner needs nothing else.
+
+ONNX_MODEL = "model.onnx"
+QUANTIZED_MODEL = "model.int8.onnx"
+OPSET = 17
+
+
+def export_onnx(model_dir, output_dir, max_length=128, opset=OPSET, quantize=True):
+    """Write model.onnx (and model.int8.onnx) plus the tokenizer to output_dir"""
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+    model.config.return_dict = False
+
+    # Trace with a real batch; batch and sequence axes stay dynamic for bucketed inputs
+    sample = tokenizer(["An example sentence for tracing.", "Another one."], padding=True,
+                       truncation=True, max_length=max_length, return_tensors="pt")
+    input_names = [name for name in tokenizer.model_input_names if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    onnx_path = os.path.join(output_dir, ONNX_MODEL)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            onnx_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            dynamo=False,
+        )
+    tokenizer.save_pretrained(output_dir)
+    model.config.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, "export.json"), "w", encoding="utf-8") as f:
+        json.dump({"source": model_dir, "max_length": max_length, "opset": opset,
+                   "input_names": input_names}, f, indent=2)
+    print(f"Exported {model_dir} to {onnx_path}")
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantized_path = os.path.join(output_dir, QUANTIZED_MODEL)
+        quantize_dynamic(onnx_path, quantized_path, weight_type=QuantType.QInt8)
+        print(f"Quantized copy written to {quantized_path} "
+              f"({os.path.getsize(quantized_path) / 2**20:.1f} MB vs {os.path.getsize(onnx_path) / 2**20:.1f} MB)")
+    return output_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the subjectivity classifier to ONNX (+ int8)")
+    parser.add_argument("--model", required=True, help="Fine-tuned model directory, e.g. saved_model")
+    parser.add_argument("--output", default="onnx_model")
+    parser.add_argument("--max-length", type=int, default=128)
+    parser.add_argument("--opset", type=int, default=OPSET)
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+    export_onnx(args.model, args.output, args.max_length, args.opset, quantize=not args.no_quantize)
+
+
+if __name__ == "__main__":
+    main()
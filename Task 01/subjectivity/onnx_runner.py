@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from transformers import AutoTokenizer
+from onnx_export import ONNX_MODEL, QUANTIZED_MODEL
+
+# CPU inference runner for an exported subjectivity classifier.
+# The ONNX session and tokenizer are loaded once; sentences are sorted by length
+# and padded per batch, and predictions come back in input order.
+
+ID2LABEL = {0: "OBJ", 1: "SUBJ"}
+
+
+def softmax(logits):
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class OnnxSubjectivityClassifier:
+    def __init__(self, model_dir, quantized=True, num_threads=None):
+        import onnxruntime as ort
+        with open(os.path.join(model_dir, "export.json"), encoding="utf-8") as f:
+            self.export_info = json.load(f)
+        self.max_length = self.export_info["max_length"]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        path = os.path.join(model_dir, QUANTIZED_MODEL if quantized else ONNX_MODEL)
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def predict_proba(self, texts, batch_size=32):
+        """Class probabilities for `texts`, in input order"""
+        texts = [str(text) for text in texts]
+        probabilities = np.zeros((len(texts), 2), dtype=np.float32)
+        # Sort by length so each batch is padded only to its own longest sentence
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            encoding = self.tokenizer([texts[i] for i in indices], padding=True, truncation=True,
+                                      max_length=self.max_length, return_tensors="np")
+            feed = {name: encoding[name].astype(np.int64) for name in self.input_names}
+            logits = self.session.run(["logits"], feed)[0]
+            probabilities[indices] = softmax(logits)
+        return probabilities
+
+    def predict_dataframe(self, data, batch_size=32):
+        """Same columns as batching.predict_dataframe, for a DataFrame with sentence_id/sentence"""
+        probabilities = self.predict_proba(data['sentence'].tolist(), batch_size)
+        return pd.DataFrame({
+            'sentence_id': data['sentence_id'].values,
+            'sentence': data['sentence'].values,
+            'predicted_label': [ID2LABEL[p] for p in probabilities.argmax(axis=1)],
+            'obj_score': probabilities[:, 0].round(4),
+            'subj_score': probabilities[:, 1].round(4),
+        })
+
+
+def time_batches(predict, texts, batch_size):
+    """Per-batch latencies (seconds) and overall throughput of a predict function"""
+    latencies = []
+    outputs = []
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        batch_start = time.perf_counter()
+        outputs.append(predict(texts[i:i + batch_size]))
+        latencies.append(time.perf_counter() - batch_start)
+    elapsed = time.perf_counter() - start
+    return np.concatenate(outputs), np.array(latencies), len(texts) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the exported ONNX models with the PyTorch baseline")
+    parser.add_argument("--onnx-dir", required=True, help="Output directory of onnx_export.py")
+    parser.add_argument("--model", required=True, help="Original PyTorch model directory")
+    parser.add_argument("--input", required=True, help="TSV with a sentence column (e.g. dev_test_en.tsv)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--tolerance", type=float, default=1e-3, help="Max probability difference for fp32 ONNX")
+    args = parser.parse_args()
+
+    import torch
+    from transformers import AutoModelForSequenceClassification
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    texts = pd.read_csv(args.input, sep='\t')['sentence'].astype(str).tolist()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForSequenceClassification.from_pretrained(args.model).eval()
+    max_length = OnnxSubjectivityClassifier(args.onnx_dir, quantized=False).max_length
+
+    def torch_predict(batch):
+        with torch.no_grad():
+            encoding = tokenizer(batch, padding=True, truncation=True, max_length=max_length, return_tensors="pt")
+            return torch.nn.functional.softmax(model(**encoding).logits, dim=-1).numpy()
+
+    results = [("pytorch fp32",) + time_batches(torch_predict, texts, args.batch_size)]
+    for name, quantized in (("onnx fp32", False), ("onnx int8", True)):
+        runner = OnnxSubjectivityClassifier(args.onnx_dir, quantized=quantized, num_threads=args.threads)
+        results.append((name,) + time_batches(lambda b: runner.predict_proba(b, args.batch_size),
+                                              texts, args.batch_size))
+
+    reference = results[0][1]
+    print(f"\n{'engine':<14}{'p50 ms':>9}{'p99 ms':>9}{'sent/s':>9}{'agree':>8}{'max |dp|':>10}")
+    for name, probabilities, latencies, throughput in results:
+        agree = float((probabilities.argmax(1) == reference.argmax(1)).mean())
+        max_diff = float(np.abs(probabilities - reference).max())
+        print(f"{name:<14}{np.percentile(latencies, 50) * 1000:>9.1f}{np.percentile(latencies, 99) * 1000:>9.1f}"
+              f"{throughput:>9.1f}{agree:>8.3f}{max_diff:>10.2e}")
+    fp32_diff = float(np.abs(results[1][1] - reference).max())
+    status = "OK" if fp32_diff <= args.tolerance else "MISMATCH"
+    print(f"\nONNX fp32 vs PyTorch max difference {fp32_diff:.2e} (tolerance {args.tolerance}): {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+import os
+import re
+import json
+import time
+import shutil
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+
+# Parallel per-language training and evaluation for Task 1.
+# The monolingual notebook trains and evaluates one language after another; here
+# each (language, model) pair is a job run in a process pool. Every worker is
+# pinned to its own slice of CPU cores (and sets torch's thread count to match),
+# so jobs don't oversubscribe the machine. Workers read the language folders the
+# notebooks' load_data copies from Drive, tokenize through token_cache (so reruns
+# and jobs sharing a tokenizer reuse the cached splits) and train with
+# BucketedTrainer. Each finished job writes result.json next to its model, so an
+# interrupted sweep resumes where it stopped; all results go into one table.
+
+LANGUAGE_FOLDERS = {'ar': 'arabic', 'bg': 'bulgarian', 'de': 'german', 'en': 'english', 'it': 'italian'}
+AUGMENTED_FILES = {'ar': 'arabic_train_augmented.tsv', 'bg': 'bulgarian_train_augmented.tsv'}
+# Model, learning rate and epochs per language from task1_monolingual_llm.ipynb
+DEFAULT_MATRIX = [
+    {"language": "en", "model": "cardiffnlp/twitter-roberta-base-sentiment", "learning_rate": 2e-5, "epochs": 5},
+    {"language": "it", "model": "neuraly/bert-base-italian-cased-sentiment", "learning_rate": 2e-5, "epochs": 5},
+    {"language": "ar", "model": "omarelshehy/Arabic-Retrieval-v1.0", "learning_rate": 1e-5, "epochs": 3},
+    {"language": "de", "model": "ssary/XLM-RoBERTa-German-sentiment", "learning_rate": 2e-5, "epochs": 3},
+    {"language": "bg", "model": "ankitkupadhyay/xnli3.0_bulgarian_model", "learning_rate": 2e-5, "epochs": 3},
+]
+MAX_LENGTH = 128
+BATCH_SIZE = 16
+RESULTS_FILE = "results.csv"
+
+
+def language_file(data_dir, file_name, language):
+    """Path in the notebooks' per-language folder layout, falling back to data_dir itself"""
+    path = os.path.join(data_dir, LANGUAGE_FOLDERS.get(language, language), file_name)
+    return path if os.path.exists(path) else os.path.join(data_dir, file_name)
+
+
+def load_labeled(paths):
+    from token_cache import LABEL_MAP
+    frames = []
+    for path in paths:
+        df = pd.read_csv(path, sep='\t', header=0)
+        if 'solved_conflict' in df.columns:
+            df = df.drop(columns=['solved_conflict'])
+        frames.append(df)
+    data = pd.concat(frames, ignore_index=True)
+    data['label_id'] = data['label'].map(LABEL_MAP)
+    return data.dropna(subset=['sentence', 'label_id']).reset_index(drop=True)
+
+
+def job_name(job):
+    return f"{job['language']}-{re.sub(r'[^A-Za-z0-9._-]+', '--', job['model'])}"
+
+
+def compute_metrics(pred):
+    """Same metrics as the notebooks' compute_metrics (weighted averages)"""
+    from sklearn.metrics import accuracy_score, precision_recall_fscore_support
+    labels = pred.label_ids
+    preds = pred.predictions.argmax(-1)
+    precision, recall, f1, _ = precision_recall_fscore_support(labels, preds, average='weighted', zero_division=0)
+    return {'accuracy': accuracy_score(labels, preds), 'f1': f1, 'precision': precision, 'recall': recall}
+
+
+_CORES = None
+
+
+def _pin_worker(core_slices):
+    """Pool initializer: claim one slice of cores and restrict this process and torch to it"""
+    global _CORES
+    _CORES = core_slices.get()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, _CORES)
+    os.environ["OMP_NUM_THREADS"] = os.environ["MKL_NUM_THREADS"] = str(len(_CORES))
+    import torch
+    torch.set_num_threads(len(_CORES))
+
+
+def run_job(job, data_dir, output_dir, augmented=False, keep_models=True):
+    """Train one (language, model) job, evaluate it on dev_test_<lang>.tsv and return its result row"""
+    from sklearn.metrics import f1_score, accuracy_score
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification, TrainingArguments, \
+        EarlyStoppingCallback
+    from token_cache import CachedSubjectivityDataset
+    from batching import BucketedTrainer, predict_dataframe
+
+    language = job['language']
+    job_dir = os.path.join(output_dir, job_name(job))
+    start = time.perf_counter()
+
+    train_files = [language_file(data_dir, f"train_{language}.tsv", language)]
+    if augmented and language in AUGMENTED_FILES:
+        train_files.append(language_file(data_dir, AUGMENTED_FILES[language], language))
+    train_data = load_labeled(train_files)
+    val_data = load_labeled([language_file(data_dir, f"dev_{language}.tsv", language)])
+
+    tokenizer = AutoTokenizer.from_pretrained(job['model'])
+    model = AutoModelForSequenceClassification.from_pretrained(job['model'], num_labels=2,
+                                                               ignore_mismatched_sizes=True)
+    training_args = TrainingArguments(
+        output_dir=os.path.join(job_dir, "checkpoints"),
+        eval_strategy="epoch",
+        save_strategy="epoch",
+        load_best_model_at_end=True,
+        metric_for_best_model="f1",
+        save_total_limit=1,
+        learning_rate=job.get('learning_rate', 2e-5),
+        per_device_train_batch_size=job.get('batch_size', BATCH_SIZE),
+        per_device_eval_batch_size=job.get('batch_size', BATCH_SIZE),
+        num_train_epochs=job.get('epochs', 3),
+        weight_decay=0.01,
+        logging_strategy="epoch",
+        report_to='none',
+        disable_tqdm=True,
+    )
+    trainer = BucketedTrainer(
+        model=model,
+        args=training_args,
+        train_dataset=CachedSubjectivityDataset(train_data, tokenizer, MAX_LENGTH),
+        eval_dataset=CachedSubjectivityDataset(val_data, tokenizer, MAX_LENGTH),
+        compute_metrics=compute_metrics,
+        callbacks=[EarlyStoppingCallback(early_stopping_patience=3, early_stopping_threshold=0.001)],
+    )
+    trainer.train()
+    train_seconds = time.perf_counter() - start
+
+    row = {**job, "train_rows": len(train_data), "cores": len(_CORES) if _CORES else None,
+           "train_seconds": round(train_seconds, 1)}
+    dev_test_path = language_file(data_dir, f"dev_test_{language}.tsv", language)
+    if os.path.exists(dev_test_path):
+        test_data = load_labeled([dev_test_path])
+        results = predict_dataframe(test_data, model, tokenizer, model.device, MAX_LENGTH, BATCH_SIZE)
+        results.to_csv(os.path.join(job_dir, f"dev_test_{language}_predictions.tsv"), sep='\t', index=False)
+        true_labels, pred_labels = test_data['label'], results['predicted_label']
+        row.update({
+            "dev_test_accuracy": accuracy_score(true_labels, pred_labels),
+            "dev_test_f1": f1_score(true_labels, pred_labels, average='weighted'),
+            "dev_test_macro_f1": f1_score(true_labels, pred_labels, average='macro'),
+        })
+    row["seconds"] = round(time.perf_counter() - start, 1)
+
+    if keep_models:
+        model.save_pretrained(os.path.join(job_dir, "saved_model"))
+        tokenizer.save_pretrained(os.path.join(job_dir, "saved_model"))
+    shutil.rmtree(training_args.output_dir, ignore_errors=True)
+    with open(os.path.join(job_dir, "result.json"), "w", encoding="utf-8") as f:
+        json.dump(row, f, indent=2)
+    return row
+
+
+def core_slices(workers, cores_per_job=None):
+    """Split the cores available to this process into one disjoint slice per worker"""
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count()))
+    workers = max(1, min(workers, len(cores)))
+    size = cores_per_job or len(cores) // workers
+    return [cores[i * size:(i + 1) * size] or cores for i in range(workers)]
+
+
+def run_matrix(jobs, data_dir, output_dir, workers, cores_per_job=None, augmented=False, keep_models=True,
+               force=False):
+    """Run jobs in a spawn-based process pool; already finished jobs are read back from result.json"""
+    os.makedirs(output_dir, exist_ok=True)
+    rows, pending = [], []
+    for job in jobs:
+        result_path = os.path.join(output_dir, job_name(job), "result.json")
+        if os.path.exists(result_path) and not force:
+            with open(result_path, encoding="utf-8") as f:
+                rows.append({**json.load(f), "resumed": True})
+            print(f"Skipping {job_name(job)} (already finished)")
+        else:
+            pending.append(job)
+
+    if not pending:
+        return pd.DataFrame(rows)
+    slices = core_slices(min(workers, len(pending)), cores_per_job)
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    for cores in slices:
+        queue.put(cores)
+    with ProcessPoolExecutor(max_workers=len(slices), mp_context=context, initializer=_pin_worker,
+                             initargs=(queue,)) as pool:
+        futures = {pool.submit(run_job, job, data_dir, output_dir, augmented, keep_models): job for job in pending}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                row = future.result()
+                print(f"Finished {job_name(job)} in {row['seconds']}s")
+            except Exception as e:
+                row = {**job, "error": f"{type(e).__name__}: {e}"}
+                print(f"❌ {job_name(job)} failed: {row['error']}")
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def load_matrix(path):
+    """Jobs from a JSON list or a CSV with language, model, learning_rate and epochs columns"""
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return pd.read_csv(path).to_dict(orient="records")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and evaluate Task 1 language/model jobs in parallel")
+    parser.add_argument("--data-dir", required=True, help="Data folder (language subfolders as in the notebooks)")
+    parser.add_argument("--output", default="runs", help="Models, predictions and results table go here")
+    parser.add_argument("--matrix", default=None, help="JSON/CSV job list (default: the monolingual notebook's)")
+    parser.add_argument("--languages", nargs="+", default=None, help="Only run these languages")
+    parser.add_argument("--models", nargs="+", default=None, help="Run every language with each of these models")
+    parser.add_argument("--learning-rate", type=float, default=2e-5, help="With --models")
+    parser.add_argument("--epochs", type=int, default=3, help="With --models")
+    parser.add_argument("--workers", type=int, default=len(LANGUAGE_FOLDERS))
+    parser.add_argument("--cores-per-job", type=int, default=None, help="Default: available cores / workers")
+    parser.add_argument("--augmented", action="store_true", help="Merge the Gemini-augmented ar/bg training data")
+    parser.add_argument("--no-save-models", action="store_true")
+    parser.add_argument("--force", action="store_true", help="Rerun jobs that already have a result.json")
+    args = parser.parse_args()
+
+    languages = args.languages or list(LANGUAGE_FOLDERS)
+    if args.models:
+        jobs = [{"language": language, "model": model, "learning_rate": args.learning_rate, "epochs": args.epochs}
+                for language in languages for model in args.models]
+    else:
+        jobs = [job for job in (load_matrix(args.matrix) if args.matrix else DEFAULT_MATRIX)
+                if job["language"] in languages]
+
+    start = time.perf_counter()
+    results = run_matrix(jobs, args.data_dir, args.output, args.workers, args.cores_per_job, args.augmented,
+                         not args.no_save_models, args.force)
+    wall = time.perf_counter() - start
+    results.drop(columns=["resumed"], errors="ignore").to_csv(os.path.join(args.output, RESULTS_FILE), index=False)
+    print(results.drop(columns=["cores", "resumed"], errors="ignore").to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+    ran = results[results["resumed"] != True] if "resumed" in results else results
+    if "seconds" in ran and ran["seconds"].notna().any():
+        # Sum of job times is what running the same jobs one after another would take
+        sequential = ran["seconds"].sum()
+        print(f"Wall time {wall:.0f}s vs {sequential:.0f}s of job time ({sequential / wall:.1f}x)")
+    print(f"Results written to {os.path.join(args.output, RESULTS_FILE)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import io
+import os
+import csv
+import json
+import time
+import queue
+import argparse
+import threading
+from predictors import load_classifier, ID2LABEL
+
+# Streaming batch predictor for arbitrarily large TSV files.
+# A reader thread parses the input in batches and hands them to the inference
+# loop through a bounded queue, so reading overlaps with scoring and at most
+# PREFETCH_BATCHES batches are ever held in memory. Results are appended to the
+# output as `sentence_id\tlabel\tprob` rows, and a checkpoint records the input
+# and output byte offsets after every flush so an interrupted run resumes exactly.
+# Truncated rows without a sentence_id are skipped with a warning and counted in
+# the checkpoint; a row missing only its sentence is scored as an empty one.
+
+BATCH_SIZE = 64
+PREFETCH_BATCHES = 8
+CHECKPOINT_EVERY = 50     # Batches between durable flushes of output + checkpoint
+OUTPUT_HEADER = "sentence_id\tlabel\tprob\n"
+
+
+def atomic_write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def parse_line(line, delimiter="\t"):
+    """Parse one record; raises csv.Error if a quoted field continues on the next line"""
+    return next(csv.reader(io.StringIO(line.decode("utf-8")), delimiter=delimiter, strict=True), [])
+
+
+def read_batches(path, start_offset, batch_size, out_queue, stop):
+    """Reader thread: put (rows, end_offset, skipped) batches on the queue, then None"""
+    try:
+        with open(path, "rb") as f:
+            header = parse_line(f.readline())
+            id_col, text_col = header.index("sentence_id"), header.index("sentence")
+            if start_offset:
+                f.seek(start_offset)
+            batch, skipped = [], 0
+            while not stop.is_set():
+                line_offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                # A quoted sentence may contain newlines; keep reading until the record closes
+                while True:
+                    try:
+                        fields = parse_line(line)
+                        break
+                    except csv.Error:
+                        more = f.readline()
+                        if not more:
+                            raise
+                        line += more
+                if len(fields) <= id_col:
+                    print(f"Warning: skipping truncated row at byte {line_offset} (no sentence_id)")
+                    skipped += 1
+                    continue
+                batch.append((fields[id_col], fields[text_col] if len(fields) > text_col else ""))
+                if len(batch) >= batch_size:
+                    out_queue.put((batch, f.tell(), skipped))
+                    batch, skipped = [], 0
+            if batch or skipped:
+                out_queue.put((batch, f.tell(), skipped))
+    except Exception as e:
+        out_queue.put(e)
+    out_queue.put(None)
+
+
+def predict_stream(classifier, input_path, output_path, batch_size=BATCH_SIZE,
+                   prefetch=PREFETCH_BATCHES, checkpoint_every=CHECKPOINT_EVERY, resume=True):
+    checkpoint_path = f"{output_path}.ckpt.json"
+    checkpoint = {"input_offset": 0, "output_offset": 0, "rows": 0, "skipped": 0, "status": "running"}
+    if resume and os.path.exists(checkpoint_path) and os.path.exists(output_path):
+        with open(checkpoint_path, encoding="utf-8") as f:
+            checkpoint = {"skipped": 0, **json.load(f)}
+        if checkpoint.get("status") == "done":
+            print(f"{output_path} is already complete ({checkpoint['rows']} rows)")
+            return checkpoint
+        print(f"Resuming at input byte {checkpoint['input_offset']} ({checkpoint['rows']} rows already scored)")
+
+    # Drop anything written after the last checkpoint, then append
+    out = open(output_path, "r+b" if checkpoint["output_offset"] else "wb")
+    out.truncate(checkpoint["output_offset"])
+    out.seek(checkpoint["output_offset"])
+    if not checkpoint["output_offset"]:
+        out.write(OUTPUT_HEADER.encode("utf-8"))
+
+    batches = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+    reader = threading.Thread(target=read_batches, daemon=True,
+                              args=(input_path, checkpoint["input_offset"], batch_size, batches, stop))
+    reader.start()
+
+    start = time.perf_counter()
+    scored = 0
+    since_checkpoint = 0
+
+    def save_checkpoint(status="running"):
+        out.flush()
+        os.fsync(out.fileno())
+        checkpoint.update({"output_offset": out.tell(), "status": status})
+        atomic_write_json(checkpoint_path, checkpoint)
+
+    try:
+        while True:
+            item = batches.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            rows, end_offset, skipped = item
+            probabilities = classifier.predict_proba([text for _, text in rows], batch_size=batch_size) \
+                if rows else []
+            lines = []
+            for (sentence_id, _), row in zip(rows, probabilities):
+                label = int(row.argmax())
+                lines.append(f"{sentence_id}\t{ID2LABEL[label]}\t{row[label]:.4f}\n")
+            out.write("".join(lines).encode("utf-8"))
+            checkpoint["input_offset"] = end_offset
+            checkpoint["rows"] += len(rows)
+            checkpoint["skipped"] += skipped
+            scored += len(rows)
+            since_checkpoint += 1
+            if since_checkpoint >= checkpoint_every:
+                save_checkpoint()
+                since_checkpoint = 0
+                elapsed = time.perf_counter() - start
+                print(f"{checkpoint['rows']} rows scored ({scored / elapsed:.1f} sentences/sec)")
+        save_checkpoint("done")
+    finally:
+        stop.set()
+        out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Scored {scored} rows in {elapsed:.1f}s ({scored / max(elapsed, 1e-9):.1f} sentences/sec) -> {output_path}")
+    if checkpoint["skipped"]:
+        print(f"Skipped {checkpoint['skipped']} truncated rows without a sentence_id")
+    return checkpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream subjectivity predictions for a large TSV file")
+    parser.add_argument("input", help="TSV with sentence_id and sentence columns")
+    parser.add_argument("output", help="Output TSV (sentence_id, label, prob)")
+    parser.add_argument("--model", required=True, help="saved_model directory or onnx_export.py output")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--prefetch", type=int, default=PREFETCH_BATCHES, help="Parsed batches buffered ahead")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--fp32", action="store_true", help="Use the fp32 ONNX graph instead of int8")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    classifier = load_classifier(args.model, quantized=not args.fp32, num_threads=args.threads)
+    predict_stream(classifier, args.input, args.output, args.batch_size, args.prefetch,
+                   args.checkpoint_every, resume=not args.restart)
+
+
+if __name__ == "__main__":
+    main()
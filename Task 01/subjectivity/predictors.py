@@ -0,0 +1,68 @@
+import os
+import numpy as np
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+# In-memory classifiers shared by the serving and batch-prediction entry points.
+# Both expose predict_proba(texts) -> (n, 2) array of [obj_score, subj_score] in
+# input order, so callers don't care whether a PyTorch or ONNX model is loaded.
+
+ID2LABEL = {0: "OBJ", 1: "SUBJ"}
+NGRAM_MODEL_FILE = "ngram_model.joblib"
+
+
+class TorchSubjectivityClassifier:
+    def __init__(self, model_dir, device=None, max_length=128, num_threads=None):
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.device = torch.device(device or ("cuda" if torch.cuda.is_available() else "cpu"))
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_dir).to(self.device)
+        self.model.eval()
+
+    def predict_proba(self, texts, batch_size=32):
+        texts = [str(text) for text in texts]
+        probabilities = np.zeros((len(texts), 2), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        with torch.no_grad():
+            for start in range(0, len(order), batch_size):
+                indices = order[start:start + batch_size]
+                encoding = self.tokenizer([texts[i] for i in indices], padding=True, truncation=True,
+                                          max_length=self.max_length, return_tensors="pt").to(self.device)
+                logits = self.model(**encoding).logits
+                probabilities[indices] = torch.nn.functional.softmax(logits, dim=-1).cpu().numpy()
+        return probabilities
+
+
+class HashedNgramClassifier:
+    """Distilled hashed character/word n-gram logistic regression (see distill.py)"""
+
+    def __init__(self, model_dir):
+        import joblib
+        saved = joblib.load(os.path.join(model_dir, NGRAM_MODEL_FILE))
+        self.vectorizer = saved["vectorizer"]
+        self.model = saved["model"]
+
+    def predict_proba(self, texts, batch_size=1024):
+        texts = [str(text) for text in texts]
+        probabilities = np.zeros((len(texts), 2), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            features = self.vectorizer.transform(texts[start:start + batch_size])
+            probabilities[start:start + batch_size] = self.model.predict_proba(features)
+        return probabilities
+
+
+def load_classifier(model_dir, quantized=True, num_threads=None, max_length=128):
+    """ONNX runner for an onnx_export.py directory, n-gram student for distill.py --student ngram,
+    otherwise the PyTorch model"""
+    if os.path.exists(os.path.join(model_dir, NGRAM_MODEL_FILE)):
+        return HashedNgramClassifier(model_dir)
+    if os.path.exists(os.path.join(model_dir, "export.json")):
+        from onnx_runner import OnnxSubjectivityClassifier
+        return OnnxSubjectivityClassifier(model_dir, quantized=quantized, num_threads=num_threads)
+    return TorchSubjectivityClassifier(model_dir, max_length=max_length, num_threads=num_threads)
+
+
+def to_labels(probabilities):
+    return [ID2LABEL[p] for p in probabilities.argmax(axis=1)]
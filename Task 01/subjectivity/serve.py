@@ -0,0 +1,243 @@
+import csv
+import json
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from predictors import load_classifier, ID2LABEL
+
+# Local HTTP scoring service for the Task 1 subjectivity classifier.
+# Concurrent requests are queued and a single inference thread drains the queue
+# into micro-batches (up to MAX_BATCH_SIZE sentences, waiting at most MAX_WAIT_MS
+# for a batch to fill), so many small requests share one forward pass.
+#
+#   GET  /health          -> {"status": "ok", ...batcher stats}
+#   POST /predict         {"sentence": "..."} or {"sentences": [...]}
+#   POST /predict/bulk    TSV (sentence_id, sentence header) or JSONL body,
+#                         streamed back as TSV / JSONL rows while it is scored
+
+MAX_BATCH_SIZE = 32
+MAX_WAIT_MS = 5
+BULK_WINDOW = 256          # Bulk rows submitted to the batcher at a time
+READ_CHUNK = 65536
+
+
+class MicroBatcher:
+    """Collects single predictions from many threads into batched model calls"""
+
+    def __init__(self, predict_proba, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.predict_proba = predict_proba
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = queue.Queue()
+        self.stats = {"requests": 0, "batches": 0, "max_batch": 0}
+        self.thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, text):
+        future = Future()
+        self.queue.put((str(text), future))
+        return future
+
+    def submit_many(self, texts):
+        return [self.submit(text) for text in texts]
+
+    def _collect(self):
+        items = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            try:
+                probabilities = self.predict_proba([text for text, _ in items], batch_size=len(items))
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+            for (_, future), row in zip(items, probabilities):
+                future.set_result(row)
+            self.stats["requests"] += len(items)
+            self.stats["batches"] += 1
+            self.stats["max_batch"] = max(self.stats["max_batch"], len(items))
+
+
+def format_prediction(row):
+    label = int(row.argmax())
+    return {"label": ID2LABEL[label], "obj_score": round(float(row[0]), 4), "subj_score": round(float(row[1]), 4)}
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Headers and body go out as separate small writes
+    batcher = None
+
+    def log_message(self, format, *args):
+        pass  # Keep the console quiet under load
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body_lines(self):
+        """Yield the request body line by line without reading it all into memory"""
+        remaining = int(self.headers.get("Content-Length", 0))
+        while remaining > 0:
+            line = self.rfile.readline(min(remaining, READ_CHUNK))
+            if not line:
+                break
+            remaining -= len(line)
+            yield line.decode("utf-8")
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        if data:
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", **self.batcher.stats})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path == "/predict":
+            self._predict()
+        elif self.path == "/predict/bulk":
+            self._predict_bulk()
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _predict(self):
+        try:
+            payload = json.loads("".join(self._body_lines()) or "{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+        sentence = payload.get("sentence") if isinstance(payload, dict) else None
+        sentences = payload.get("sentences") if isinstance(payload, dict) else None
+        if isinstance(sentence, str):
+            futures = [self.batcher.submit(sentence)]
+        elif isinstance(sentences, list) and all(isinstance(text, str) for text in sentences):
+            futures = self.batcher.submit_many(sentences)
+        else:
+            self._send_json(400, {"error": "expected 'sentence' (a string) or 'sentences' (a list of strings)"})
+            return
+        try:
+            predictions = [format_prediction(future.result()) for future in futures]
+        except Exception as e:
+            self._send_json(500, {"error": f"prediction failed: {e}"})
+            return
+        self._send_json(200, predictions[0] if isinstance(sentence, str) else {"predictions": predictions})
+
+    def _bulk_rows(self, jsonl):
+        if jsonl:
+            records = (json.loads(line) for line in self._body_lines() if line.strip())
+        else:
+            records = csv.DictReader(self._body_lines(), delimiter="\t")
+        for record in records:
+            # DictReader fills a short row's missing columns with None
+            sentence = record.get("sentence") if isinstance(record, dict) else None
+            if not isinstance(sentence, str):
+                raise ValueError(f"no sentence in {record!r}")
+            yield record.get("sentence_id"), sentence
+
+    def _predict_bulk(self):
+        content_type = self.headers.get("Content-Type", "")
+        jsonl = "json" in content_type
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson" if jsonl else "text/tab-separated-values")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        if not jsonl:
+            self._write_chunk("sentence_id\tlabel\tprob\n")
+
+        # Keep a bounded window of rows in flight and flush results in input order.
+        # The status line has already gone out, so errors are reported as a final
+        # chunk and the chunked body is always terminated.
+        window, error = [], None
+        try:
+            for sentence_id, sentence in self._bulk_rows(jsonl):
+                window.append((sentence_id, self.batcher.submit(sentence)))
+                if len(window) >= BULK_WINDOW:
+                    error = self._flush_bulk(window, jsonl)
+                    window = []
+                    if error:
+                        break
+        except (ValueError, KeyError, csv.Error) as e:
+            error = f"bad input row: {e}"
+        if window:
+            error = self._flush_bulk(window, jsonl) or error
+        if error:
+            self._write_chunk(json.dumps({"error": error}) + "\n")
+            self.close_connection = True  # The rest of the body was not read
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _flush_bulk(self, window, jsonl):
+        """Write the window's predictions in order; returns an error message if the model failed"""
+        lines, error = [], None
+        for sentence_id, future in window:
+            try:
+                prediction = format_prediction(future.result())
+            except Exception as e:
+                error = f"prediction failed: {e}"
+                break
+            prob = prediction["subj_score"] if prediction["label"] == "SUBJ" else prediction["obj_score"]
+            if jsonl:
+                lines.append(json.dumps({"sentence_id": sentence_id, "label": prediction["label"], "prob": prob},
+                                        ensure_ascii=False) + "\n")
+            else:
+                lines.append(f"{sentence_id}\t{prediction['label']}\t{prob}\n")
+        self._write_chunk("".join(lines))
+        return error
+
+
+def create_server(classifier, host="127.0.0.1", port=8000, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+    handler = type("BoundScoringHandler", (ScoringHandler,), {
+        "batcher": MicroBatcher(classifier.predict_proba, max_batch_size, max_wait_ms),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the subjectivity classifier over HTTP")
+    parser.add_argument("--model", required=True, help="saved_model directory or onnx_export.py output")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads for inference")
+    parser.add_argument("--fp32", action="store_true", help="Use the fp32 ONNX graph instead of int8")
+    args = parser.parse_args()
+
+    classifier = load_classifier(args.model, quantized=not args.fp32, num_threads=args.threads)
+    server = create_server(classifier, args.host, args.port, args.max_batch, args.max_wait_ms)
+    print(f"Serving {args.model} on http://{args.host}:{args.port} "
+          f"(max batch {args.max_batch}, max wait {args.max_wait_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+
+# One-time tokenization cache for the subjectivity datasets.
+# Sentences are tokenized once, padded to max_length exactly as the notebook
+# Dataset classes do, and stored as .npy files next to a small meta.json. The
+# Dataset below memory-maps those files, so later epochs do no tokenizer work and
+# DataLoader workers share the same page cache instead of each holding a copy.
+
+DEFAULT_CACHE_DIR = ".token_cache"
+TOKENIZE_BATCH_SIZE = 1024     # Sentences passed to the (fast) tokenizer at once
+LABEL_MAP = {'OBJ': 0, 'SUBJ': 1}
+
+
+def tokenizer_name(tokenizer):
+    return getattr(tokenizer, "name_or_path", None) or type(tokenizer).__name__
+
+
+def cache_key(tokenizer, max_length, texts):
+    """Content address for (tokenizer, max_length, sentences)"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        "tokenizer": tokenizer_name(tokenizer),
+        "vocab_size": len(tokenizer),
+        "max_length": max_length,
+    }, sort_keys=True).encode("utf-8"))
+    for text in texts:
+        digest.update(str(text).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:24]
+
+
+def build_token_cache(texts, tokenizer, max_length, cache_dir=DEFAULT_CACHE_DIR,
+                      batch_size=TOKENIZE_BATCH_SIZE):
+    """Tokenize `texts` once and return the cache directory (reused if it already exists)"""
+    texts = [str(text) for text in texts]
+    path = os.path.join(cache_dir, f"{tokenizer_name(tokenizer).replace('/', '--')}-{max_length}-"
+                                   f"{cache_key(tokenizer, max_length, texts)}")
+    if os.path.exists(os.path.join(path, "meta.json")):
+        return path
+
+    # Write into a temporary directory and rename it, so a crash never leaves a partial cache
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    arrays = {}
+    lengths = np.lib.format.open_memmap(os.path.join(tmp_path, "lengths.npy"), mode="w+",
+                                        dtype=np.int32, shape=(len(texts),))
+    for start in range(0, len(texts), batch_size):
+        encoding = tokenizer(texts[start:start + batch_size], max_length=max_length,
+                             padding='max_length', truncation=True, return_tensors='np')
+        for name, values in encoding.items():
+            if name not in arrays:
+                arrays[name] = np.lib.format.open_memmap(os.path.join(tmp_path, f"{name}.npy"), mode="w+",
+                                                         dtype=np.int32, shape=(len(texts), max_length))
+            arrays[name][start:start + len(values)] = values
+        lengths[start:start + len(encoding["attention_mask"])] = encoding["attention_mask"].sum(axis=1)
+
+    for array in list(arrays.values()) + [lengths]:
+        array.flush()
+    with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "tokenizer": tokenizer_name(tokenizer),
+            "max_length": max_length,
+            "rows": len(texts),
+            "fields": sorted(arrays),
+        }, f, indent=2)
+    del arrays, lengths
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # Another process finished the same cache first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return path
+
+
+def load_token_cache(path):
+    """Memory-map every field of a cache read-only"""
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in meta["fields"]}
+    arrays["lengths"] = np.load(os.path.join(path, "lengths.npy"), mmap_mode="r")
+    return meta, arrays
+
+
+# Drop-in replacement for SubjectivityDataset / TestSubjectivityDataset
+class CachedSubjectivityDataset(Dataset):
+    def __init__(self, data, tokenizer, max_length, cache_dir=DEFAULT_CACHE_DIR,
+                 label_column='label_id', return_index=False):
+        self.cache_path = build_token_cache(data['sentence'].tolist(), tokenizer, max_length, cache_dir)
+        self.return_index = return_index
+        self.meta, _ = load_token_cache(self.cache_path)
+        self.arrays = None
+
+        # Labels are tiny, so they stay in memory; unlabeled test files have none
+        if label_column in data.columns:
+            self.labels = data[label_column].to_numpy(dtype=np.int64)
+        elif 'label' in data.columns:
+            self.labels = data['label'].map(LABEL_MAP).to_numpy(dtype=np.int64)
+        else:
+            self.labels = None
+
+    def _open(self):
+        # Opened lazily so each DataLoader worker maps the files itself instead of
+        # receiving a pickled copy of the arrays
+        if self.arrays is None:
+            _, self.arrays = load_token_cache(self.cache_path)
+        return self.arrays
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["arrays"] = None
+        return state
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    @property
+    def lengths(self):
+        """Unpadded token count of every row (used for length-bucketed batching)"""
+        return self._open()["lengths"]
+
+    def __getitem__(self, idx):
+        arrays = self._open()
+        # Only this row's pages are touched; widening to int64 copies max_length values
+        encoding = {name: torch.from_numpy(np.asarray(arrays[name][idx], dtype=np.int64))
+                    for name in self.meta["fields"]}
+        if self.labels is not None:
+            encoding['labels'] = torch.tensor(self.labels[idx], dtype=torch.long)
+        if self.return_index:
+            encoding['sentence_idx'] = idx
+        return encoding
@@ -0,0 +1,75 @@
+import time
+import argparse
+import pandas as pd
+import torch
+from generation import ClaimGenerator, load_model, build_prompt, extract_response, MAX_INPUT_LENGTH, TOKEN_BUDGET
+
+# Compares the notebooks' per-post generate_normalized_claim loop against the
+# batched ClaimGenerator on the same posts and reports posts/sec for each,
+# plus how many outputs are identical between the two.
+
+DEFAULT_POSTS = [
+    "BREAKING: The government just announced that all schools will close next week due to the new virus!!! Share before they delete this",
+    "Drinking hot water every 15 minutes kills the virus in your throat, doctors confirm",
+    "5G towers were installed in Wuhan right before the outbreak. Coincidence? I don't think so.",
+    "The minister said unemployment fell to 4 percent last quarter, the lowest in a decade",
+    "Photo shows the Amazon rainforest on fire yesterday",
+    "lol this guy claims the moon landing was filmed in a studio in Nevada",
+]
+
+
+def per_post_generate(model, tokenizer, post, generation_kwargs, max_length=MAX_INPUT_LENGTH):
+    """The notebooks' generate_normalized_claim, minus the CUDA-only calls"""
+    inputs = tokenizer(build_prompt(post), return_tensors="pt", padding=True, truncation=True,
+                       max_length=max_length).to(model.device)
+    with torch.no_grad():
+        outputs = model.generate(
+            inputs["input_ids"],
+            attention_mask=inputs["attention_mask"],
+            eos_token_id=tokenizer.eos_token_id,
+            pad_token_id=tokenizer.pad_token_id,
+            **generation_kwargs,
+        )
+    return extract_response(tokenizer.decode(outputs[0], skip_special_tokens=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched vs per-post claim generation")
+    parser.add_argument("--model", required=True, help="Fine-tuned checkpoint or LoRA adapter directory")
+    parser.add_argument("--base-model", default=None, help="Base model for a LoRA adapter")
+    parser.add_argument("--input", default=None, help="CSV with a post column (e.g. dev-eng.csv)")
+    parser.add_argument("--limit", type=int, default=64, help="Number of posts to generate for")
+    parser.add_argument("--num-beams", type=int, default=5)
+    parser.add_argument("--max-new-tokens", type=int, default=120)
+    parser.add_argument("--token-budget", type=int, default=TOKEN_BUDGET)
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    if args.input:
+        posts = pd.read_csv(args.input)["post"].fillna("").astype(str).tolist()[:args.limit]
+    else:
+        posts = (DEFAULT_POSTS * (args.limit // len(DEFAULT_POSTS) + 1))[:args.limit]
+
+    model, tokenizer = load_model(args.model, args.base_model, device=args.device)
+    generation_kwargs = {"num_beams": args.num_beams, "max_new_tokens": args.max_new_tokens}
+    generator = ClaimGenerator(model, tokenizer, token_budget=args.token_budget, **generation_kwargs)
+
+    # Per-post prompts are never padded, so padding side does not affect the baseline
+    start = time.perf_counter()
+    baseline = [per_post_generate(model, tokenizer, post, generation_kwargs) for post in posts]
+    baseline_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = generator.generate(posts)
+    batched_time = time.perf_counter() - start
+
+    matches = sum(a == b for a, b in zip(baseline, batched))
+    print(f"{'mode':<10}{'posts/sec':>12}{'seconds':>10}")
+    print(f"{'per-post':<10}{len(posts) / baseline_time:>12.2f}{baseline_time:>10.2f}")
+    print(f"{'batched':<10}{len(posts) / batched_time:>12.2f}{batched_time:>10.2f}")
+    print(f"Speedup: {baseline_time / batched_time:.2f}x, "
+          f"identical outputs: {matches}/{len(posts)}")
+
+
+if __name__ == "__main__":
+    main()
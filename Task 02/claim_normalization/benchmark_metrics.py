@@ -0,0 +1,136 @@
+import time
+import random
+import argparse
+import numpy as np
+import pandas as pd
+from metrics import MetricsEngine, SENTENCE_ENDINGS
+
+# Notebook metrics vs MetricsEngine over several simulated epochs (same references,
+# new predictions each time). The notebook_* functions follow the notebooks'
+# compute_metrics / metrics_func with evaluate's rouge and meteor modules inlined,
+# so this runs without downloading metric scripts from the Hub.
+
+WORDS = ("the government said vaccines cause serious side effects schools will close next week "
+         "unemployment fell to four percent president announced new restrictions from march").split()
+
+
+def evaluate_rouge(predictions, references):
+    """evaluate.load('rouge').compute(..., use_stemmer=False, tokenizer=lambda x: x.split())"""
+    from rouge_score import rouge_scorer, scoring
+
+    class Tokenizer:
+        def __init__(self, tokenizer_func):
+            self.tokenizer_func = tokenizer_func
+
+        def tokenize(self, text):
+            return self.tokenizer_func(text)
+
+    scorer = rouge_scorer.RougeScorer(rouge_types=["rouge1", "rouge2", "rougeL", "rougeLsum"], use_stemmer=False,
+                                      tokenizer=Tokenizer(lambda x: x.split()))
+    aggregator = scoring.BootstrapAggregator()
+    for ref, pred in zip(references, predictions):
+        aggregator.add_scores(scorer.score(ref, pred))
+    result = aggregator.aggregate()
+    for key in result:
+        result[key] = result[key].mid.fmeasure
+    return result
+
+
+def evaluate_meteor(predictions, references):
+    """evaluate.load('meteor').compute(predictions=..., references=...) for NLTK >= 3.6.5"""
+    from nltk import word_tokenize
+    from nltk.translate import meteor_score
+    scores = [meteor_score.single_meteor_score(word_tokenize(ref), word_tokenize(pred))
+              for ref, pred in zip(references, predictions)]
+    return {"meteor": np.mean(scores)}
+
+
+def notebook_compute_metrics(decoded_preds, decoded_labels, use_bertscore):
+    from nltk.translate import meteor_score
+    rouge_result = evaluate_rouge(decoded_preds, decoded_labels)
+    meteor_scores = []
+    for pred, ref in zip(decoded_preds, decoded_labels):
+        pred_tokens = pred.lower().split()
+        ref_tokens = ref.lower().split()
+        meteor_scores.append(meteor_score.meteor_score([ref_tokens], pred_tokens))
+    bertscore = 0.0
+    if use_bertscore:
+        from bert_score import score
+        P, R, F1 = score(decoded_preds, decoded_labels, lang="es", verbose=False)
+        bertscore = F1.mean().item()
+    prediction_lens = [len(pred.split()) for pred in decoded_preds]
+    reference_lens = [len(label.split()) for label in decoded_labels]
+    result = {key: value for key, value in rouge_result.items()}
+    result["meteor"] = np.mean(meteor_scores)
+    result["bertscore"] = bertscore
+    result["gen_len"] = np.mean(prediction_lens)
+    result["ref_len"] = np.mean(reference_lens)
+    result["compression_ratio"] = np.mean([p / r if r > 0 else 0 for p, r in zip(prediction_lens, reference_lens)])
+    return {k: round(v, 4) for k, v in result.items()}
+
+
+def notebook_metrics_func(text_preds, text_labels):
+    from nltk.tokenize import RegexpTokenizer
+    text_preds = [(p if p.endswith(SENTENCE_ENDINGS) else p + "。") for p in text_preds]
+    text_labels = [(l if l.endswith(SENTENCE_ENDINGS) else l + "。") for l in text_labels]
+    sent_tokenizer_jp = RegexpTokenizer(u'[^!！?？。]*[!！?？。]')
+    text_preds = ["\n".join(np.char.strip(sent_tokenizer_jp.tokenize(p))) for p in text_preds]
+    text_labels = ["\n".join(np.char.strip(sent_tokenizer_jp.tokenize(l))) for l in text_labels]
+    return evaluate_meteor(text_preds, text_labels)
+
+
+def synthetic_references(n, rng):
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 25))) + rng.choice(["", "."]) for _ in range(n)]
+
+
+def perturb(texts, rng):
+    """Fake predictions: each reference with ~30% of its words dropped"""
+    return [" ".join(word for word in text.split() if rng.random() > 0.3) for text in texts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Task 2 evaluation metrics")
+    parser.add_argument("--input", default=None, help="CSV with 'normalized claim' references (e.g. dev-eng.csv)")
+    parser.add_argument("--rows", type=int, default=1000, help="Synthetic references when no --input is given")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--bertscore", action="store_true", help="Include BERTScore (downloads the model)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    if args.input:
+        refs = pd.read_csv(args.input)["normalized claim"].fillna("").astype(str).str.strip().tolist()
+    else:
+        refs = synthetic_references(args.rows, rng)
+    epochs = [perturb(refs, rng) for _ in range(args.epochs)]
+
+    engine = MetricsEngine(workers=args.workers)
+    totals = {"notebook": 0.0, "engine": 0.0}
+    identical = True
+    print(f"{'epoch':<7}{'metric':<18}{'notebook s':>12}{'engine s':>10}  identical")
+    for epoch, preds in enumerate(epochs, 1):
+        for label, notebook_func, engine_func in [
+                ("compute_metrics", lambda: notebook_compute_metrics(preds, refs, args.bertscore),
+                 lambda: engine.summary_metrics(preds, refs, args.bertscore)),
+                ("metrics_func", lambda: notebook_metrics_func(preds, refs),
+                 lambda: engine.sentence_meteor(preds, refs))]:
+            np.random.seed(epoch)  # ROUGE aggregation bootstraps with the global numpy RNG
+            start = time.perf_counter()
+            expected = notebook_func()
+            notebook_time = time.perf_counter() - start
+            np.random.seed(epoch)
+            start = time.perf_counter()
+            actual = engine_func()
+            engine_time = time.perf_counter() - start
+            same = expected == actual
+            identical &= same
+            totals["notebook"] += notebook_time
+            totals["engine"] += engine_time
+            print(f"{epoch:<7}{label:<18}{notebook_time:>12.2f}{engine_time:>10.2f}  {same}")
+    engine.close()
+    print(f"Total: notebook {totals['notebook']:.2f}s, engine {totals['engine']:.2f}s "
+          f"({totals['notebook'] / totals['engine']:.2f}x), all identical: {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import time
+import argparse
+import pandas as pd
+import torch
+from generation import ClaimGenerator, load_model, build_prompt, TOKEN_BUDGET
+from benchmark_generation import DEFAULT_POSTS
+
+# Measures what the instruction-prefix KV cache saves for the causal claim
+# normalizer: prefill time per post (full prompt vs post-only with the cached
+# prefix), and end-to-end generation with and without the cache, per post and
+# batched, checking that the generated claims are identical.
+
+
+def time_prefill(model, tokenizer, prefix_cache, posts, repeats=3):
+    """Average seconds per post to prefill the full prompt vs only the part after the prefix"""
+    full_time, cached_time = 0.0, 0.0
+    prefix_length = len(prefix_cache)
+    with torch.no_grad():
+        for post in posts:
+            ids = tokenizer(build_prompt(post))["input_ids"]
+            full = torch.tensor([ids], device=model.device)
+            suffix = torch.tensor([ids[prefix_length:]], device=model.device)
+            for _ in range(repeats):
+                start = time.perf_counter()
+                model(full, use_cache=True)
+                full_time += time.perf_counter() - start
+
+                start = time.perf_counter()
+                model(suffix, attention_mask=torch.ones_like(full), past_key_values=prefix_cache.expand(1),
+                      use_cache=True)
+                cached_time += time.perf_counter() - start
+    runs = len(posts) * repeats
+    return full_time / runs, cached_time / runs
+
+
+def time_generate(generator, posts):
+    start = time.perf_counter()
+    outputs = generator.generate(posts)
+    return outputs, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prompt-prefix KV-cache reuse for the Llama normalizer")
+    parser.add_argument("--model", required=True, help="Fine-tuned causal checkpoint or LoRA adapter directory")
+    parser.add_argument("--base-model", default=None, help="Base model for a LoRA adapter")
+    parser.add_argument("--input", default=None, help="CSV with a post column (e.g. dev-eng.csv)")
+    parser.add_argument("--limit", type=int, default=32)
+    parser.add_argument("--num-beams", type=int, default=5)
+    parser.add_argument("--max-new-tokens", type=int, default=120)
+    parser.add_argument("--token-budget", type=int, default=TOKEN_BUDGET)
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    if args.input:
+        posts = pd.read_csv(args.input)["post"].fillna("").astype(str).tolist()[:args.limit]
+    else:
+        posts = (DEFAULT_POSTS * (args.limit // len(DEFAULT_POSTS) + 1))[:args.limit]
+
+    model, tokenizer = load_model(args.model, args.base_model, device=args.device)
+    generation_kwargs = {"num_beams": args.num_beams, "max_new_tokens": args.max_new_tokens}
+    cached = ClaimGenerator(model, tokenizer, token_budget=args.token_budget, **generation_kwargs)
+    if cached.prefix_cache is None:
+        raise SystemExit("Prefix caching needs a decoder-only model")
+    uncached = ClaimGenerator(model, tokenizer, token_budget=args.token_budget, use_prefix_cache=False,
+                              **generation_kwargs)
+
+    full, suffix = time_prefill(model, tokenizer, cached.prefix_cache, posts)
+    print(f"Prefix: {len(cached.prefix_cache)} tokens")
+    print(f"Prefill per post: {full * 1000:.2f} ms full prompt, {suffix * 1000:.2f} ms with cached prefix "
+          f"(saves {(full - suffix) * 1000:.2f} ms, {100 * (1 - suffix / full):.0f}%)")
+
+    print(f"{'mode':<18}{'posts/sec':>12}{'identical':>12}")
+    for label, max_batch_size in [("per-post", 1), ("batched", cached.max_batch_size)]:
+        cached.max_batch_size = uncached.max_batch_size = max_batch_size
+        reference, reference_time = time_generate(uncached, posts)
+        outputs, cached_time = time_generate(cached, posts)
+        matches = sum(a == b for a, b in zip(reference, outputs))
+        print(f"{label + ' no cache':<18}{len(posts) / reference_time:>12.2f}")
+        print(f"{label + ' cached':<18}{len(posts) / cached_time:>12.2f}{f'{matches}/{len(posts)}':>12}")
+
+
+if __name__ == "__main__":
+    main()
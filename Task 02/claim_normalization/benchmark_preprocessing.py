@@ -0,0 +1,128 @@
+import re
+import time
+import random
+import argparse
+import pandas as pd
+from preprocessing import preprocess_data, deduplicate_columns
+
+# Throughput of the notebooks' .apply()-based cleaning vs preprocessing.py, and a
+# check that both produce exactly the same strings. The notebook_* functions are
+# copied verbatim from the Task 2 notebooks.
+
+SAMPLE_SENTENCES = [
+    "BREAKING: schools will close next week!!!",
+    "Share before they delete this",
+    "Doctors confirm hot water kills the virus",
+    "Vacunas causan efectos secundarios graves, según un estudio",
+    "See https://t.co/abc123 and www.example.com/page?x=1",
+    "#fakenews #COVID19 this is real",
+    "El presidente dijo que el desempleo bajó al 4%",
+    "wow... just wow",
+    "Ministerul a anunțat noi restricții de la 1 martie",
+    "   extra   spaces\tand\nnewlines   ",
+]
+
+
+def notebook_preprocess_data_flan(df):
+    def clean_text(text):
+        if pd.isna(text):
+            return ""
+        # Remove URLs and hashtags, retain some context for language detection
+        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+        text = re.sub(r'#\w+', '', text)
+        text = text.strip()
+        return text
+
+    df['post'] = df['post'].apply(clean_text)
+    if 'normalized_claim' in df.columns:
+        df['normalized_claim'] = df['normalized_claim'].apply(clean_text)
+    return df
+
+
+def notebook_preprocess_data_llama(df):
+    def clean_text(text):
+        import re
+        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+        text = re.sub(r'#\w+', '', text)
+        text = re.sub(r'[^\w\s]', '', text)
+        return text.strip()
+
+    df['post'] = df['post'].apply(clean_text)
+    if 'normalized_claim' in df.columns:
+        df['normalized_claim'] = df['normalized_claim'].apply(clean_text)
+    return df
+
+
+def notebook_clean_text_deduplicate(text):
+    if pd.isna(text):
+        return ""
+    # Remove extra whitespace and normalize
+    text = ' '.join(text.split())
+    # Split into sentences and remove duplicates
+    sentences = text.split('. ')
+    sentences = [s.strip() for s in sentences if s.strip()]
+    unique_sentences = []
+    seen = set()
+    for s in sentences:
+        if s not in seen:
+            seen.add(s)
+            unique_sentences.append(s)
+    # Join back with proper punctuation
+    return '. '.join(unique_sentences) + ('.' if text.endswith('.') else '')
+
+
+def synthetic_posts(n, seed=0):
+    rng = random.Random(seed)
+    posts = []
+    for _ in range(n):
+        sentences = [rng.choice(SAMPLE_SENTENCES) for _ in range(rng.randint(1, 8))]
+        posts.append(rng.choice([". ", ".  ", " ", ".\n"]).join(sentences) + rng.choice(["", ".", " ."]))
+    return posts
+
+
+def run(label, func, df):
+    df = df.copy()
+    start = time.perf_counter()
+    result = func(df)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32}{len(df) / elapsed:>14,.0f}{elapsed:>10.2f}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Task 2 text cleaning")
+    parser.add_argument("--input", default=None, help="CSV with post / normalized claim columns (e.g. train-eng.csv)")
+    parser.add_argument("--rows", type=int, default=200000, help="Synthetic rows when no --input is given")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.input:
+        df = pd.read_csv(args.input)
+    else:
+        posts = synthetic_posts(args.rows)
+        df = pd.DataFrame({"post": posts, "normalized_claim": posts[::-1], "normalized claim": posts[::-1]})
+        df.loc[::97, "post"] = None
+
+    print(f"{'step':<32}{'rows/sec':>14}{'seconds':>10}")
+    checks = []
+    for variant, notebook_func, remove_punctuation in [("flan-t5", notebook_preprocess_data_flan, False),
+                                                       ("llama", notebook_preprocess_data_llama, True)]:
+        # The Llama notebook's clean_text raises on NaN, so it gets NaN-free input
+        source = df if variant == "flan-t5" else df.fillna({"post": "", "normalized_claim": ""})
+        expected = run(f"preprocess_data {variant} (notebook)", notebook_func, source)
+        actual = run(f"preprocess_data {variant} (new)",
+                     lambda d: preprocess_data(d, remove_punctuation, workers=args.workers), source)
+        checks.append((f"preprocess_data {variant}", expected, actual))
+
+    columns = [c for c in ("post", "normalized claim") if c in df.columns]
+    expected = run("clean_text_deduplicate (notebook)",
+                   lambda d: d.assign(**{c: d[c].apply(notebook_clean_text_deduplicate) for c in columns}), df)
+    actual = run("clean_text_deduplicate (new)", lambda d: deduplicate_columns(d, workers=args.workers), df)
+    checks.append(("clean_text_deduplicate", expected, actual))
+
+    for label, expected, actual in checks:
+        print(f"{label}: {'identical' if expected.equals(actual) else 'DIFFERENT'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from generation import ClaimGenerator, load_model
+
+# Early-exit cascade: a cheap Task 1 subjectivity classifier (PyTorch, ONNX or a
+# distilled student, anything predictors.load_classifier can load) scores every
+# post first, and only posts whose objectivity score reaches THRESHOLD go through
+# the expensive claim-normalization generate pass. Skipped posts get FALLBACK.
+
+TASK1_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Task 01", "subjectivity")
+THRESHOLD = 0.5
+GATE_LABEL = "OBJ"          # Objective posts are the ones likely to carry a checkable claim
+FALLBACK = "empty"          # "empty" -> "" for skipped posts, "post" -> the post text itself
+GATE_BATCH_SIZE = 64
+
+
+def load_gate(model_dir, quantized=True, num_threads=None, max_length=128):
+    """Task 1 classifier from a saved_model / onnx_export.py / distilled model directory"""
+    if TASK1_DIR not in sys.path:
+        sys.path.insert(0, TASK1_DIR)
+    from predictors import load_classifier
+    return load_classifier(model_dir, quantized=quantized, num_threads=num_threads, max_length=max_length)
+
+
+class CascadeNormalizer:
+    """Gate posts with a classifier, normalize only those at or above the threshold"""
+
+    def __init__(self, gate, generator, threshold=THRESHOLD, gate_label=GATE_LABEL, fallback=FALLBACK):
+        self.gate = gate
+        self.generator = generator
+        self.threshold = threshold
+        self.gate_column = 0 if gate_label == "OBJ" else 1
+        self.fallback = fallback
+        self.stats = {"posts": 0, "skipped": 0, "gate_seconds": 0.0, "generate_seconds": 0.0}
+
+    def gate_scores(self, posts):
+        start = time.perf_counter()
+        scores = self.gate.predict_proba(posts, batch_size=GATE_BATCH_SIZE)[:, self.gate_column]
+        self.stats["gate_seconds"] += time.perf_counter() - start
+        return scores
+
+    def fallback_output(self, post):
+        return post if self.fallback == "post" else ""
+
+    def normalize(self, posts, scores=None):
+        """Normalized claims in input order; scores can be passed to reuse an earlier gate pass"""
+        posts = [str(post) for post in posts]
+        scores = self.gate_scores(posts) if scores is None else np.asarray(scores)
+        keep = [i for i, score in enumerate(scores) if score >= self.threshold]
+
+        start = time.perf_counter()
+        generated = self.generator.generate([posts[i] for i in keep]) if keep else []
+        self.stats["generate_seconds"] += time.perf_counter() - start
+
+        results = [self.fallback_output(post) for post in posts]
+        for i, claim in zip(keep, generated):
+            results[i] = claim
+        self.stats["posts"] += len(posts)
+        self.stats["skipped"] += len(posts) - len(keep)
+        return results
+
+
+def evaluate_cascade(gate, generator, posts, references=None, thresholds=(0.3, 0.5, 0.7), fallback=FALLBACK,
+                     gate_label=GATE_LABEL):
+    """Skipped fraction, end-to-end posts/sec and METEOR for each threshold vs normalizing everything"""
+    from metrics import MetricsEngine
+    engine = MetricsEngine(workers=1) if references is not None else None
+
+    # Untimed warm-up, so the baseline is not the only run paying for the first call
+    generator.generate(posts[:1])
+    gate.predict_proba(posts[:1], batch_size=1)
+    start = time.perf_counter()
+    baseline = generator.generate(posts)
+    baseline_time = time.perf_counter() - start
+    rows = [{"threshold": None, "skipped": 0.0, "posts_per_sec": len(posts) / baseline_time, "speedup": 1.0,
+             "meteor": engine.meteor(baseline, references)["meteor"] if engine else None}]
+
+    scores = None
+    gate_time = 0.0
+    for threshold in thresholds:
+        cascade = CascadeNormalizer(gate, generator, threshold, gate_label, fallback)
+        if scores is None:
+            scores = cascade.gate_scores(posts)
+            gate_time = cascade.stats["gate_seconds"]
+        outputs = cascade.normalize(posts, scores)
+        elapsed = gate_time + cascade.stats["generate_seconds"]
+        rows.append({
+            "threshold": threshold,
+            "skipped": cascade.stats["skipped"] / len(posts),
+            "posts_per_sec": len(posts) / elapsed,
+            "speedup": baseline_time / elapsed,
+            "meteor": engine.meteor(outputs, references)["meteor"] if engine else None,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Claim normalization gated by the Task 1 classifier")
+    parser.add_argument("--gate", required=True, help="Task 1 saved_model, onnx_export.py output or distilled model")
+    parser.add_argument("--model", required=True, help="Task 2 checkpoint or LoRA adapter directory")
+    parser.add_argument("--base-model", default=None, help="Base model for a LoRA adapter")
+    parser.add_argument("--input", required=True, help="CSV with a post column (and 'normalized claim' to score)")
+    parser.add_argument("--output", default=None, help="Write predictions at --threshold to this CSV")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=None,
+                        help="Evaluate these thresholds against normalizing every post")
+    parser.add_argument("--gate-label", choices=["OBJ", "SUBJ"], default=GATE_LABEL)
+    parser.add_argument("--fallback", choices=["empty", "post"], default=FALLBACK)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.input)
+    if args.limit:
+        df = df.head(args.limit)
+    posts = df["post"].fillna("").astype(str).tolist()
+    gate = load_gate(args.gate)
+    model, tokenizer = load_model(args.model, args.base_model, device=args.device)
+    generator = ClaimGenerator(model, tokenizer)
+
+    if args.thresholds:
+        references = df["normalized claim"].fillna("").astype(str).tolist() if "normalized claim" in df else None
+        rows = evaluate_cascade(gate, generator, posts, references, args.thresholds, args.fallback, args.gate_label)
+        print(f"{'threshold':>10}{'skipped':>10}{'posts/sec':>12}{'speedup':>10}{'METEOR':>10}")
+        for row in rows:
+            threshold = "all" if row["threshold"] is None else f"{row['threshold']:.2f}"
+            meteor = "-" if row["meteor"] is None else f"{row['meteor']:.4f}"
+            print(f"{threshold:>10}{100 * row['skipped']:>9.1f}%{row['posts_per_sec']:>12.2f}"
+                  f"{row['speedup']:>9.2f}x{meteor:>10}")
+
+    if args.output:
+        cascade = CascadeNormalizer(gate, generator, args.threshold, args.gate_label, args.fallback)
+        df["normalized claim"] = cascade.normalize(posts)
+        df.to_csv(args.output, index=False)
+        print(f"Wrote {args.output}: {cascade.stats['skipped']}/{cascade.stats['posts']} posts skipped, "
+              f"gate {cascade.stats['gate_seconds']:.1f}s, generate {cascade.stats['generate_seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
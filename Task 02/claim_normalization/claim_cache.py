@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+import unicodedata
+from collections import OrderedDict
+import pandas as pd
+from generation import ClaimGenerator, load_model
+
+# Memoization of normalized claims.
+# Retweets and copy-pasted posts make up a large share of the data (see
+# clean_text_deduplicate), yet every post goes through model.generate. Here each
+# post is keyed by a hash of (model id, prompt/decoding settings, normalized post
+# text): duplicates inside a batch are generated once, and claims already produced
+# come from an in-memory LRU or, behind it, a SQLite store that survives restarts.
+
+DEFAULT_CACHE_PATH = os.path.join(".claim_cache", "claims.sqlite")
+MEMORY_CAPACITY = 100000     # Claims kept in the in-memory LRU tier
+
+
+def normalize_post(text):
+    """Text used for the key and for generation: NFKC, whitespace collapsed, stripped"""
+    return " ".join(unicodedata.normalize("NFKC", str(text)).split())
+
+
+def generator_id(generator, model_id=None):
+    """Hash of everything besides the post that decides the generated claim"""
+    # assistant_model is left out: assisted decoding produces the greedy output
+    generation_kwargs = {key: value for key, value in generator.generation_kwargs.items() if key != "assistant_model"}
+    settings = {
+        "model": model_id or getattr(generator.model, "name_or_path", None) or generator.model.config.name_or_path,
+        "prompt_template": generator.prompt_template,
+        "max_input_length": generator.max_input_length,
+        "generation": generation_kwargs,
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def claim_key(model_key, post):
+    return hashlib.sha256(f"{model_key}\0{post}".encode("utf-8")).hexdigest()
+
+
+class ClaimCache:
+    """In-memory LRU tier in front of a persistent SQLite store of claims by key"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, capacity=MEMORY_CAPACITY):
+        self.capacity = capacity
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.conn = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS claims (
+                    key TEXT PRIMARY KEY,
+                    claim TEXT NOT NULL,
+                    created REAL NOT NULL
+                )
+            """)
+            self.conn.commit()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _remember(self, key, claim):
+        self.memory[key] = claim
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.capacity:
+            self.memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """Claims found for keys, from memory first, then from disk (which are promoted to memory)"""
+        found = {}
+        with self.lock:
+            missing = []
+            for key in keys:
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[key] = self.memory[key]
+                else:
+                    missing.append(key)
+            self.stats["memory_hits"] += len(found)
+            if self.conn is not None:
+                for i in range(0, len(missing), 500):
+                    chunk = missing[i:i + 500]
+                    rows = self.conn.execute(f"SELECT key, claim FROM claims WHERE key IN ({','.join('?' * len(chunk))})",
+                                             chunk).fetchall()
+                    for key, claim in rows:
+                        found[key] = claim
+                        self._remember(key, claim)
+                    self.stats["disk_hits"] += len(rows)
+            self.stats["misses"] += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        items = list(items)
+        with self.lock:
+            for key, claim in items:
+                self._remember(key, claim)
+            if self.conn is not None:
+                now = time.time()
+                self.conn.executemany("INSERT OR REPLACE INTO claims VALUES (?, ?, ?)",
+                                      [(key, claim, now) for key, claim in items])
+                self.conn.commit()
+
+    def size(self):
+        with self.lock:
+            stored = self.conn.execute("SELECT COUNT(*) FROM claims").fetchone()[0] if self.conn else 0
+        return {"memory": len(self.memory), "disk": stored}
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+
+class CachedClaimGenerator:
+    """ClaimGenerator front end: each distinct post is generated at most once per model setting"""
+
+    def __init__(self, generator, cache=None, model_id=None):
+        self.generator = generator
+        self.cache = cache if cache is not None else ClaimCache()
+        self.model_key = generator_id(generator, model_id)
+        self.stats = {"posts": 0, "batch_duplicates": 0, "generated": 0}
+
+    def generate(self, posts):
+        """Normalized claims in the same order as posts"""
+        texts = [normalize_post(post) for post in posts]
+        keys = [claim_key(self.model_key, text) for text in texts]
+        unique = dict(zip(keys, texts))                 # Collapses duplicates within the batch
+        claims = self.cache.get_many(list(unique))
+        missing = [key for key in unique if key not in claims]
+        if missing:
+            generated = self.generator.generate([unique[key] for key in missing])
+            new = dict(zip(missing, generated))
+            self.cache.put_many(new.items())
+            claims.update(new)
+        self.stats["posts"] += len(posts)
+        self.stats["batch_duplicates"] += len(keys) - len(unique)
+        self.stats["generated"] += len(missing)
+        return [claims[key] for key in keys]
+
+    def generate_dataframe(self, df, column="post", output_column="normalized claim"):
+        df = df.copy()
+        df[output_column] = self.generate(df[column].fillna("").astype(str).tolist())
+        return df
+
+    def hit_rate(self):
+        """Share of posts that did not need a generate call"""
+        return 1 - self.stats["generated"] / self.stats["posts"] if self.stats["posts"] else 0.0
+
+    def report(self):
+        return {**self.stats, **self.cache.stats, "hit_rate": self.hit_rate()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalize claims with content-hash memoization")
+    parser.add_argument("--model", required=True, help="Fine-tuned checkpoint, LoRA adapter or export_cpu.py output")
+    parser.add_argument("--base-model", default=None, help="Base model for a LoRA adapter")
+    parser.add_argument("--input", required=True, help="CSV with a post column")
+    parser.add_argument("--output", default=None, help="Write predictions to this CSV")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="SQLite store ('' for memory only)")
+    parser.add_argument("--capacity", type=int, default=MEMORY_CAPACITY)
+    parser.add_argument("--batch-size", type=int, default=256, help="Posts passed to generate at a time")
+    parser.add_argument("--num-beams", type=int, default=None)
+    parser.add_argument("--max-new-tokens", type=int, default=None)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--device", default=None)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.input)
+    if args.limit:
+        df = df.head(args.limit)
+    posts = df["post"].fillna("").astype(str).tolist()
+    model, tokenizer = load_model(args.model, args.base_model, device=args.device)
+    generation_kwargs = {key: value for key, value in (("num_beams", args.num_beams),
+                                                       ("max_new_tokens", args.max_new_tokens)) if value}
+    cached = CachedClaimGenerator(ClaimGenerator(model, tokenizer, **generation_kwargs),
+                                  ClaimCache(args.cache or None, args.capacity), model_id=args.model)
+
+    start = time.perf_counter()
+    claims = []
+    for i in range(0, len(posts), args.batch_size):
+        claims.extend(cached.generate(posts[i:i + args.batch_size]))
+    elapsed = time.perf_counter() - start
+
+    report = cached.report()
+    print(f"{report['posts']} posts in {elapsed:.1f}s ({report['posts'] / elapsed:.2f} posts/sec)")
+    print(f"in-batch duplicates {report['batch_duplicates']}, memory hits {report['memory_hits']}, "
+          f"disk hits {report['disk_hits']}, generated {report['generated']}")
+    print(f"hit rate {100 * report['hit_rate']:.1f}%")
+    if args.output:
+        df["normalized claim"] = claims
+        df.to_csv(args.output, index=False)
+    cached.cache.close()
+
+
+if __name__ == "__main__":
+    main()
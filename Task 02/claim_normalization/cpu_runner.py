@@ -0,0 +1,128 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import torch
+from generation import ClaimGenerator, load_model
+from export_cpu import load_cpu_model, artifact_size
+from metrics import MetricsEngine
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+from memory_usage import rss_mib, peak_rss_mib
+
+# CPU runner and acceptance report for an export_cpu.py artifact.
+# Normalizes the posts of dev-eng.csv (or any CSV with post / normalized claim
+# columns) with the int8 model and compares its METEOR against the GPU path: the
+# original checkpoint/adapter in float16 on CUDA as in the Llama notebook, or
+# predictions it already produced (--reference-predictions). Also reports
+# per-post latency, batched throughput, artifact size and peak memory.
+
+METEOR_TOLERANCE = 0.01     # Max absolute METEOR drop of the int8 CPU model vs the GPU path
+LATENCY_POSTS = 20          # Posts timed one at a time for the latency percentiles
+
+
+def latency_report(generator, posts):
+    """Per-post latency percentiles (batch size 1, as in generate_normalized_claim)"""
+    latencies = []
+    for post in posts:
+        start = time.perf_counter()
+        generator.generate([post])
+        latencies.append(time.perf_counter() - start)
+    return {"p50_ms": 1000 * np.percentile(latencies, 50), "p95_ms": 1000 * np.percentile(latencies, 95)}
+
+
+def run_cpu(export_dir, posts, num_threads=None, **generation_kwargs):
+    """Predictions, timing and memory of the CPU artifact"""
+    rss_before = rss_mib()
+    start = time.perf_counter()
+    model, tokenizer = load_cpu_model(export_dir, num_threads)
+    load_seconds = time.perf_counter() - start
+    rss_loaded = rss_mib()
+    generator = ClaimGenerator(model, tokenizer, **generation_kwargs)
+
+    start = time.perf_counter()
+    predictions = generator.generate(posts)
+    elapsed = time.perf_counter() - start
+    report = {
+        "artifact_mib": artifact_size(export_dir) / 2 ** 20,
+        "load_seconds": load_seconds,
+        "model_rss_mib": rss_loaded - rss_before if rss_before is not None else None,
+        "posts_per_sec": len(posts) / elapsed,
+        **latency_report(generator, posts[:LATENCY_POSTS]),
+        "peak_rss_mib": peak_rss_mib(),
+    }
+    del generator, model
+    return predictions, report
+
+
+def run_reference(model_path, base_model, posts, **generation_kwargs):
+    """The GPU path: float16 on CUDA like the notebook, float32 on CPU if no GPU is available"""
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model, tokenizer = load_model(model_path, base_model, device=device,
+                                  dtype=torch.float16 if device == "cuda" else torch.float32)
+    predictions = ClaimGenerator(model, tokenizer, **generation_kwargs).generate(posts)
+    return predictions, device
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an export_cpu.py artifact and compare it to the GPU path")
+    parser.add_argument("--export", required=True, help="export_cpu.py output directory")
+    parser.add_argument("--input", required=True, help="dev-eng.csv or another CSV with post / normalized claim")
+    parser.add_argument("--reference", default=None, help="Original checkpoint or LoRA adapter (the GPU path)")
+    parser.add_argument("--base-model", default=None, help="Base model for a LoRA --reference")
+    parser.add_argument("--reference-predictions", default=None,
+                        help="CSV with the GPU path's predictions in a 'normalized claim' column, same row order")
+    parser.add_argument("--output", default=None, help="Write the CPU predictions to this CSV")
+    parser.add_argument("--tolerance", type=float, default=METEOR_TOLERANCE)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--num-beams", type=int, default=None)
+    parser.add_argument("--max-new-tokens", type=int, default=None)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.input)
+    if args.limit:
+        df = df.head(args.limit)
+    posts = df["post"].fillna("").astype(str).tolist()
+    references = df["normalized claim"].fillna("").astype(str).tolist()
+    generation_kwargs = {key: value for key, value in (("num_beams", args.num_beams),
+                                                       ("max_new_tokens", args.max_new_tokens)) if value}
+
+    # The CPU model runs first so its memory figures are not inflated by the reference model
+    predictions, report = run_cpu(args.export, posts, args.threads, **generation_kwargs)
+    if args.output:
+        df.assign(**{"normalized claim": predictions}).to_csv(args.output, index=False)
+
+    engine = MetricsEngine(workers=1)
+    cpu_meteor = engine.meteor(predictions, references)["meteor"]
+    print(f"{'artifact size':<22}{report['artifact_mib']:.1f} MiB")
+    print(f"{'load time':<22}{report['load_seconds']:.1f}s")
+    if report["model_rss_mib"] is not None:
+        print(f"{'model memory (RSS)':<22}{report['model_rss_mib']:.0f} MiB")
+    print(f"{'peak memory (RSS)':<22}{report['peak_rss_mib']:.0f} MiB")
+    print(f"{'latency p50 / p95':<22}{report['p50_ms']:.0f} / {report['p95_ms']:.0f} ms per post")
+    print(f"{'batched throughput':<22}{report['posts_per_sec']:.2f} posts/sec")
+    print(f"{'METEOR (int8 CPU)':<22}{cpu_meteor:.4f}")
+
+    reference_predictions, source = None, None
+    if args.reference_predictions:
+        reference_predictions = pd.read_csv(args.reference_predictions)["normalized claim"].fillna("").astype(str)
+        reference_predictions, source = reference_predictions.tolist()[:len(posts)], args.reference_predictions
+    elif args.reference:
+        reference_predictions, device = run_reference(args.reference, args.base_model, posts, **generation_kwargs)
+        source = f"{args.reference} on {device}"
+    if reference_predictions is not None:
+        reference_meteor = engine.meteor(reference_predictions, references)["meteor"]
+        identical = sum(a == b for a, b in zip(predictions, reference_predictions))
+        drop = reference_meteor - cpu_meteor
+        print(f"{'METEOR (reference)':<22}{reference_meteor:.4f}  ({source})")
+        print(f"{'identical outputs':<22}{identical}/{len(posts)}")
+        print(f"{'METEOR drop':<22}{drop:+.4f}  -> {'PASS' if drop <= args.tolerance else 'FAIL'} "
+              f"(tolerance {args.tolerance})")
+    engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import os
+import json
+import random
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+import torch
+from datasets import Dataset, load_from_disk
+from transformers import AutoConfig, AutoTokenizer, DataCollatorForSeq2Seq
+from transformers.trainer_pt_utils import get_length_grouped_indices
+
+# Shared Task 2 training data pipeline for the FLAN-T5 / BART (seq2seq) and Llama
+# (causal) notebooks. Instead of padding every example to 512/128 tokens one row
+# at a time, posts are tokenized in large batches without padding, stored on disk
+# (keyed by tokenizer, lengths and data) and padded per batch by the collator. A
+# "length" column lets the Trainer group similar lengths together
+# (group_by_length=True), so batches carry little padding.
+
+DEFAULT_CACHE_DIR = ".task2_token_cache"
+MAX_SOURCE_LENGTH = 512
+MAX_TARGET_LENGTH = 128
+MAX_LENGTH = 512             # Llama prompt + claim
+TOKENIZE_BATCH_SIZE = 1000
+PAD_TO_MULTIPLE_OF = 8
+PROMPT_TEMPLATE = ("### Instruction: Summarize the following text by identifying the central assertion "
+                   "in a concise, factual statement:\n\n{post}\n\n### Response:\n{claim}")
+
+
+def create_prompt(post, claim):
+    """The Llama notebook's training text: instruction, post, response"""
+    return PROMPT_TEMPLATE.format(post=post, claim=claim)
+
+
+def cache_key(tokenizer, kind, settings, columns):
+    digest = hashlib.sha256()
+    digest.update(json.dumps({"tokenizer": tokenizer.name_or_path, "vocab_size": len(tokenizer),
+                              "kind": kind, **settings}, sort_keys=True).encode("utf-8"))
+    for column in columns:
+        for text in column:
+            digest.update(str(text).encode("utf-8"))
+            digest.update(b"\0")
+    return digest.hexdigest()[:24]
+
+
+def _cached(path, build):
+    """Load a tokenized dataset from path, or build and save it there first"""
+    if path and os.path.exists(path):
+        return load_from_disk(path)
+    dataset = build()
+    if path:
+        tmp_path = f"{path}.tmp"
+        dataset.save_to_disk(tmp_path)
+        os.replace(tmp_path, path)
+        dataset = load_from_disk(path)
+    return dataset
+
+
+def tokenize_seq2seq(df, tokenizer, max_source_length=MAX_SOURCE_LENGTH, max_target_length=MAX_TARGET_LENGTH,
+                     source_column="post", target_column="normalized claim", cache_dir=DEFAULT_CACHE_DIR,
+                     batch_size=TOKENIZE_BATCH_SIZE):
+    """input_ids / attention_mask / labels without padding, plus a length column"""
+    sources = df[source_column].fillna("").astype(str).tolist()
+    targets = df[target_column].fillna("").astype(str).tolist() if target_column in df.columns else None
+    settings = {"max_source_length": max_source_length, "max_target_length": max_target_length}
+    key = cache_key(tokenizer, "seq2seq", settings, [sources] + ([targets] if targets else []))
+    path = os.path.join(cache_dir, key) if cache_dir else None
+
+    def build():
+        columns = {"input_ids": [], "attention_mask": [], "length": []}
+        if targets is not None:
+            columns["labels"] = []
+        for start in range(0, len(sources), batch_size):
+            encoded = tokenizer(sources[start:start + batch_size], truncation=True, max_length=max_source_length)
+            columns["input_ids"].extend(encoded["input_ids"])
+            columns["attention_mask"].extend(encoded["attention_mask"])
+            columns["length"].extend(len(ids) for ids in encoded["input_ids"])
+            if targets is not None:
+                labels = tokenizer(text_target=targets[start:start + batch_size], truncation=True,
+                                   max_length=max_target_length)
+                columns["labels"].extend(labels["input_ids"])
+        return Dataset.from_dict(columns)
+
+    return _cached(path, build)
+
+
+def tokenize_causal(df, tokenizer, max_length=MAX_LENGTH, post_column="post", claim_column="normalized claim",
+                    cache_dir=DEFAULT_CACHE_DIR, batch_size=TOKENIZE_BATCH_SIZE):
+    """Prompt + claim token ids without padding; labels are added by CausalCollator"""
+    texts = [create_prompt(post, claim) for post, claim in zip(df[post_column], df[claim_column])]
+    key = cache_key(tokenizer, "causal", {"max_length": max_length}, [texts])
+    path = os.path.join(cache_dir, key) if cache_dir else None
+
+    def build():
+        columns = {"input_ids": [], "attention_mask": [], "length": []}
+        for start in range(0, len(texts), batch_size):
+            encoded = tokenizer(texts[start:start + batch_size], truncation=True, max_length=max_length)
+            columns["input_ids"].extend(encoded["input_ids"])
+            columns["attention_mask"].extend(encoded["attention_mask"])
+            columns["length"].extend(len(ids) for ids in encoded["input_ids"])
+        return Dataset.from_dict(columns)
+
+    return _cached(path, build)
+
+
+class CausalCollator:
+    """Right-pads a causal LM batch to its longest example; padded positions get label -100"""
+
+    def __init__(self, tokenizer, pad_to_multiple_of=PAD_TO_MULTIPLE_OF, label_pad_token_id=-100):
+        self.pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+        self.pad_to_multiple_of = pad_to_multiple_of
+        self.label_pad_token_id = label_pad_token_id
+
+    def __call__(self, features):
+        width = padded_width([len(feature["input_ids"]) for feature in features], self.pad_to_multiple_of)
+        input_ids = torch.full((len(features), width), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(features), width), dtype=torch.long)
+        labels = torch.full((len(features), width), self.label_pad_token_id, dtype=torch.long)
+        for i, feature in enumerate(features):
+            ids = torch.as_tensor(feature["input_ids"], dtype=torch.long)
+            input_ids[i, :len(ids)] = ids
+            attention_mask[i, :len(ids)] = 1
+            labels[i, :len(ids)] = ids if "labels" not in feature else torch.as_tensor(feature["labels"])
+        return {"input_ids": input_ids, "attention_mask": attention_mask, "labels": labels}
+
+
+def seq2seq_collator(tokenizer, model=None, pad_to_multiple_of=PAD_TO_MULTIPLE_OF):
+    return DataCollatorForSeq2Seq(tokenizer, model=model, pad_to_multiple_of=pad_to_multiple_of,
+                                  label_pad_token_id=-100, return_tensors="pt")
+
+
+def padded_width(lengths, pad_to_multiple_of=PAD_TO_MULTIPLE_OF):
+    width = max(lengths)
+    if pad_to_multiple_of:
+        width = -(-width // pad_to_multiple_of) * pad_to_multiple_of
+    return width
+
+
+def padding_fraction(lengths, batch_size, order=None, fixed_length=None, pad_to_multiple_of=PAD_TO_MULTIPLE_OF):
+    """Share of tokens in the batches that are padding, for a given example order"""
+    lengths = np.asarray(lengths)
+    order = np.arange(len(lengths)) if order is None else np.asarray(order)
+    real, total = 0, 0
+    for start in range(0, len(order), batch_size):
+        batch = lengths[order[start:start + batch_size]]
+        width = fixed_length if fixed_length else padded_width(batch, pad_to_multiple_of)
+        real += int(batch.sum())
+        total += width * len(batch)
+    return 1 - real / total
+
+
+def padding_report(lengths, batch_size, fixed_length, group_lengths=None, seed=0):
+    """Padding % for the notebooks' max_length padding vs dynamic padding (shuffled and length-grouped).
+    group_lengths are the lengths the sampler groups by (the source lengths when reporting labels)."""
+    rng = random.Random(seed)
+    shuffled = list(range(len(lengths)))
+    rng.shuffle(shuffled)
+    generator = torch.Generator().manual_seed(seed)
+    grouped = get_length_grouped_indices(list(lengths if group_lengths is None else group_lengths), batch_size,
+                                         generator=generator)
+    return {
+        "max_length": padding_fraction(lengths, batch_size, shuffled, fixed_length=fixed_length),
+        "dynamic": padding_fraction(lengths, batch_size, shuffled),
+        "dynamic_grouped": padding_fraction(lengths, batch_size, grouped),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokenize and cache Task 2 training data; report padding")
+    parser.add_argument("--model", required=True, help="Tokenizer / model name or path")
+    parser.add_argument("--data", required=True, help="CSV with post and normalized claim columns")
+    parser.add_argument("--batch-size", type=int, default=8, help="Training batch size for the padding report")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    df = pd.read_csv(args.data)
+    if AutoConfig.from_pretrained(args.model).is_encoder_decoder:
+        dataset = tokenize_seq2seq(df, tokenizer, cache_dir=args.cache_dir)
+        reports = {"source": padding_report(dataset["length"], args.batch_size, MAX_SOURCE_LENGTH),
+                   "labels": padding_report([len(ids) for ids in dataset["labels"]], args.batch_size,
+                                            MAX_TARGET_LENGTH, group_lengths=dataset["length"])}
+    else:
+        dataset = tokenize_causal(df, tokenizer, cache_dir=args.cache_dir)
+        reports = {"text": padding_report(dataset["length"], args.batch_size, MAX_LENGTH)}
+
+    print(f"{len(dataset)} examples cached in {args.cache_dir}")
+    print(f"{'field':<8}{'max_length pad %':>18}{'dynamic pad %':>16}{'grouped pad %':>16}")
+    for field, report in reports.items():
+        print(f"{field:<8}{100 * report['max_length']:>18.1f}{100 * report['dynamic']:>16.1f}"
+              f"{100 * report['dynamic_grouped']:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import copy
+import time
+import argparse
+import pandas as pd
+import torch
+from generation import ClaimGenerator, load_model, PROMPT_TEMPLATE
+from metrics import MetricsEngine
+
+# Selectable decoding modes for Task 2 generation.
+#   beam      the notebooks' settings: num_beams=15, no_repeat_ngram_size=2,
+#             length_penalty=0.6 (BART / FLAN-T5) or num_beams=5 (Llama)
+#   low_beam  2 beams, same constraints
+#   greedy    1 beam, same constraints
+#   assisted  greedy output produced with assisted decoding: a small draft model
+#             proposes several tokens and the fine-tuned model checks them all in
+#             one forward pass. Accepted tokens are the ones greedy decoding would
+#             have picked, so output matches greedy; speed depends on how often the
+#             draft agrees. The draft is any checkpoint sharing the tokenizer (e.g. a
+#             distilled FLAN-T5-small) or a truncated-layer copy of the model itself
+#             that shares its weights (no extra memory).
+# Assisted decoding in transformers runs one sequence at a time, so that mode
+# generates per post; the other modes use ClaimGenerator's batching. Inputs follow
+# the notebooks: encoder-decoder models (BART / FLAN-T5) get the raw post, as they were
+# trained and evaluated on it, and causal models get ClaimGenerator's instruction
+# prompt (the one cascade.py and generate_normalized_claim use). Passing a template
+# overrides either ('' for raw posts).
+
+MODES = ["beam", "low_beam", "greedy", "assisted"]
+SEQ2SEQ_PRESETS = {
+    "beam": {"num_beams": 15, "no_repeat_ngram_size": 2, "length_penalty": 0.6, "max_new_tokens": 128},
+    "low_beam": {"num_beams": 2, "no_repeat_ngram_size": 2, "length_penalty": 0.6, "max_new_tokens": 128},
+    "greedy": {"num_beams": 1, "no_repeat_ngram_size": 2, "max_new_tokens": 128},
+}
+CAUSAL_PRESETS = {
+    "beam": {"num_beams": 5, "max_new_tokens": 120},
+    "low_beam": {"num_beams": 2, "max_new_tokens": 120},
+    "greedy": {"num_beams": 1, "max_new_tokens": 120},
+}
+DRAFT_LAYERS = 4
+DRAFT_TOKENS = 8            # Tokens proposed per step (adjusted by transformers' heuristic schedule)
+
+
+def preset(model, mode):
+    """Generation kwargs of a mode for this model type; assisted uses the greedy settings"""
+    presets = SEQ2SEQ_PRESETS if model.config.is_encoder_decoder else CAUSAL_PRESETS
+    return dict(presets["greedy" if mode == "assisted" else mode])
+
+
+def _decoder_layer_path(model):
+    for path in ("model.layers", "model.decoder.layers", "decoder.block", "transformer.h"):
+        try:
+            model.get_submodule(path)
+            return path
+        except AttributeError:
+            continue
+    raise ValueError(f"Don't know where the decoder layers of {type(model).__name__} are")
+
+
+def _with_layers(config, layers):
+    config = copy.deepcopy(config)
+    if hasattr(config, "decoder_layers"):
+        config.decoder_layers = layers          # BART-style
+    elif hasattr(config, "num_decoder_layers"):
+        # T5-style: generate() sizes the decoder cache from num_layers, which the draft's
+        # encoder no longer reads (its stack keeps its own config)
+        config.num_decoder_layers = config.num_hidden_layers = layers
+    else:
+        config.num_hidden_layers = layers
+    return config
+
+
+def truncated_draft(model, layers=DRAFT_LAYERS):
+    """Copy of model that runs only its first `layers` decoder layers, sharing all weights"""
+    path = _decoder_layer_path(model).split(".")
+    draft = copy.copy(model)
+    draft._modules = dict(model._modules)
+    draft.config = _with_layers(model.config, layers)
+    draft.generation_config = copy.deepcopy(model.generation_config)
+    parent = draft
+    for name in path[:-1]:
+        # Shallow-copy the modules on the path so the target model keeps all its layers
+        child = copy.copy(parent._modules[name])
+        child._modules = dict(child._modules)
+        if hasattr(child, "config"):
+            child.config = _with_layers(child.config, layers)
+        parent._modules[name] = child
+        parent = child
+    parent._modules[path[-1]] = torch.nn.ModuleList(list(model.get_submodule(".".join(path)))[:layers])
+    return draft
+
+
+def load_draft(model, draft_path=None, layers=DRAFT_LAYERS):
+    """A separate draft checkpoint on the model's device, or a truncated copy of the model"""
+    if draft_path:
+        draft, _ = load_model(draft_path, device=model.device, dtype=model.dtype)
+        return draft
+    return truncated_draft(model, layers)
+
+
+def default_template(model):
+    """Raw posts (None) for encoder-decoder models, the instruction prompt for causal ones"""
+    return None if model.config.is_encoder_decoder else PROMPT_TEMPLATE
+
+
+def make_generator(model, tokenizer, mode, draft=None, draft_tokens=DRAFT_TOKENS, prompt_template=None,
+                   **overrides):
+    """ClaimGenerator configured for one decoding mode; prompt_template=None picks the
+    model type's default and '' means raw posts"""
+    if mode not in MODES:
+        raise ValueError(f"Unknown decoding mode {mode!r}, expected one of {MODES}")
+    generation_kwargs = {**preset(model, mode), **overrides}
+    template = default_template(model) if prompt_template is None else prompt_template or None
+    if mode != "assisted":
+        return ClaimGenerator(model, tokenizer, prompt_template=template, **generation_kwargs)
+    if draft is None:
+        raise ValueError("Assisted decoding needs a draft model (load_draft)")
+    draft.generation_config.num_assistant_tokens = draft_tokens
+    draft.generation_config.num_assistant_tokens_schedule = "heuristic"
+    return ClaimGenerator(model, tokenizer, prompt_template=template, max_batch_size=1, use_prefix_cache=False,
+                          assistant_model=draft, **generation_kwargs)
+
+
+def benchmark_modes(model, tokenizer, datasets, modes=MODES, draft=None, draft_tokens=DRAFT_TOKENS,
+                    prompt_template=None):
+    """posts/sec and METEOR of each mode on each dev set ({name: (posts, references)})"""
+    engine = MetricsEngine(workers=1)
+    rows = []
+    for name, (posts, references) in datasets.items():
+        outputs = {}
+        for mode in modes:
+            generator = make_generator(model, tokenizer, mode, draft, draft_tokens, prompt_template)
+            generator.generate(posts[:1])  # Warm-up
+            start = time.perf_counter()
+            outputs[mode] = generator.generate(posts)
+            elapsed = time.perf_counter() - start
+            rows.append({
+                "dev_set": name,
+                "mode": mode,
+                "posts_per_sec": len(posts) / elapsed,
+                "meteor": engine.meteor(outputs[mode], references)["meteor"],
+            })
+        if "greedy" in outputs and "assisted" in outputs:
+            same = sum(a == b for a, b in zip(outputs["greedy"], outputs["assisted"]))
+            print(f"{name}: assisted output identical to greedy for {same}/{len(posts)} posts")
+    engine.close()
+    table = pd.DataFrame(rows)
+    beam = table[table["mode"] == "beam"].set_index("dev_set")["posts_per_sec"]
+    if not beam.empty:
+        table["speedup_vs_beam"] = table["posts_per_sec"] / table["dev_set"].map(beam)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="posts/sec vs METEOR for each Task 2 decoding mode")
+    parser.add_argument("--model", required=True, help="Fine-tuned checkpoint or LoRA adapter directory")
+    parser.add_argument("--base-model", default=None, help="Base model for a LoRA adapter")
+    parser.add_argument("--input", nargs="+", required=True, help="Dev CSVs (post, normalized claim)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--draft", default=None, help="Draft checkpoint with the same tokenizer")
+    parser.add_argument("--draft-layers", type=int, default=DRAFT_LAYERS,
+                        help="Without --draft: decoder layers kept in the self-draft")
+    parser.add_argument("--draft-tokens", type=int, default=DRAFT_TOKENS)
+    parser.add_argument("--template", default=None,
+                        help="Prompt with a {post} placeholder ('' for raw posts); default: raw posts for "
+                             "BART / FLAN-T5, ClaimGenerator's prompt for causal models")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--device", default=None)
+    args = parser.parse_args()
+
+    model, tokenizer = load_model(args.model, args.base_model, device=args.device)
+    draft = load_draft(model, args.draft, args.draft_layers) if "assisted" in args.modes else None
+    datasets = {}
+    for path in args.input:
+        df = pd.read_csv(path)
+        if args.limit:
+            df = df.head(args.limit)
+        datasets[path] = (df["post"].fillna("").astype(str).tolist(),
+                          df["normalized claim"].fillna("").astype(str).tolist())
+
+    table = benchmark_modes(model, tokenizer, datasets, args.modes, draft, args.draft_tokens, args.template)
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import os
+import json
+import argparse
+import warnings
+import torch
+from transformers import AutoConfig, AutoTokenizer, AutoModelForCausalLM, AutoModelForSeq2SeqLM, GenerationConfig
+from generation import load_model, MAX_NEW_TOKENS, NUM_BEAMS
+
+# CPU deployment artifact for the Task 2 normalizer.
+# The Llama notebook can only run the fine-tuned model on CUDA (4-bit
+# bitsandbytes base + PEFT adapter, then model.half()). This export merges the
+# LoRA weights into a float32 copy of the base model, applies dynamic int8
+# quantization to every nn.Linear, and writes the quantized weights together with
+# the config, tokenizer and generation config, so the result loads on any CPU
+# without peft, bitsandbytes or the base model download.
+# Quantization uses eager-mode torch.ao.quantization.quantize_dynamic. PyTorch has
+# deprecated that API in favour of torchao (it warns on current releases but still
+# works); an export has to be loaded with a torch version that still provides it,
+# otherwise re-export with --no-int8. The int8 weights are a plain state dict,
+# loaded with torch.load(weights_only=True), so no pickled code runs on load.
+
+EXPORT_INFO = "export.json"
+QUANTIZED_WEIGHTS = "model.int8.pt"
+
+
+def quantize(model):
+    """Dynamic int8 quantization of the Linear layers (weights int8, activations quantized per batch)"""
+    quantize_dynamic = getattr(getattr(torch.ao, "quantization", None), "quantize_dynamic", None)
+    if quantize_dynamic is None:
+        raise RuntimeError(f"torch {torch.__version__} no longer provides torch.ao.quantization.quantize_dynamic; "
+                           "use an older torch for int8 artifacts or export with --no-int8")
+    with warnings.catch_warnings():
+        # Known deprecation of the eager-mode API (see above), repeated for every call
+        warnings.simplefilter("ignore", DeprecationWarning)
+        warnings.filterwarnings("ignore", message=r"torch\.quantize_per_tensor", category=UserWarning)
+        return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def export_cpu(model_path, output_dir, base_model=None, int8=True):
+    """Merge (if needed), quantize and save a standalone CPU artifact to output_dir"""
+    os.makedirs(output_dir, exist_ok=True)
+    model, tokenizer = load_model(model_path, base_model, device="cpu", dtype=torch.float32)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token  # As in the Llama notebook
+
+    # Generation settings of the notebooks' generate_normalized_claim
+    generation_config = model.generation_config
+    generation_config.max_new_tokens = MAX_NEW_TOKENS
+    generation_config.num_beams = NUM_BEAMS
+    generation_config.pad_token_id = tokenizer.pad_token_id
+    generation_config.eos_token_id = tokenizer.eos_token_id
+
+    if int8:
+        model.config.save_pretrained(output_dir)
+        generation_config.save_pretrained(output_dir)
+        torch.save(quantize(model).state_dict(), os.path.join(output_dir, QUANTIZED_WEIGHTS))
+    else:
+        model.save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
+
+    with open(os.path.join(output_dir, EXPORT_INFO), "w", encoding="utf-8") as f:
+        json.dump({
+            "source": model_path,
+            "base_model": base_model,
+            "quantization": "dynamic_int8" if int8 else None,
+            "torch_version": torch.__version__,
+        }, f, indent=2)
+    return output_dir
+
+
+def export_info(export_dir):
+    """Metadata export_cpu wrote to export.json (source model, quantization)"""
+    with open(os.path.join(export_dir, EXPORT_INFO), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_cpu_model(export_dir, num_threads=None):
+    """Model and tokenizer from an export_cpu.py directory, ready for ClaimGenerator"""
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    info = export_info(export_dir)
+    config = AutoConfig.from_pretrained(export_dir)
+    model_class = AutoModelForSeq2SeqLM if config.is_encoder_decoder else AutoModelForCausalLM
+    if info["quantization"] == "dynamic_int8":
+        # Rebuild the float module tree, swap in quantized Linears, then load the int8 weights
+        model = quantize(model_class.from_config(config).eval())
+        state_dict = torch.load(os.path.join(export_dir, QUANTIZED_WEIGHTS), map_location="cpu", weights_only=True)
+        model.load_state_dict(state_dict)
+        model.generation_config = GenerationConfig.from_pretrained(export_dir)
+    else:
+        model = model_class.from_pretrained(export_dir)
+    model.eval()
+    tokenizer = AutoTokenizer.from_pretrained(export_dir)
+    return model, tokenizer
+
+
+def artifact_size(export_dir):
+    """Total size in bytes of the files in an export directory"""
+    return sum(os.path.getsize(os.path.join(export_dir, name)) for name in os.listdir(export_dir)
+               if os.path.isfile(os.path.join(export_dir, name)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a merged, int8-quantized Task 2 model for CPU")
+    parser.add_argument("--model", required=True, help="Fine-tuned checkpoint or LoRA adapter directory")
+    parser.add_argument("--base-model", default=None, help="Base model for a LoRA adapter")
+    parser.add_argument("--output", default="cpu_model")
+    parser.add_argument("--no-int8", action="store_true", help="Save the merged float32 model without quantizing")
+    args = parser.parse_args()
+
+    export_cpu(args.model, args.output, args.base_model, int8=not args.no_int8)
+    print(f"Exported {args.output} ({artifact_size(args.output) / 2 ** 20:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
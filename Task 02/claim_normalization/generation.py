@@ -0,0 +1,141 @@
+import os
+import torch
+from transformers import AutoConfig, AutoTokenizer, AutoModelForCausalLM, AutoModelForSeq2SeqLM
+from prefix_cache import PrefixCache
+
+# Batched claim-normalization generation for the Llama (causal, optionally LoRA)
+# and FLAN-T5 / BART (seq2seq) checkpoints from the Task 2 notebooks.
+# Posts are sorted by prompt length and grouped into batches that stay within a
+# token budget, so each batch is padded only to its own longest prompt; causal
+# models are left-padded so generation continues straight from the prompt, and
+# reuse the cached key/values of the fixed instruction prefix (see prefix_cache.py).
+# Results are returned in the original post order.
+
+PROMPT_TEMPLATE = ("### Instruction: Summarize the following text by identifying the central assertion "
+                   "in a concise, factual statement:\n\n{post}\n\n### Response:\n")
+RESPONSE_MARKER = "### Response:"
+MAX_INPUT_LENGTH = 512
+MAX_NEW_TOKENS = 120
+NUM_BEAMS = 5
+TOKEN_BUDGET = 8192        # Max (padded prompt tokens x batch size x beams) per generate call
+MAX_BATCH_SIZE = 32
+
+
+def build_prompt(post, template=PROMPT_TEMPLATE):
+    return template.format(post=post) if template else str(post)
+
+
+def extract_response(text):
+    """Same post-processing as generate_normalized_claim in the notebooks"""
+    return text.split(RESPONSE_MARKER)[-1].strip()
+
+
+def load_model(model_path, base_model=None, device=None, dtype=None):
+    """Load a seq2seq or causal checkpoint; a LoRA adapter directory is merged onto base_model
+    and an export_cpu.py directory is loaded as exported (int8 artifacts are CPU-only)"""
+    if os.path.exists(os.path.join(model_path, "export.json")):
+        from export_cpu import load_cpu_model, export_info
+        if export_info(model_path)["quantization"]:
+            if (device is not None and torch.device(device).type != "cpu") or dtype not in (None, torch.float32):
+                raise ValueError(f"{model_path} is an int8 CPU export and only runs on cpu in float32 "
+                                 f"(got device={device}, dtype={dtype}); re-export it with --no-int8")
+            return load_cpu_model(model_path)
+        model, tokenizer = load_cpu_model(model_path)
+        model.to(device or "cpu")
+        if dtype is not None:
+            model.to(dtype)
+        return model, tokenizer
+    device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+    kwargs = {"dtype": dtype} if dtype is not None else {}
+    if os.path.exists(os.path.join(model_path, "adapter_config.json")):
+        from peft import PeftConfig, PeftModel
+        base_model = base_model or PeftConfig.from_pretrained(model_path).base_model_name_or_path
+        model = AutoModelForCausalLM.from_pretrained(base_model, **kwargs)
+        model = PeftModel.from_pretrained(model, model_path).merge_and_unload()
+        tokenizer = AutoTokenizer.from_pretrained(model_path if os.path.exists(
+            os.path.join(model_path, "tokenizer_config.json")) else base_model)
+    else:
+        config = AutoConfig.from_pretrained(model_path)
+        model_class = AutoModelForSeq2SeqLM if config.is_encoder_decoder else AutoModelForCausalLM
+        model = model_class.from_pretrained(model_path, **kwargs)
+        tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model.to(device)
+    model.eval()
+    return model, tokenizer
+
+
+class ClaimGenerator:
+    """Length-sorted, token-budgeted batched generation with results in input order"""
+
+    def __init__(self, model, tokenizer, prompt_template=PROMPT_TEMPLATE, max_input_length=MAX_INPUT_LENGTH,
+                 token_budget=TOKEN_BUDGET, max_batch_size=MAX_BATCH_SIZE, use_prefix_cache=True,
+                 **generation_kwargs):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.prompt_template = prompt_template
+        self.max_input_length = max_input_length
+        self.token_budget = token_budget
+        self.max_batch_size = max_batch_size
+        self.is_causal = not model.config.is_encoder_decoder
+        self.generation_kwargs = {"max_new_tokens": MAX_NEW_TOKENS, "num_beams": NUM_BEAMS, **generation_kwargs}
+
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token  # As in the Llama notebook
+        if self.is_causal:
+            self.tokenizer.padding_side = "left"
+
+        self.prefix_cache = None
+        if use_prefix_cache and self.is_causal and prompt_template and "{post}" in prompt_template:
+            self.prefix_cache = PrefixCache(model, tokenizer, prompt_template.split("{post}")[0])
+
+    def make_batches(self, lengths):
+        """Group indices (longest first) so padded tokens x beams stays within the budget"""
+        beams = self.generation_kwargs.get("num_beams", 1)
+        order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+        batches, current = [], []
+        for i in order:
+            # Sorted longest first, so the first row of a batch sets its padded length
+            width = lengths[current[0]] if current else lengths[i]
+            if current and (len(current) + 1) * width * beams > self.token_budget \
+                    or len(current) >= self.max_batch_size:
+                batches.append(current)
+                current = []
+            current.append(i)
+        if current:
+            batches.append(current)
+        return batches
+
+    def generate(self, posts):
+        """Normalized claim for every post, in the same order as `posts`"""
+        prompts = [build_prompt(post, self.prompt_template) for post in posts]
+        encodings = self.tokenizer(prompts, truncation=True, max_length=self.max_input_length)
+        lengths = [len(ids) for ids in encodings["input_ids"]]
+        device = self.model.device
+
+        results = [None] * len(prompts)
+        with torch.no_grad():
+            for batch in self.make_batches(lengths):
+                rows = [encodings["input_ids"][i] for i in batch]
+                if self.prefix_cache is not None and all(self.prefix_cache.matches(ids) for ids in rows):
+                    outputs = self.prefix_cache.generate(rows, self.tokenizer.pad_token_id,
+                                                         eos_token_id=self.tokenizer.eos_token_id,
+                                                         **self.generation_kwargs)
+                else:
+                    features = [{key: encodings[key][i] for key in ("input_ids", "attention_mask")} for i in batch]
+                    inputs = self.tokenizer.pad(features, return_tensors="pt").to(device)
+                    outputs = self.model.generate(
+                        input_ids=inputs["input_ids"],
+                        attention_mask=inputs["attention_mask"],
+                        eos_token_id=self.tokenizer.eos_token_id,
+                        pad_token_id=self.tokenizer.pad_token_id,
+                        **self.generation_kwargs,
+                    )
+                texts = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+                for i, text in zip(batch, texts):
+                    results[i] = extract_response(text)
+        return results
+
+    def generate_dataframe(self, df, column="post", output_column="normalized claim"):
+        df = df.copy()
+        df[output_column] = self.generate(df[column].fillna("").astype(str).tolist())
+        return df
@@ -0,0 +1,308 @@
+import os
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+# Language identification + translation stage for Task 2 posts.
+# Replaces the notebooks' per-row detect_language / translate_to_english:
+# - every distinct text is detected / translated at most once; results are stored
+#   in a SQLite cache keyed by a content hash, so reposts and reruns are free
+# - translations are sent in batches per source language, with at most
+#   CONCURRENCY batches in flight
+# - the translator is pluggable: Google (deep_translator, as in the notebooks),
+#   a local MarianMT model for offline runs, or no-op
+
+DEFAULT_CACHE_PATH = os.path.join(".language_cache", "language.sqlite")
+TARGET_LANGUAGE = "en"
+BATCH_SIZE = 32
+CONCURRENCY = 4
+MIN_DETECT_LENGTH = 20     # Shorter texts are assumed to be in the target language (as in the notebook)
+UNKNOWN = "unknown"
+MARIAN_MODEL = "Helsinki-NLP/opus-mt-mul-en"
+
+
+def hash_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class LanguageCache:
+    """SQLite store of detected languages and translations, keyed by text hash"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS languages (
+                text_hash TEXT NOT NULL,
+                detector TEXT NOT NULL,
+                language TEXT NOT NULL,
+                PRIMARY KEY (text_hash, detector)
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                text_hash TEXT NOT NULL,
+                backend TEXT NOT NULL,
+                source TEXT NOT NULL,
+                target TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                created REAL NOT NULL,
+                PRIMARY KEY (text_hash, backend, source, target)
+            )
+        """)
+        self.conn.commit()
+
+    def _select(self, query, hashes, params):
+        found = {}
+        hashes = list(hashes)
+        with self.lock:
+            for i in range(0, len(hashes), 500):
+                chunk = hashes[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(query.format(placeholders=placeholders), (*params, *chunk))
+                found.update(rows.fetchall())
+        return found
+
+    def get_languages(self, hashes, detector):
+        return self._select("SELECT text_hash, language FROM languages WHERE detector = ? "
+                            "AND text_hash IN ({placeholders})", hashes, (detector,))
+
+    def put_languages(self, items, detector):
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO languages VALUES (?, ?, ?)",
+                                  [(text_hash, detector, language) for text_hash, language in items])
+            self.conn.commit()
+
+    def get_translations(self, hashes, backend, source, target):
+        return self._select("SELECT text_hash, translation FROM translations WHERE backend = ? AND source = ? "
+                            "AND target = ? AND text_hash IN ({placeholders})", hashes, (backend, source, target))
+
+    def put_translations(self, items, backend, source, target):
+        now = time.time()
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)",
+                                  [(text_hash, backend, source, target, translation, now)
+                                   for text_hash, translation in items])
+            self.conn.commit()
+
+    def stats(self):
+        with self.lock:
+            languages = self.conn.execute("SELECT COUNT(*) FROM languages").fetchone()[0]
+            translations = self.conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        return {"languages": languages, "translations": translations}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class LangdetectDetector:
+    """langdetect with a fixed seed; texts it cannot classify are UNKNOWN"""
+    name = "langdetect"
+
+    def __init__(self, seed=0):
+        from langdetect import DetectorFactory, detect
+        DetectorFactory.seed = seed
+        self._detect = detect
+
+    def detect(self, text):
+        try:
+            return self._detect(text)
+        except Exception:
+            return UNKNOWN
+
+
+class GoogleTranslatorBackend:
+    """deep_translator.GoogleTranslator, as used in the notebooks (needs network access)"""
+    name = "google"
+
+    def translate_batch(self, texts, source, target):
+        from deep_translator import GoogleTranslator
+        translator = GoogleTranslator(source=source if source != UNKNOWN else "auto", target=target)
+        return translator.translate_batch(texts)
+
+
+class MarianTranslatorBackend:
+    """Local MarianMT model (e.g. opus-mt-mul-en), so translation runs offline"""
+
+    def __init__(self, model_name=MARIAN_MODEL, device="cpu", max_length=512, num_beams=4):
+        from transformers import MarianMTModel, MarianTokenizer
+        import torch
+        self.torch = torch
+        self.name = f"marian:{os.path.basename(os.path.normpath(model_name))}"
+        self.tokenizer = MarianTokenizer.from_pretrained(model_name)
+        self.model = MarianMTModel.from_pretrained(model_name).to(device).eval()
+        self.device = device
+        self.max_length = max_length
+        self.num_beams = num_beams
+        self.lock = threading.Lock()  # One generate call at a time on the shared model
+
+    def translate_batch(self, texts, source, target):
+        inputs = self.tokenizer(texts, return_tensors="pt", padding=True, truncation=True,
+                                max_length=self.max_length).to(self.device)
+        with self.lock, self.torch.no_grad():
+            outputs = self.model.generate(**inputs, num_beams=self.num_beams, max_length=self.max_length)
+        return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+
+class IdentityTranslator:
+    """Leaves texts unchanged (detection-only runs)"""
+    name = "identity"
+
+    def translate_batch(self, texts, source, target):
+        return list(texts)
+
+
+def make_translator(backend, model_name=MARIAN_MODEL, device="cpu"):
+    if backend == "google":
+        return GoogleTranslatorBackend()
+    if backend == "marian":
+        return MarianTranslatorBackend(model_name, device)
+    if backend == "identity":
+        return IdentityTranslator()
+    raise ValueError(f"Unknown translation backend: {backend}")
+
+
+class LanguageStage:
+    """Cached, deduplicated language ID and batched translation to `target`"""
+
+    def __init__(self, detector=None, translator=None, cache=None, target=TARGET_LANGUAGE,
+                 batch_size=BATCH_SIZE, concurrency=CONCURRENCY, min_detect_length=MIN_DETECT_LENGTH):
+        self.detector = detector or LangdetectDetector()
+        self.translator = translator or IdentityTranslator()
+        self.cache = cache
+        self.target = target
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.min_detect_length = min_detect_length
+        self.lock = threading.Lock()
+        self.stats = {"texts": 0, "unique": 0, "detect_cache_hits": 0, "detected": 0,
+                      "translate_cache_hits": 0, "translated": 0, "translate_errors": 0}
+
+    def _unique(self, texts):
+        """Map hash -> text for the distinct non-empty strings in texts"""
+        unique = {}
+        for text in texts:
+            if isinstance(text, str) and text.strip():
+                unique.setdefault(hash_text(text), text)
+        return unique
+
+    def detect(self, texts):
+        """Language code per text; empty/NaN and short texts get the target language"""
+        texts = list(texts)
+        unique = self._unique(texts)
+        self.stats["texts"] += len(texts)
+        self.stats["unique"] += len(unique)
+
+        # Short texts fall back to the current target on every call, so only real
+        # detector results are cached (UNKNOWN may come from a transient failure)
+        detectable = {text_hash: text for text_hash, text in unique.items()
+                      if len(text.strip()) >= self.min_detect_length}
+        cached = self.cache.get_languages(detectable, self.detector.name) if self.cache else {}
+        languages = {text_hash: language for text_hash, language in cached.items() if language != UNKNOWN}
+        self.stats["detect_cache_hits"] += len(languages)
+        new = []
+        for text_hash, text in detectable.items():
+            if text_hash not in languages:
+                languages[text_hash] = self.detector.detect(text)
+                self.stats["detected"] += 1
+                if languages[text_hash] != UNKNOWN:
+                    new.append((text_hash, languages[text_hash]))
+        if self.cache and new:
+            self.cache.put_languages(new, self.detector.name)
+
+        return [languages.get(hash_text(text), self.target) if isinstance(text, str) and text.strip()
+                else self.target for text in texts]
+
+    def _translate_batch(self, batch, source):
+        """Translate one batch; on failure keep the originals and do not cache them"""
+        try:
+            translations = self.translator.translate_batch([text for _, text in batch], source, self.target)
+        except Exception as e:
+            print(f"Translation of {len(batch)} {source} texts failed: {e}")
+            with self.lock:
+                self.stats["translate_errors"] += len(batch)
+            return {text_hash: text for text_hash, text in batch}
+        results = {text_hash: translation if translation else text
+                   for (text_hash, text), translation in zip(batch, translations)}
+        if self.cache:
+            self.cache.put_translations(list(results.items()), self.translator.name, source, self.target)
+        with self.lock:
+            self.stats["translated"] += len(batch)
+        return results
+
+    def translate(self, texts, languages=None):
+        """Texts not in the target language translated to it; others returned unchanged"""
+        texts = list(texts)
+        languages = self.detect(texts) if languages is None else list(languages)
+
+        by_source = {}
+        for text, language in zip(texts, languages):
+            if language != self.target and isinstance(text, str) and text.strip():
+                by_source.setdefault(language, {}).setdefault(hash_text(text), text)
+
+        translated = {}
+        jobs = []
+        for source, unique in by_source.items():
+            cached = self.cache.get_translations(unique, self.translator.name, source, self.target) \
+                if self.cache else {}
+            self.stats["translate_cache_hits"] += len(cached)
+            translated.update({(source, h): t for h, t in cached.items()})
+            pending = [(h, text) for h, text in unique.items() if h not in cached]
+            for i in range(0, len(pending), self.batch_size):
+                jobs.append((pending[i:i + self.batch_size], source))
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for (batch, source), results in zip(jobs, pool.map(lambda job: self._translate_batch(*job), jobs)):
+                translated.update({(source, h): t for h, t in results.items()})
+
+        return [translated.get((language, hash_text(text)), text) if language != self.target
+                and isinstance(text, str) and text.strip() else text for text, language in zip(texts, languages)]
+
+    def process(self, df, column="post", language_column="language", translate=True):
+        """Add a language column and (optionally) replace non-target texts with translations"""
+        df = df.copy()
+        df[language_column] = self.detect(df[column])
+        if translate:
+            df[column] = self.translate(df[column], df[language_column])
+        return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect languages and translate Task 2 posts to English")
+    parser.add_argument("input", help="CSV with a post column")
+    parser.add_argument("output", help="Output CSV with an added language column")
+    parser.add_argument("--column", default="post")
+    parser.add_argument("--backend", choices=["google", "marian", "identity"], default="identity")
+    parser.add_argument("--marian-model", default=MARIAN_MODEL, help="Local path or name of a MarianMT model")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="SQLite cache path ('off' to disable)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--filter", action="store_true", help="Keep only rows detected as English")
+    args = parser.parse_args()
+
+    cache = None if args.cache == "off" else LanguageCache(args.cache)
+    stage = LanguageStage(translator=make_translator(args.backend, args.marian_model), cache=cache,
+                          batch_size=args.batch_size, concurrency=args.concurrency)
+    df = pd.read_csv(args.input)
+    start = time.perf_counter()
+    df = stage.process(df, args.column, translate=args.backend != "identity")
+    if args.filter:
+        df = df[df["language"] == TARGET_LANGUAGE]
+    df.to_csv(args.output, index=False)
+    print(f"Processed {stage.stats['texts']} texts in {time.perf_counter() - start:.1f}s: {stage.stats}")
+    if cache:
+        print(f"Cache: {cache.stats()}")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import os
+import re
+import hashlib
+from multiprocessing import Pool
+import numpy as np
+
+# Evaluation metrics for the Task 2 Seq2SeqTrainer runs, reproducing the notebooks'
+# scores exactly:
+# - compute_metrics (BART notebook): ROUGE via evaluate/rouge_score with whitespace
+#   tokenization, nltk METEOR on lowercased whitespace tokens, BERTScore F1
+# - metrics_func (FLAN-T5 notebook): evaluate's METEOR on sentence-split text
+# Per-pair ROUGE and METEOR run in a persistent process pool; each worker keeps
+# wordnet synsets, Porter stems and reference tokenizations cached across calls,
+# so later epochs only pay for the new predictions. ROUGE scores are aggregated in
+# the parent with rouge_score's BootstrapAggregator, exactly as evaluate does, and
+# the BERTScore model is loaded once per engine instead of on every evaluation.
+
+ROUGE_TYPES = ["rouge1", "rouge2", "rougeL", "rougeLsum"]
+SENTENCE_ENDINGS = ("!", "！", "?", "？", "。")
+SENTENCE_PATTERN = re.compile(u'[^!！?？。]*[!！?？。]')
+BERTSCORE_LANG = "es"
+CHUNK_SIZE = 128
+
+_worker = {}   # Per-process caches, filled lazily by _state()
+
+
+class CachedWordNet:
+    """wordnet with memoized synsets(); METEOR looks up the same words every epoch"""
+
+    def __init__(self, wordnet):
+        self.wordnet = wordnet
+        self.cache = {}
+
+    def synsets(self, word):
+        if word not in self.cache:
+            self.cache[word] = self.wordnet.synsets(word)
+        return self.cache[word]
+
+
+class CachedStemmer:
+    def __init__(self, stemmer):
+        self.stemmer = stemmer
+        self.cache = {}
+
+    def stem(self, word):
+        if word not in self.cache:
+            self.cache[word] = self.stemmer.stem(word)
+        return self.cache[word]
+
+
+class ReferenceTokenizer:
+    """rouge_score tokenizer (whitespace split, as in the notebook) that reuses reference tokens"""
+
+    def __init__(self, references):
+        self.references = references
+
+    def tokenize(self, text):
+        tokens = self.references.get(text)
+        return tokens if tokens is not None else text.split()
+
+
+def _state():
+    if not _worker:
+        from nltk.corpus import wordnet
+        from nltk.stem.porter import PorterStemmer
+        from rouge_score import rouge_scorer
+        _worker["wordnet"] = CachedWordNet(wordnet)
+        _worker["stemmer"] = CachedStemmer(PorterStemmer())
+        _worker["tokens"] = {"rouge": {}, "lower": {}, "word": {}}
+        _worker["rouge"] = rouge_scorer.RougeScorer(rouge_types=ROUGE_TYPES, use_stemmer=False,
+                                                    tokenizer=ReferenceTokenizer(_worker["tokens"]["rouge"]))
+    return _worker
+
+
+def _tokenize(text, mode):
+    if mode == "lower":
+        return text.lower().split()
+    if mode == "word":
+        from nltk import word_tokenize
+        return word_tokenize(text)
+    return text.split()
+
+
+def _reference_tokens(state, text, mode):
+    cache = state["tokens"][mode]
+    if text not in cache:
+        cache[text] = _tokenize(text, mode)
+    return cache[text]
+
+
+def _score_chunk(args):
+    """Per-pair scores for one chunk: ROUGE Score tuples and/or METEOR floats"""
+    pairs, rouge, meteor_mode = args
+    from nltk.translate import meteor_score
+    state = _state()
+    results = []
+    for pred, ref in pairs:
+        result = {}
+        if rouge:
+            _reference_tokens(state, ref, "rouge")
+            result["rouge"] = state["rouge"].score(ref, pred)
+        if meteor_mode:
+            ref_tokens = _reference_tokens(state, ref, meteor_mode)
+            result["meteor"] = meteor_score.meteor_score([ref_tokens], _tokenize(pred, meteor_mode),
+                                                         stemmer=state["stemmer"], wordnet=state["wordnet"])
+        results.append(result)
+    return results
+
+
+def split_sentences(text):
+    """metrics_func's text preparation: close the last sentence, one sentence per line"""
+    text = text if text.endswith(SENTENCE_ENDINGS) else text + "。"
+    return "\n".join(sentence.strip() for sentence in SENTENCE_PATTERN.findall(text))
+
+
+class MetricsEngine:
+    """ROUGE / METEOR in a persistent process pool plus a loaded-once BERTScore model"""
+
+    def __init__(self, workers=None, bertscore_lang=BERTSCORE_LANG, chunk_size=CHUNK_SIZE):
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.bertscore_lang = bertscore_lang
+        self.chunk_size = chunk_size
+        self.pool = None
+        self.bert_scorer = None
+
+    def _map(self, preds, refs, rouge=False, meteor_mode=None):
+        pairs = list(zip(preds, refs))
+        chunks = [(pairs[i:i + self.chunk_size], rouge, meteor_mode) for i in range(0, len(pairs), self.chunk_size)]
+        if self.workers > 1 and len(chunks) > 1:
+            if self.pool is None:
+                self.pool = Pool(self.workers)
+            results = self.pool.map(_score_chunk, chunks)
+        else:
+            results = [_score_chunk(chunk) for chunk in chunks]
+        return [result for chunk in results for result in chunk]
+
+    def rouge_and_meteor(self, preds, refs, meteor_mode="lower"):
+        """evaluate rouge.compute(..., use_stemmer=False, tokenizer=str.split) and per-pair METEOR"""
+        from rouge_score import scoring
+        results = self._map(preds, refs, rouge=True, meteor_mode=meteor_mode)
+        aggregator = scoring.BootstrapAggregator()
+        for result in results:
+            aggregator.add_scores(result["rouge"])
+        rouge = {key: value.mid.fmeasure for key, value in aggregator.aggregate().items()}
+        return rouge, [result["meteor"] for result in results]
+
+    def meteor(self, preds, refs, meteor_mode="word"):
+        """evaluate's meteor.compute: mean METEOR over word_tokenize'd pairs"""
+        return {"meteor": np.mean([result["meteor"] for result in self._map(preds, refs, meteor_mode=meteor_mode)])}
+
+    def bertscore(self, preds, refs):
+        """Mean BERTScore F1, or 0.0 if bert_score is not installed (as in the notebook)"""
+        if self.bert_scorer is None:
+            try:
+                from bert_score import BERTScorer
+            except ImportError:
+                return 0.0
+            self.bert_scorer = BERTScorer(lang=self.bertscore_lang)
+        _, _, f1 = self.bert_scorer.score(preds, refs, verbose=False)
+        return f1.mean().item()
+
+    def summary_metrics(self, preds, refs, use_bertscore=True):
+        """The BART notebook's compute_metrics result for already decoded, stripped texts"""
+        result, meteor_scores = self.rouge_and_meteor(preds, refs)
+        result["meteor"] = np.mean(meteor_scores)
+        result["bertscore"] = self.bertscore(preds, refs) if use_bertscore else 0.0
+        prediction_lens = [len(pred.split()) for pred in preds]
+        reference_lens = [len(label.split()) for label in refs]
+        result["gen_len"] = np.mean(prediction_lens)
+        result["ref_len"] = np.mean(reference_lens)
+        result["compression_ratio"] = np.mean([p / r if r > 0 else 0 for p, r in zip(prediction_lens, reference_lens)])
+        return {k: round(v, 4) for k, v in result.items()}
+
+    def sentence_meteor(self, preds, refs):
+        """The FLAN-T5 notebook's metrics_func result for decoded texts"""
+        return self.meteor([split_sentences(p) for p in preds], [split_sentences(r) for r in refs])
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+
+class LabelDecoder:
+    """batch_decode of label ids, cached by content since eval labels repeat every epoch"""
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        self.cache = {}
+
+    def __call__(self, labels):
+        labels = np.where(labels != -100, labels, self.tokenizer.pad_token_id)
+        key = hashlib.sha256(np.ascontiguousarray(labels).tobytes() + str(labels.shape).encode()).hexdigest()
+        if key not in self.cache:
+            self.cache[key] = self.tokenizer.batch_decode(labels, skip_special_tokens=True)
+        return self.cache[key]
+
+
+def make_compute_metrics(tokenizer, engine=None, use_bertscore=True):
+    """Drop-in compute_metrics for the BART / FLAN-T5 Seq2SeqTrainer"""
+    engine = engine or MetricsEngine()
+    decode_labels = LabelDecoder(tokenizer)
+
+    def compute_metrics(eval_pred):
+        predictions, labels = eval_pred
+        decoded_preds = [pred.strip() for pred in tokenizer.batch_decode(predictions, skip_special_tokens=True)]
+        decoded_labels = [label.strip() for label in decode_labels(labels)]
+        return engine.summary_metrics(decoded_preds, decoded_labels, use_bertscore)
+
+    return compute_metrics
+
+
+def make_metrics_func(tokenizer, engine=None):
+    """Drop-in metrics_func for the FLAN-T5 Seq2SeqTrainer"""
+    engine = engine or MetricsEngine()
+    decode_labels = LabelDecoder(tokenizer)
+
+    def metrics_func(eval_arg):
+        preds, labels = eval_arg
+        text_preds = tokenizer.batch_decode(preds, skip_special_tokens=True)
+        return engine.sentence_meteor(text_preds, decode_labels(labels))
+
+    return metrics_func
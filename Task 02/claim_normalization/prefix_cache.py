@@ -0,0 +1,62 @@
+import copy
+import torch
+
+# Prompt-prefix KV cache for the causal (Llama) claim normalizer.
+# Every prompt starts with the same "### Instruction: ..." preamble, so its past
+# key/values are computed once per model load and handed to model.generate for
+# each call; only the post and the "### Response:" suffix are prefilled.
+# In a batch, padding goes between the cached prefix and each post
+# ([prefix][pad...][post]), so every row shares the prefix positions, and position
+# ids (taken from the attention mask) stay the same as for the unpadded prompt.
+
+
+class PrefixCache:
+    """Past key/values of a fixed prompt prefix, reusable across generate calls"""
+
+    def __init__(self, model, tokenizer, prefix):
+        if model.config.is_encoder_decoder:
+            raise ValueError("Prefix caching only applies to decoder-only models")
+        self.model = model
+        self.prefix_ids = tokenizer(prefix)["input_ids"]
+        with torch.no_grad():
+            outputs = model(torch.tensor([self.prefix_ids], device=model.device), use_cache=True)
+        self.past_key_values = outputs.past_key_values
+
+    def __len__(self):
+        return len(self.prefix_ids)
+
+    def matches(self, input_ids):
+        """False if the tokenizer merged the prefix boundary differently for this prompt"""
+        return list(input_ids[:len(self.prefix_ids)]) == self.prefix_ids
+
+    def expand(self, batch_size):
+        """Fresh copy of the cache for batch_size rows (generate extends it in place)"""
+        cache = copy.deepcopy(self.past_key_values)
+        if batch_size > 1:
+            cache.batch_repeat_interleave(batch_size)
+        return cache
+
+    def build_inputs(self, rows, pad_token_id):
+        """Pad full-prompt token ids as [prefix][pad...][suffix]; returns input_ids, attention_mask"""
+        prefix_length = len(self.prefix_ids)
+        suffixes = [list(ids[prefix_length:]) for ids in rows]
+        width = max(len(suffix) for suffix in suffixes)
+        input_ids, attention_mask = [], []
+        for suffix in suffixes:
+            padding = width - len(suffix)
+            input_ids.append(self.prefix_ids + [pad_token_id] * padding + suffix)
+            attention_mask.append([1] * prefix_length + [0] * padding + [1] * len(suffix))
+        device = self.model.device
+        return torch.tensor(input_ids, device=device), torch.tensor(attention_mask, device=device)
+
+    def generate(self, rows, pad_token_id, **generation_kwargs):
+        """model.generate over full-prompt token ids, prefilling only the part after the prefix"""
+        input_ids, attention_mask = self.build_inputs(rows, pad_token_id)
+        expand_size = max(generation_kwargs.get("num_beams", 1), generation_kwargs.get("num_return_sequences", 1))
+        return self.model.generate(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            past_key_values=self.expand(len(rows) * expand_size),
+            pad_token_id=pad_token_id,
+            **generation_kwargs,
+        )
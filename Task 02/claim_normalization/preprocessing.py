@@ -0,0 +1,118 @@
+import re
+from multiprocessing import Pool
+
+# Text cleaning for the Task 2 notebooks (preprocess_data / clean_text_deduplicate),
+# producing byte-identical output to the notebook functions but faster:
+# - patterns are compiled once instead of per call (the Llama clean_text even
+#   re-imported re on every row)
+# - clean_texts runs each substitution once over a whole chunk of posts joined with
+#   RECORD_SEPARATOR; it is whitespace for \S / \w / [^\w\s], so no match can cross
+#   from one post into the next and splitting back gives the per-post results
+# - with workers > 1, columns are split into at least one chunk per worker (at most
+#   CHUNK_SIZE posts each) and cleaned in a multiprocessing pool; starting the pool
+#   costs more than it saves on a few thousand posts, so workers=1 is the default
+
+URL_PATTERN = re.compile(r'http\S+|www\S+|https\S+', flags=re.MULTILINE)
+HASHTAG_PATTERN = re.compile(r'#\w+')
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+RECORD_SEPARATOR = "\x1e"
+CHUNK_SIZE = 50000
+
+
+def clean_text(text, remove_punctuation=False):
+    """One post: URLs and hashtags removed (plus punctuation for the Llama notebook), stripped"""
+    if not isinstance(text, str):
+        return ""  # NaN; the FLAN-T5 notebook returns "" (the Llama version would raise)
+    text = URL_PATTERN.sub('', text)
+    text = HASHTAG_PATTERN.sub('', text)
+    if remove_punctuation:
+        text = PUNCTUATION_PATTERN.sub('', text)
+    return text.strip()
+
+
+def clean_texts(texts, remove_punctuation=False):
+    """clean_text over a list, with one regex pass per pattern for the whole list"""
+    texts = list(texts)
+    valid = [i for i, text in enumerate(texts) if isinstance(text, str)]
+    joined_texts = [texts[i] for i in valid]
+    if any(RECORD_SEPARATOR in text for text in joined_texts):
+        return [clean_text(text, remove_punctuation) for text in texts]
+
+    joined = RECORD_SEPARATOR.join(joined_texts)
+    joined = URL_PATTERN.sub('', joined)
+    joined = HASHTAG_PATTERN.sub('', joined)
+    if remove_punctuation:
+        joined = PUNCTUATION_PATTERN.sub('', joined)
+
+    results = [""] * len(texts)
+    if valid:
+        for i, text in zip(valid, joined.split(RECORD_SEPARATOR)):
+            results[i] = text.strip()
+    return results
+
+
+def clean_text_deduplicate(text):
+    """Collapse whitespace and drop repeated '. '-separated sentences, keeping the first"""
+    if not isinstance(text, str):
+        return ""
+    text = ' '.join(text.split())
+    suffix = '.' if text.endswith('.') else ''
+    if '. ' not in text:
+        return text + suffix  # Single sentence, nothing to deduplicate
+    unique_sentences = dict.fromkeys([s.strip() for s in text.split('. ')])
+    unique_sentences.pop('', None)
+    return '. '.join(unique_sentences) + suffix
+
+
+def deduplicate_texts(texts):
+    return [clean_text_deduplicate(text) for text in texts]
+
+
+def _clean_chunk(args):
+    texts, remove_punctuation = args
+    return clean_texts(texts, remove_punctuation)
+
+
+def parallel_map(func, values, workers=1, chunk_size=CHUNK_SIZE, extra_args=None):
+    """Apply a list -> list function over chunks of values, in a process pool when workers > 1.
+    With workers > 1 the values are split into at least `workers` chunks, so the pool is used
+    even when everything would fit in one chunk_size chunk."""
+    values = values.tolist() if hasattr(values, "tolist") else list(values)  # Series.tolist is much faster
+    if workers > 1:
+        chunk_size = max(1, min(chunk_size, -(-len(values) // workers)))
+    chunks = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+    if extra_args is not None:
+        chunks = [(chunk, *extra_args) for chunk in chunks]
+    if workers > 1 and len(chunks) > 1:
+        with Pool(workers) as pool:
+            results = pool.map(func, chunks)
+    else:
+        results = [func(chunk) for chunk in chunks]
+    return [value for chunk in results for value in chunk]
+
+
+def preprocess_data(df, remove_punctuation=False, columns=("post", "normalized_claim"), workers=1,
+                    chunk_size=CHUNK_SIZE):
+    """Notebook preprocess_data; remove_punctuation=True gives the Llama notebook's variant.
+    Like the notebooks, only a 'normalized_claim' column is cleaned besides 'post' by default
+    (the released data names it 'normalized claim', so pass columns to include it)."""
+    for column in columns:
+        if column in df.columns:
+            df[column] = parallel_map(_clean_chunk, df[column], workers, chunk_size, (remove_punctuation,))
+    return df
+
+
+def deduplicate_columns(df, columns=("post", "normalized claim"), workers=1, chunk_size=CHUNK_SIZE):
+    """df[column].apply(clean_text_deduplicate) for each column, optionally in parallel.
+    In one process this is only about as fast as the notebook's .apply (the work per post is
+    plain str methods either way); the speedup comes from workers > 1 on large columns."""
+    for column in columns:
+        if column in df.columns:
+            df[column] = parallel_map(deduplicate_texts, df[column], workers, chunk_size)
+    return df
+
+
+def clean_dataframe(df, remove_punctuation=False, workers=1, chunk_size=CHUNK_SIZE):
+    """preprocess_data followed by the clean_text_deduplicate pass, as in the training notebooks"""
+    df = preprocess_data(df, remove_punctuation, workers=workers, chunk_size=chunk_size)
+    return deduplicate_columns(df, workers=workers, chunk_size=chunk_size)
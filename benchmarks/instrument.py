@@ -0,0 +1,177 @@
+import os
+import sys
+import time
+import cProfile
+import threading
+import statistics
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common"))
+from memory_usage import rss_mib, peak_rss_mib
+
+# Per-stage timing and memory instrumentation for the benchmark suite.
+# Recorder.run(name, function) calls function (which returns the number of items
+# it processed) a few times and records median wall and CPU time, items/sec, the
+# RSS the stage added, and the stage's own peak RSS, sampled by a background
+# thread rather than read from ru_maxrss (which only ever grows over the process).
+# Optional hooks: tracemalloc for the Python-heap peak, cProfile dumps per stage,
+# and any callables that receive each finished record.
+
+SAMPLE_INTERVAL = 0.005      # Seconds between RSS samples while a stage runs
+TIME_THRESHOLD = 0.20        # Slowdown (fraction of baseline items/sec) reported as a regression
+MEMORY_THRESHOLD = 0.25      # Growth of a stage's peak memory reported as a regression
+MEMORY_FLOOR_MIB = 8         # ...if it is also at least this many MiB (smaller changes are allocator noise)
+
+
+class RssSampler:
+    """Highest RSS seen between start() and stop(), polled from a daemon thread"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _poll(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def _sample(self):
+        current = rss_mib()
+        if current is not None and (self.peak is None or current > self.peak):
+            self.peak = current
+
+    def start(self):
+        self.peak = None
+        self._stop.clear()
+        self._sample()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._sample()
+        return self.peak
+
+
+class Recorder:
+    """Runs benchmark stages and collects one record per stage"""
+
+    def __init__(self, repeats=3, warmup=1, trace_python=False, profile_dir=None, hooks=None,
+                 skip_errors=(ImportError, LookupError)):
+        self.repeats = repeats
+        self.warmup = warmup
+        self.trace_python = trace_python
+        self.profile_dir = profile_dir
+        self.hooks = list(hooks or [])
+        self.skip_errors = skip_errors
+        self.records = []
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    def add_hook(self, hook):
+        """hook(record) is called after every stage, e.g. to log or export it"""
+        self.hooks.append(hook)
+
+    def _finish(self, record):
+        self.records.append(record)
+        for hook in self.hooks:
+            hook(record)
+        return record
+
+    def skip(self, name, reason):
+        return self._finish({"stage": name, "status": "skipped", "reason": reason})
+
+    def run(self, name, function, repeats=None, warmup=None):
+        """Time function() (returning the number of items processed) and record the stage.
+        Stages that must not run untimed first (e.g. cold model loads) pass warmup=0."""
+        repeats = self.repeats if repeats is None else repeats
+        warmup = self.warmup if warmup is None else warmup
+        sampler, profiler = RssSampler(), cProfile.Profile() if self.profile_dir else None
+        try:
+            for _ in range(warmup):
+                function()
+            rss_before = rss_mib()
+            sampler.start()
+            if self.trace_python:
+                tracemalloc.start()
+            wall, cpu, items = [], [], 0
+            for _ in range(repeats):
+                wall_start, cpu_start = time.perf_counter(), time.process_time()
+                if profiler:
+                    profiler.enable()
+                try:
+                    items = function()
+                finally:
+                    if profiler:
+                        profiler.disable()
+                wall.append(time.perf_counter() - wall_start)
+                cpu.append(time.process_time() - cpu_start)
+            python_peak = tracemalloc.get_traced_memory()[1] / 2 ** 20 if self.trace_python else None
+        except self.skip_errors as e:
+            # Optional dependency or data (e.g. NLTK wordnet) missing: report it and go on
+            message = [line.strip() for line in str(e).splitlines() if line.strip(" *")]
+            return self.skip(name, f"{type(e).__name__}: {message[0] if message else ''}".rstrip(": "))
+        finally:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            stage_peak = sampler.stop()
+
+        seconds = statistics.median(wall)
+        record = {
+            "stage": name,
+            "status": "ok",
+            "items": items,
+            "repeats": repeats,
+            "seconds": seconds,
+            "seconds_min": min(wall),
+            "cpu_seconds": statistics.median(cpu),
+            "items_per_sec": items / seconds if seconds > 0 else None,
+            "rss_delta_mib": rss_mib() - rss_before if rss_before is not None else None,
+            "stage_peak_mib": stage_peak - rss_before if rss_before is not None else None,
+            "peak_rss_mib": peak_rss_mib(),
+        }
+        if python_peak is not None:
+            record["python_peak_mib"] = python_peak
+        if profiler:
+            record["profile"] = os.path.join(self.profile_dir, f"{name}.prof")
+            profiler.dump_stats(record["profile"])
+        return self._finish(record)
+
+
+def compare(records, baseline_records, time_threshold=TIME_THRESHOLD, memory_threshold=MEMORY_THRESHOLD):
+    """One row per stage: change in items/sec and stage peak memory vs the baseline, and a status
+    of ok / regression / improvement / new / skipped / missing"""
+    baseline = {record["stage"]: record for record in baseline_records}
+    rows = []
+    for record in records:
+        base = baseline.get(record["stage"])
+        row = {"stage": record["stage"], "items_per_sec": record.get("items_per_sec"),
+               "baseline_items_per_sec": None, "speed_change": None, "memory_change_mib": None}
+        if record["status"] != "ok" or (base is not None and base["status"] != "ok"):
+            rows.append({**row, "status": "skipped"})
+            continue
+        if base is None:
+            rows.append({**row, "status": "new"})
+            continue
+        row["baseline_items_per_sec"] = base["items_per_sec"]
+        row["speed_change"] = record["items_per_sec"] / base["items_per_sec"] - 1 \
+            if record["items_per_sec"] and base["items_per_sec"] else None
+        if record.get("stage_peak_mib") is not None and base.get("stage_peak_mib") is not None:
+            row["memory_change_mib"] = record["stage_peak_mib"] - base["stage_peak_mib"]
+
+        slower = row["speed_change"] is not None and row["speed_change"] < -time_threshold
+        faster = row["speed_change"] is not None and row["speed_change"] > time_threshold
+        bigger = row["memory_change_mib"] is not None and row["memory_change_mib"] >= MEMORY_FLOOR_MIB \
+            and row["memory_change_mib"] > memory_threshold * max(base["stage_peak_mib"], 0)
+        row["status"] = "regression" if slower or bigger else "improvement" if faster else "ok"
+        rows.append(row)
+    for name in baseline:
+        if name not in {record["stage"] for record in records}:
+            rows.append({"stage": name, "status": "missing"})
+    return rows
@@ -0,0 +1,272 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in (("Task 01", "subjectivity"), ("Task 01", "data_augmentation"), ("Task 02", "claim_normalization")):
+    sys.path.insert(0, os.path.join(REPO_ROOT, *folder))
+
+import synthetic
+from instrument import Recorder, compare, TIME_THRESHOLD, MEMORY_THRESHOLD
+
+# End-to-end benchmark of both tasks on a seeded synthetic corpus, offline on CPU.
+# Stages:
+#   task1_tokenize    token_cache.build_token_cache into a fresh cache directory
+#   task1_load_model  predictors.load_classifier (PyTorch, ONNX or n-gram student)
+#   task1_classify    predict_proba over every sentence
+#   task2_preprocess  preprocessing.preprocess_data on post and normalized claim
+#   task2_deduplicate preprocessing.deduplicate_columns
+#   task2_load_model  generation.load_model
+#   task2_generate    ClaimGenerator.generate with its instruction prompt (--template)
+#   task2_metrics     MetricsEngine.rouge_and_meteor (warm caches, as in later epochs)
+#   augment_parse_lines / augment_parse_text
+#                     the Gemini response parsers of the Arabic/Bulgarian and English scripts
+# Without --task1-model / --task2-model, tiny random models are built from the corpus
+# vocabulary, so timings track the code paths rather than model size. Results go to
+# a JSON file; with a stored baseline each stage's items/sec and peak memory are
+# compared against it and regressions reported (and, with --fail-on-regression,
+# the exit status is 1).
+
+TASKS = ["task1", "task2", "augment"]
+DEFAULT_OUTPUT = os.path.join("benchmark_results", "latest.json")
+DEFAULT_BASELINE = os.path.join("benchmark_results", "baseline.json")
+MAX_LENGTH = 128       # As in the Task 1 notebooks
+
+
+def environment():
+    import torch
+    import transformers
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "transformers": transformers.__version__,
+    }
+
+
+def task1_stages(recorder, args, work_dir):
+    from transformers import AutoTokenizer
+    from token_cache import build_token_cache
+    from predictors import load_classifier
+
+    texts = synthetic.task1_corpus(args.task1_sentences, args.seed)["sentence"].tolist()
+    model_dir = args.task1_model or synthetic.build_task1_model(os.path.join(work_dir, "task1_model"), texts,
+                                                                args.max_length, args.seed)
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    loaded = {}
+
+    def tokenize():
+        # A new directory every run, otherwise the content-addressed cache is simply reused
+        build_token_cache(texts, tokenizer, args.max_length, cache_dir=tempfile.mkdtemp(dir=work_dir))
+        return len(texts)
+
+    def load():
+        loaded["classifier"] = load_classifier(model_dir, num_threads=args.threads, max_length=args.max_length)
+        return 1
+
+    def classify():
+        loaded["classifier"].predict_proba(texts, batch_size=args.batch_size)
+        return len(texts)
+
+    recorder.run("task1_tokenize", tokenize)
+    recorder.run("task1_load_model", load, warmup=0)
+    if "classifier" in loaded:
+        recorder.run("task1_classify", classify)
+
+
+def task2_stages(recorder, args, work_dir):
+    from preprocessing import preprocess_data, deduplicate_columns
+    from generation import ClaimGenerator, load_model
+    from metrics import MetricsEngine
+
+    corpus = synthetic.task2_corpus(args.task2_posts, args.seed)
+    columns = ("post", "normalized claim")
+    cleaned = preprocess_data(corpus.copy(), columns=columns)
+    posts = cleaned["post"].tolist()[:args.generate_posts]
+    references = cleaned["normalized claim"].tolist()[:args.metric_pairs]
+    predictions = synthetic.noisy_predictions(references, args.seed)
+    model_dir = args.task2_model or synthetic.build_task2_model(
+        os.path.join(work_dir, "task2_model"), cleaned["post"].tolist() + [args.template], args.seed)
+    loaded = {}
+
+    def preprocess():
+        preprocess_data(corpus.copy(), columns=columns)
+        return len(corpus)
+
+    def deduplicate():
+        deduplicate_columns(corpus.copy(), columns=columns)
+        return len(corpus)
+
+    def load():
+        loaded["model"], loaded["tokenizer"] = load_model(model_dir, args.task2_base_model, device="cpu")
+        return 1
+
+    def generate():
+        # The prompt ClaimGenerator and cascade.py use, unless --template overrides it
+        generator = ClaimGenerator(loaded["model"], loaded["tokenizer"], prompt_template=args.template or None,
+                                   num_beams=args.num_beams, max_new_tokens=args.max_new_tokens)
+        generator.generate(posts)
+        return len(posts)
+
+    engine = MetricsEngine(workers=args.metric_workers)
+
+    def score():
+        engine.rouge_and_meteor(predictions, references)
+        return len(references)
+
+    recorder.run("task2_preprocess", preprocess)
+    recorder.run("task2_deduplicate", deduplicate)
+    recorder.run("task2_load_model", load, warmup=0)
+    if "model" in loaded:
+        recorder.run("task2_generate", generate)
+    recorder.run("task2_metrics", score)
+    engine.close()
+
+
+def augment_stages(recorder, args):
+    # Importing the scripts builds their Gemini client; the offline fake keeps this
+    # from needing a key or the network, and the response cache is not touched
+    os.environ["GEMINI_FAKE"] = "1"
+    os.environ["GEMINI_CACHE"] = "off"
+    lines_responses, text_responses = synthetic.augmentation_responses(args.augment_responses, args.seed)
+    try:
+        from arabic_and_bulgarian_data_augmentation import parse_generated_lines
+        from english_data_augmentation import parse_generated_text
+    except ImportError as e:
+        for name in ("augment_parse_lines", "augment_parse_text"):
+            recorder.skip(name, f"ImportError: {e}")
+        return
+
+    def parse_lines():
+        for _, label, content in lines_responses:
+            parse_generated_lines(content, label)
+        return len(lines_responses)
+
+    def parse_text():
+        for content in text_responses:
+            parse_generated_text(content)
+        return len(text_responses)
+
+    recorder.run("augment_parse_lines", parse_lines)
+    recorder.run("augment_parse_text", parse_text)
+
+
+def print_progress(record):
+    if record["status"] != "ok":
+        print(f"{record['stage']:<22} skipped ({record['reason']})")
+        return
+    print(f"{record['stage']:<22}{record['seconds']:>9.3f}s {record['items_per_sec']:>12.1f} items/sec  "
+          f"peak +{record['stage_peak_mib']:.0f} MiB")
+
+
+def write_json(path, data):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of both tasks on synthetic data")
+    parser.add_argument("--tasks", nargs="+", choices=TASKS, default=TASKS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--task1-sentences", type=int, default=2000)
+    parser.add_argument("--task2-posts", type=int, default=20000, help="Posts cleaned and deduplicated")
+    parser.add_argument("--metric-pairs", type=int, default=2000, help="Claim pairs scored")
+    parser.add_argument("--generate-posts", type=int, default=32, help="Posts normalized by the model")
+    parser.add_argument("--augment-responses", type=int, default=1000, help="Gemini responses parsed per parser")
+    parser.add_argument("--task1-model", default=None, help="Task 1 classifier directory instead of a tiny random one")
+    parser.add_argument("--task2-model", default=None, help="Task 2 checkpoint, adapter or export_cpu.py directory")
+    parser.add_argument("--task2-base-model", default=None, help="Base model for a LoRA --task2-model")
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--template", default=None,
+                        help="Task 2 prompt with a {post} placeholder ('' for raw posts); default: ClaimGenerator's")
+    parser.add_argument("--num-beams", type=int, default=5)
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    parser.add_argument("--metric-workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per stage (the median is reported)")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per stage before timing")
+    parser.add_argument("--trace-python", action="store_true", help="Also record the Python-heap peak (tracemalloc)")
+    parser.add_argument("--profile", default=None, help="Write a cProfile .prof file per stage to this folder")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=TIME_THRESHOLD, help="Allowed items/sec drop")
+    parser.add_argument("--memory-threshold", type=float, default=MEMORY_THRESHOLD, help="Allowed peak memory growth")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--write-corpus", default=None, help="Also save the synthetic corpora to this folder")
+    args = parser.parse_args()
+    if args.template is None:
+        from generation import PROMPT_TEMPLATE
+        args.template = PROMPT_TEMPLATE
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+    if args.write_corpus:
+        synthetic.write_corpus(args.write_corpus, args.task1_sentences, args.task2_posts, args.seed)
+
+    recorder = Recorder(repeats=args.repeats, warmup=args.warmup, trace_python=args.trace_python,
+                        profile_dir=args.profile, hooks=[print_progress])
+    work_dir = tempfile.mkdtemp(prefix="checkthat_bench_")
+    start = time.perf_counter()
+    try:
+        if "task1" in args.tasks:
+            task1_stages(recorder, args, work_dir)
+        if "task2" in args.tasks:
+            task2_stages(recorder, args, work_dir)
+        if "augment" in args.tasks:
+            augment_stages(recorder, args)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    config = {key: value for key, value in vars(args).items()
+              if key not in ("output", "baseline", "save_baseline", "fail_on_regression", "profile", "write_corpus")}
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "total_seconds": time.perf_counter() - start,
+        "environment": environment(),
+        "config": config,
+        "stages": recorder.records,
+    }
+
+    regressions = []
+    if args.save_baseline:
+        write_json(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        for section in ("environment", "config"):
+            if baseline[section] != results[section]:
+                changed = sorted(key for key in set(baseline[section]) | set(results[section])
+                                 if baseline[section].get(key) != results[section].get(key))
+                print(f"Warning: {section} differs from the baseline ({', '.join(changed)})")
+        results["comparison"] = compare(recorder.records, baseline["stages"], args.threshold, args.memory_threshold)
+        table = pd.DataFrame(results["comparison"])
+        print(f"\nvs {args.baseline} ({baseline['created']}):")
+        print(table.to_string(index=False, na_rep="-", float_format=lambda v: f"{v:.3f}"))
+        regressions = [row["stage"] for row in results["comparison"] if row["status"] == "regression"]
+    write_json(args.output, results)
+    print(f"Results written to {args.output}")
+
+    if regressions:
+        print(f"Regressions: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import os
+import random
+import pandas as pd
+
+# Seeded synthetic data and tiny randomly initialised models for the benchmark suite.
+# Nothing is downloaded: sentences, posts and Gemini-style responses are built from
+# fixed word lists, and the models use a word-level tokenizer over the corpus
+# vocabulary, so the whole pipeline runs offline on CPU. The numbers measure the
+# code paths (tokenization, batching, generation loop, parsing, scoring), not
+# model quality; pass real checkpoints to run_benchmarks.py for that.
+
+ORGS = ["government", "ministry", "central bank", "health agency", "university", "city council", "court",
+        "police", "parliament", "company", "union", "hospital"]
+THINGS = ["budget", "vaccine", "election", "tax reform", "school year", "energy price", "new law", "strike",
+          "football season", "housing market", "climate plan", "border policy"]
+UNITS = ["percent", "million euros", "cases", "people", "schools", "jobs", "votes", "kilometres"]
+VERBS = ["reported", "announced", "confirmed", "published", "recorded", "approved"]
+ADJECTIVES = ["outrageous", "brilliant", "shameful", "disastrous", "wonderful", "ridiculous", "inspiring",
+              "pathetic", "unbelievable", "fantastic"]
+OPINIONS = ["I think", "Honestly,", "In my opinion", "Clearly", "Everyone knows", "Sadly,"]
+NOISE = ["BREAKING:", "WOW", "lol", "Share before they delete this", "!!!", "Wake up people", "unbelievable..."]
+HASHTAGS = ["#news", "#COVID19", "#fakenews", "#truth", "#politics", "#breaking"]
+# A few non-Latin words so the Arabic/Bulgarian parse path sees multi-byte text
+FOREIGN_WORDS = {"ar": ["الحكومة", "أعلنت", "المدارس", "الأسبوع", "المقبل", "رائع"],
+                 "bg": ["правителството", "обяви", "училищата", "следващата", "седмица", "ужасно"]}
+SPECIAL_TOKENS = ["<pad>", "</s>", "<s>", "<unk>"]
+
+
+def objective_sentence(rng):
+    return (f"The {rng.choice(ORGS)} {rng.choice(VERBS)} {rng.randint(2, 990)} {rng.choice(UNITS)} "
+            f"for the {rng.choice(THINGS)} in {rng.randint(1990, 2025)}.")
+
+
+def subjective_sentence(rng):
+    adjectives = " and ".join(rng.sample(ADJECTIVES, rng.randint(1, 3)))
+    return f"{rng.choice(OPINIONS)} the {rng.choice(THINGS)} of the {rng.choice(ORGS)} is {adjectives}."
+
+
+def task1_corpus(size, seed=0):
+    """sentence_id / sentence / label rows like the CheckThat Task 1 TSVs; ~10% are long
+    multi-clause sentences so truncation and length bucketing are exercised"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(size):
+        label = "SUBJ" if rng.random() < 0.4 else "OBJ"
+        make = subjective_sentence if label == "SUBJ" else objective_sentence
+        sentence = make(rng)
+        if rng.random() < 0.1:
+            sentence = " ".join(make(rng) for _ in range(rng.randint(4, 10)))
+        rows.append({"sentence_id": f"syn-{i}", "sentence": sentence, "label": label})
+    return pd.DataFrame(rows)
+
+
+def task2_corpus(size, seed=0, duplicate_rate=0.2):
+    """post / normalized claim rows like the Task 2 CSVs: URLs, hashtags, shouting and
+    retweeted copies of earlier posts around a claim"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(size):
+        if rows and rng.random() < duplicate_rate:
+            original = rng.choice(rows)
+            rows.append({"post": f"RT @user{rng.randint(1, 99)}: {original['post']}",
+                         "normalized claim": original["normalized claim"]})
+            continue
+        claim = objective_sentence(rng)
+        parts = [rng.choice(NOISE), claim.rstrip(".")]
+        if rng.random() < 0.5:
+            parts.append(subjective_sentence(rng))
+        parts.append(rng.choice(NOISE))
+        if rng.random() < 0.6:
+            parts.append(f"https://t.co/{rng.randrange(16 ** 8):08x}")
+        parts.extend(rng.sample(HASHTAGS, rng.randint(0, 3)))
+        rows.append({"post": " ".join(parts), "normalized claim": claim})
+    return pd.DataFrame(rows)
+
+
+def noisy_predictions(references, seed=0, drop_rate=0.15):
+    """Claims with words dropped or swapped, standing in for model output when scoring"""
+    rng = random.Random(seed)
+    vocabulary = THINGS + UNITS + VERBS
+    predictions = []
+    for reference in references:
+        words = [word for word in reference.split() if rng.random() > drop_rate]
+        if words and rng.random() < 0.3:
+            words[rng.randrange(len(words))] = rng.choice(vocabulary)
+        predictions.append(" ".join(words))
+    return predictions
+
+
+def gemini_lines_response(rng, language, label, count=50):
+    """A raw response to the Arabic/Bulgarian prompt: 'sentence | LABEL' lines plus the
+    usual slips (missing separator, wrong label, fragments, blank lines)"""
+    lines = []
+    for _ in range(count):
+        words = rng.sample(FOREIGN_WORDS.get(language, ADJECTIVES), 3)
+        sentence = f"{objective_sentence(rng) if label == 'OBJ' else subjective_sentence(rng)} {' '.join(words)}"
+        roll = rng.random()
+        if roll < 0.75:
+            lines.append(f"{sentence} | {label}")
+        elif roll < 0.85:
+            lines.append(sentence)
+        elif roll < 0.92:
+            lines.append(f"{sentence} | NEUTRAL")
+        else:
+            lines.extend(["", "ok |"])
+    return "\n".join(lines)
+
+
+def gemini_text_response(rng, count=50):
+    """A raw response to the English prompts: pipe-separated lines, numbered 'N. sentence LABEL'
+    lines and the format/example lines Gemini tends to echo"""
+    lines = ["Format: statement | label", "- example statement | OBJ"]
+    for i in range(count):
+        label = "SUBJ" if rng.random() < 0.5 else "OBJ"
+        sentence = subjective_sentence(rng) if label == "SUBJ" else objective_sentence(rng)
+        lines.append(f"{sentence} | {label}" if rng.random() < 0.7 else f"{i + 1}. {sentence} {label}")
+    return "\n".join(lines)
+
+
+def augmentation_responses(size, seed=0):
+    """(language, expected_label, content) responses for parse_generated_lines and English
+    responses for parse_generated_text"""
+    rng = random.Random(seed)
+    lines_responses = [(language, label, gemini_lines_response(rng, language, label))
+                       for language, label in ((rng.choice(["ar", "bg"]), rng.choice(["OBJ", "SUBJ"]))
+                                               for _ in range(size))]
+    text_responses = [gemini_text_response(rng) for _ in range(size)]
+    return lines_responses, text_responses
+
+
+def build_tokenizer(texts):
+    """Word-level fast tokenizer over every whitespace token in texts"""
+    from tokenizers import Tokenizer, models, pre_tokenizers, decoders
+    from transformers import PreTrainedTokenizerFast
+    words = sorted({word for text in texts for word in str(text).split()})
+    vocab = {word: i for i, word in enumerate(SPECIAL_TOKENS + words)}
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    tokenizer.decoder = decoders.WordPiece(prefix="##")    # Joins decoded words with spaces
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, pad_token="<pad>", eos_token="</s>",
+                                   bos_token="<s>", unk_token="<unk>")
+
+
+def build_task1_model(output_dir, texts, max_length=128, seed=0):
+    """Tiny RoBERTa sequence classifier (the notebooks' architecture family) saved to output_dir"""
+    import torch
+    from transformers import RobertaConfig, RobertaForSequenceClassification
+    torch.manual_seed(seed)
+    tokenizer = build_tokenizer(texts)
+    config = RobertaConfig(vocab_size=len(tokenizer), hidden_size=64, intermediate_size=128, num_hidden_layers=2,
+                           num_attention_heads=4, max_position_embeddings=max_length + 2,
+                           pad_token_id=tokenizer.pad_token_id, bos_token_id=tokenizer.bos_token_id,
+                           eos_token_id=tokenizer.eos_token_id, num_labels=2,
+                           id2label={0: "OBJ", 1: "SUBJ"}, label2id={"OBJ": 0, "SUBJ": 1})
+    RobertaForSequenceClassification(config).save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
+    return output_dir
+
+
+def build_task2_model(output_dir, texts, seed=0):
+    """Tiny Llama causal LM (the Llama notebook's architecture family) saved to output_dir"""
+    import torch
+    from transformers import LlamaConfig, LlamaForCausalLM
+    torch.manual_seed(seed)
+    tokenizer = build_tokenizer(texts)
+    config = LlamaConfig(vocab_size=len(tokenizer), hidden_size=64, intermediate_size=128, num_hidden_layers=2,
+                         num_attention_heads=4, num_key_value_heads=2, max_position_embeddings=1024,
+                         pad_token_id=tokenizer.pad_token_id, bos_token_id=tokenizer.bos_token_id,
+                         eos_token_id=tokenizer.eos_token_id)
+    LlamaForCausalLM(config).save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
+    return output_dir
+
+
+def write_corpus(output_dir, task1_size=2000, task2_size=256, seed=0):
+    """Write the synthetic corpora as train_syn.tsv / dev-syn.csv for use with the other scripts"""
+    os.makedirs(output_dir, exist_ok=True)
+    task1_corpus(task1_size, seed).to_csv(os.path.join(output_dir, "train_syn.tsv"), sep='\t', index=False)
+    task2_corpus(task2_size, seed).to_csv(os.path.join(output_dir, "dev-syn.csv"), index=False)
+    return output_dir
@@ -0,0 +1,228 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+import pyarrow.feather as feather
+from memory_usage import rss_mib, peak_rss_mib
+
+# Single data-access layer for the CheckThat files of both tasks.
+# `build` converts the Task 1 TSVs (train_/dev_/dev_test_/test_<lang>[_unlabeled].tsv,
+# <language>_train_augmented.tsv from the Gemini scripts, flat or in the notebooks'
+# per-language folders) and the Task 2 CSVs (<split>-<lang>.csv) into one
+# hive-partitioned dataset per task:
+#     <store>/task1/language=en/split=train/train_en.parquet
+#     <store>/task2/language=eng/split=dev/dev-eng.parquet
+# `load` reads it back with column projection and language/split filters pushed
+# down to the partition directories, through memory-mapped files. Arrow IPC
+# (--format arrow) is uncompressed and read zero-copy; Parquet is smaller on disk.
+#
+# From either task folder:
+#     sys.path.insert(0, os.path.join(REPO_ROOT, "common"))
+#     from data_store import load
+#     train = load("checkthat_store", "task1", languages=["ar", "bg"], splits=["train", "train_augmented"])
+
+DEFAULT_STORE = "checkthat_store"
+LANGUAGE_FOLDERS = {'ar': 'arabic', 'bg': 'bulgarian', 'de': 'german', 'en': 'english', 'it': 'italian'}
+TASK1_FILE = re.compile(r"^(?P<split>train|dev_test|dev|test)_(?P<language>[a-z]+)(?:_unlabeled)?\.tsv$")
+AUGMENTED_FILE = re.compile(r"^(?P<folder>[a-z]+)_train_augmented\.tsv$")
+TASK2_FILE = re.compile(r"^(?P<split>train|dev|test)-(?P<language>[a-z]+)\.csv$")
+# Columns kept per task (all strings); files without one get nulls, e.g. unlabeled test sets
+COLUMNS = {
+    "task1": ["sentence_id", "sentence", "label"],
+    "task2": ["post", "normalized claim"],
+}
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+def parse_file_name(file_name):
+    """(task, split, language) for a CheckThat / augmented file name, or None"""
+    match = TASK1_FILE.match(file_name)
+    if match:
+        return "task1", match["split"], match["language"]
+    match = AUGMENTED_FILE.match(file_name)
+    if match:
+        folders = {folder: code for code, folder in LANGUAGE_FOLDERS.items()}
+        return "task1", "train_augmented", folders.get(match["folder"], match["folder"])
+    match = TASK2_FILE.match(file_name)
+    if match:
+        return "task2", match["split"], match["language"]
+    return None
+
+
+def find_files(source_dirs):
+    """Every recognised data file under source_dirs, with its (task, split, language)"""
+    found = []
+    for source_dir in source_dirs:
+        for root, _, files in os.walk(source_dir):
+            for file_name in sorted(files):
+                parsed = parse_file_name(file_name)
+                if parsed:
+                    found.append((os.path.join(root, file_name), *parsed))
+    return found
+
+
+def read_source(path, task):
+    """A source file as an all-string Arrow table with exactly the task's columns"""
+    df = pd.read_csv(path, sep='\t' if path.endswith(".tsv") else ',', dtype=str)
+    schema = pa.schema([(name, pa.string()) for name in COLUMNS[task]])
+    return pa.Table.from_pandas(df.reindex(columns=COLUMNS[task]), schema=schema, preserve_index=False)
+
+
+def build_store(source_dirs, store=DEFAULT_STORE, file_format="parquet", compression="zstd"):
+    """Convert all recognised files into the partitioned store; returns the manifest.
+
+    The store is built in a temporary directory and then replaces the old one, so a
+    rebuild never mixes formats or keeps files whose source was removed or renamed.
+    A file found both flat and in a language folder is converted once (first found).
+    """
+    manifest = {"format": file_format, "files": []}
+    tmp_store = f"{store.rstrip(os.sep)}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_store, ignore_errors=True)
+    os.makedirs(tmp_store)
+    sources = {}
+    for path, task, split, language in find_files(source_dirs):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        relative = os.path.join(task, f"language={language}", f"split={split}", stem + FORMATS[file_format])
+        if relative in sources:
+            print(f"{path}: skipped, same file as {sources[relative]}")
+            continue
+        sources[relative] = path
+        table = read_source(path, task)
+        target = os.path.join(tmp_store, relative)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if file_format == "parquet":
+            pq.write_table(table, target, compression=compression)
+        else:
+            feather.write_feather(table, target, compression="uncompressed")
+        manifest["files"].append({"source": path, "path": relative, "task": task,
+                                  "split": split, "language": language, "rows": table.num_rows})
+        print(f"{path} -> {os.path.join(store, relative)} ({table.num_rows} rows)")
+    with open(os.path.join(tmp_store, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    old_store = f"{store.rstrip(os.sep)}.old-{os.getpid()}"
+    if os.path.exists(store):
+        os.rename(store, old_store)
+    os.rename(tmp_store, store)
+    shutil.rmtree(old_store, ignore_errors=True)
+    return manifest
+
+
+def open_dataset(store, task):
+    """Dataset over exactly the files the manifest lists for task (nothing else in the folder)"""
+    with open(os.path.join(store, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    paths = [os.path.join(store, entry["path"]) for entry in manifest["files"] if entry["task"] == task]
+    if not paths:
+        raise ValueError(f"No {task} files in {store}")
+    return ds.dataset(paths, format="parquet" if manifest["format"] == "parquet" else "ipc",
+                      partitioning="hive", partition_base_dir=os.path.join(store, task),
+                      filesystem=pafs.LocalFileSystem(use_mmap=True))
+
+
+def load(store, task, languages=None, splits=None, columns=None, to_pandas=True, arrow_strings=False):
+    """Rows of a task, optionally only some languages/splits and columns.
+
+    Filters on language/split skip whole partition directories; only the
+    requested columns are read. `language` and `split` can be requested as columns.
+    arrow_strings=True keeps text in Arrow buffers (pd.ArrowDtype) instead of
+    creating a Python object per cell.
+    """
+    dataset = open_dataset(store, task)
+    expression = None
+    for field, values in (("language", languages), ("split", splits)):
+        if values:
+            condition = ds.field(field).isin(list(values))
+            expression = condition if expression is None else expression & condition
+    table = dataset.to_table(columns=columns, filter=expression)
+    if not to_pandas:
+        return table
+    return table.to_pandas(types_mapper=pd.ArrowDtype) if arrow_strings else table.to_pandas()
+
+
+def pandas_load(source_dirs, task, languages=None, splits=None, columns=None):
+    """The current path: pd.read_csv of every matching source file, then concat"""
+    frames, seen = [], set()
+    for path, file_task, split, language in find_files(source_dirs):
+        if file_task != task or (languages and language not in languages) or (splits and split not in splits):
+            continue
+        key = (split, language, os.path.basename(path))
+        if key in seen:
+            continue  # Same file flat and in a language folder; the store keeps one copy too
+        seen.add(key)
+        df = pd.read_csv(path, sep='\t' if path.endswith(".tsv") else ',')
+        df["language"], df["split"] = language, split
+        frames.append(df[columns] if columns else df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _measure(function, kwargs):
+    """Run in a fresh process: seconds, rows, RSS growth and peak RSS (MiB)"""
+    before = rss_mib()
+    start = time.perf_counter()
+    result = function(**kwargs)
+    seconds = time.perf_counter() - start
+    return {"seconds": seconds, "rows": len(result), "rss_mib": rss_mib() - before if before is not None else None,
+            "peak_rss_mib": peak_rss_mib()}
+
+
+def benchmark(source_dirs, store, task, queries):
+    """pandas TSV/CSV loading vs the store for each query, each run in its own process"""
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    for name, query in queries.items():
+        for method, function, kwargs in (("pandas", pandas_load, {"source_dirs": source_dirs}),
+                                         ("store", load, {"store": store}),
+                                         ("store, arrow strings", load, {"store": store, "arrow_strings": True})):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(_measure, function, {**kwargs, "task": task, **query}).result()
+            rows.append({"query": name, "method": method, **result})
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partitioned Parquet/Arrow store for the CheckThat data")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Convert TSV/CSV files into the store")
+    build.add_argument("--source", nargs="+", required=True, help="Data folders (searched recursively)")
+    build.add_argument("--store", default=DEFAULT_STORE)
+    build.add_argument("--format", choices=sorted(FORMATS), default="parquet")
+    build.add_argument("--compression", default="zstd", help="Parquet compression codec")
+    bench = subparsers.add_parser("benchmark", help="Load time and RSS vs pandas TSV/CSV reading")
+    bench.add_argument("--source", nargs="+", required=True)
+    bench.add_argument("--store", default=DEFAULT_STORE)
+    bench.add_argument("--task", choices=sorted(COLUMNS), default="task1")
+    bench.add_argument("--language", default=None, help="Language for the filtered, projected query")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        manifest = build_store(args.source, args.store, args.format, args.compression)
+        print(f"{len(manifest['files'])} files, {sum(f['rows'] for f in manifest['files'])} rows in {args.store}")
+        return
+
+    languages = sorted({f[3] for f in find_files(args.source) if f[1] == args.task})
+    if not languages:
+        sys.exit(f"No {args.task} files found in {args.source}")
+    language = args.language or languages[0]
+    text_column = COLUMNS[args.task][1 if args.task == "task1" else 0]
+    queries = {
+        "all rows": {},
+        f"{language}, train, 2 columns": {"languages": [language], "splits": ["train"],
+                                          "columns": [text_column, COLUMNS[args.task][-1]]},
+    }
+    results = benchmark(args.source, args.store, args.task, queries)
+    print(results.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
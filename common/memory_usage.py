@@ -0,0 +1,26 @@
+import os
+import resource
+
+# Process memory readings shared by the benchmark and report scripts.
+# rss_mib() is the current resident set size, read from /proc (Linux only);
+# peak_rss_mib() is the process-lifetime peak from getrusage, whose ru_maxrss is
+# in KiB on Linux and in bytes on macOS.
+#
+# From a task folder:
+#     sys.path.insert(0, os.path.join(REPO_ROOT, "common"))
+#     from memory_usage import rss_mib, peak_rss_mib
+
+
+def rss_mib():
+    """Current resident set size of this process in MiB (Linux), else None"""
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return None
+
+
+def peak_rss_mib():
+    """Peak resident set size of this process so far in MiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if os.uname().sysname == "Darwin" else peak / 2 ** 10